@@ -0,0 +1,346 @@
+"""
+Transcript Alignment
+Myers O(ND) diff between the raw transcript and the cleaned text, producing
+edit regions mapped back to the original word timestamps
+"""
+
+from dataclasses import dataclass
+from word_table import WordTable
+from filler_matcher import normalize_token
+
+
+@dataclass
+class EditRegion:
+    """One place where the cleaned text differs from what was said"""
+    kind: str          # 'delete', 'replace' or 'insert'
+    orig_start: int    # Original word range [orig_start, orig_end)
+    orig_end: int
+    new_start: int     # Cleaned token range [new_start, new_end)
+    new_end: int
+    new_text: str      # Cleaned words for this region ('' for deletes)
+    start: float       # Audio span to regenerate; for inserts the gap between words
+    end: float
+
+
+def tokenize(text) -> list:
+    """
+    Split text into word tokens
+    
+    Args:
+        text: String, list of words, or list of sentences (lists of words)
+    """
+    if isinstance(text, str):
+        return text.split()
+    if text and not isinstance(text[0], str):
+        return [word for sentence in text for word in sentence]
+    return list(text)
+
+
+def opcodes(a: list, b: list) -> list:
+    """
+    Shortest edit script between two token lists (Myers' O(ND) algorithm)
+    
+    Runs in time proportional to len(a) + len(b) times the number of edits,
+    so cost tracks how much cleaning was done rather than transcript length
+    squared, and an insertion or deletion never throws later words out of sync.
+    
+    Args:
+        a: Original tokens (compared as given; normalize first)
+        b: New tokens
+    
+    Returns:
+        difflib-style list of (tag, i1, i2, j1, j2) with tag in
+        'equal', 'delete', 'insert', 'replace'
+    """
+    # Common prefix/suffix never need the search
+    prefix = 0
+    while prefix < len(a) and prefix < len(b) and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while (suffix < len(a) - prefix and suffix < len(b) - prefix
+           and a[-1 - suffix] == b[-1 - suffix]):
+        suffix += 1
+    
+    matches = [(prefix + i, prefix + j)
+               for i, j in _myers_matches(a[prefix:len(a) - suffix], b[prefix:len(b) - suffix])]
+    matches = ([(i, i) for i in range(prefix)] + matches +
+               [(len(a) - suffix + i, len(b) - suffix + i) for i in range(suffix)])
+    
+    # Turn matched pairs into runs
+    codes = []
+    i = j = 0
+    for mi, mj in matches + [(len(a), len(b))]:
+        if mi > i or mj > j:
+            tag = 'replace' if mi > i and mj > j else ('delete' if mi > i else 'insert')
+            codes.append((tag, i, mi, j, mj))
+        if mi < len(a) or mj < len(b):
+            if codes and codes[-1][0] == 'equal' and codes[-1][2] == mi and codes[-1][4] == mj:
+                tag, i1, _, j1, _ = codes[-1]
+                codes[-1] = ('equal', i1, mi + 1, j1, mj + 1)
+            else:
+                codes.append(('equal', mi, mi + 1, mj, mj + 1))
+        i, j = mi + 1, mj + 1
+    return codes
+
+
+def _myers_matches(a: list, b: list) -> list:
+    """
+    Matched (i, j) index pairs along one shortest edit path
+    
+    Linear-space variant: find the middle snake of the path, then recurse on
+    the halves either side of it, so memory stays O(N) however heavy the
+    edits (keeping every depth's frontier for a backtrack would be O(D^2)).
+    """
+    matches = []
+    _divide(a, b, 0, len(a), 0, len(b), matches)
+    return matches
+
+
+def _divide(a: list, b: list, a0: int, a1: int, b0: int, b1: int, matches: list):
+    """Append the matches for a[a0:a1] vs b[b0:b1], in order"""
+    while a0 < a1 and b0 < b1 and a[a0] == b[b0]:
+        matches.append((a0, b0))
+        a0 += 1
+        b0 += 1
+    suffix = 0
+    while a0 < a1 - suffix and b0 < b1 - suffix and a[a1 - 1 - suffix] == b[b1 - 1 - suffix]:
+        suffix += 1
+    a1 -= suffix
+    b1 -= suffix
+    
+    if a0 < a1 and b0 < b1:
+        d, x, y, u, v = _middle_snake(a, b, a0, a1, b0, b1)
+        if d > 1:
+            _divide(a, b, a0, a0 + x, b0, b0 + y, matches)
+            matches.extend((a0 + x + t, b0 + y + t) for t in range(u - x))
+            _divide(a, b, a0 + u, a1, b0 + v, b1, matches)
+        else:
+            # One edit left: the greedy trace is at most two frontiers deep
+            matches.extend((a0 + i, b0 + j) for i, j in _greedy_matches(a[a0:a1], b[b0:b1]))
+    
+    matches.extend((a1 + t, b1 + t) for t in range(suffix))
+
+
+def _middle_snake(a: list, b: list, a0: int, a1: int, b0: int, b1: int) -> tuple:
+    """
+    Search forwards and backwards at once until the paths meet
+    
+    Returns:
+        (edit distance, x, y, u, v): the snake from (x, y) to (u, v), relative to (a0, b0)
+    """
+    n, m = a1 - a0, b1 - b0
+    delta = n - m
+    odd = delta % 2 == 1
+    limit = (n + m + 1) // 2
+    offset = limit + 1
+    forward = [0] * (2 * limit + 3)   # Furthest x on each diagonal k = x - y
+    backward = [0] * (2 * limit + 3)  # Same, counted from the ends (diagonal c = delta - k)
+    
+    for d in range(limit + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and forward[offset + k - 1] < forward[offset + k + 1]):
+                x = forward[offset + k + 1]
+            else:
+                x = forward[offset + k - 1] + 1
+            y = x - k
+            start_x, start_y = x, y
+            while x < n and y < m and a[a0 + x] == b[b0 + y]:
+                x += 1
+                y += 1
+            forward[offset + k] = x
+            c = delta - k
+            if odd and -(d - 1) <= c <= d - 1 and x + backward[offset + c] >= n:
+                return 2 * d - 1, start_x, start_y, x, y
+        
+        for c in range(-d, d + 1, 2):
+            if c == -d or (c != d and backward[offset + c - 1] < backward[offset + c + 1]):
+                x = backward[offset + c + 1]
+            else:
+                x = backward[offset + c - 1] + 1
+            y = x - c
+            start_x, start_y = x, y
+            while x < n and y < m and a[a1 - 1 - x] == b[b1 - 1 - y]:
+                x += 1
+                y += 1
+            backward[offset + c] = x
+            k = delta - c
+            if not odd and -d <= k <= d and x + forward[offset + k] >= n:
+                return 2 * d, n - x, m - y, n - start_x, m - start_y
+    raise AssertionError("paths never met")
+
+
+def _greedy_matches(a: list, b: list) -> list:
+    """Matched pairs from the plain O(ND) search with a per-depth trace (small D only)"""
+    n, m = len(a), len(b)
+    if n == 0 or m == 0:
+        return []
+    
+    v = {1: 0}
+    trace = []
+    for d in range(n + m + 1):
+        trace.append(dict(v))
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[k - 1] < v[k + 1]):
+                x = v[k + 1]          # Step down: token inserted from b
+            else:
+                x = v[k - 1] + 1      # Step right: token deleted from a
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[k] = x
+            if x >= n and y >= m:
+                return _backtrack(trace, n, m)
+    return []
+
+
+def _backtrack(trace: list, n: int, m: int) -> list:
+    matches = []
+    x, y = n, m
+    for d in range(len(trace) - 1, -1, -1):
+        v = trace[d]
+        k = x - y
+        if k == -d or (k != d and v[k - 1] < v[k + 1]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = v[prev_k]
+        prev_y = prev_x - prev_k
+        
+        # Diagonal (matching) moves made after the edit at this depth
+        while x > prev_x and y > prev_y:
+            x -= 1
+            y -= 1
+            matches.append((x, y))
+        
+        x, y = prev_x, prev_y
+    matches.reverse()
+    return matches
+
+
+def align(original_words, cleaned_text) -> list:
+    """
+    Edit regions between what was said and the cleaned transcript
+    
+    Tokens are compared after normalize_token() (case and punctuation don't
+    count as edits), but new_text keeps the cleaned text's own spelling.
+    
+    Args:
+        original_words: WordTable or list of word dicts (with timestamps)
+        cleaned_text: Cleaned transcript (string, words, or sentences of words)
+    
+    Returns:
+        List of EditRegion in transcript order
+    """
+    words = WordTable.coerce(original_words)
+    cleaned = tokenize(cleaned_text)
+    count = len(words)
+    
+    codes = opcodes([normalize_token(w) for w in words.words],
+                    [normalize_token(w) for w in cleaned])
+    
+    regions = []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == 'equal':
+            continue
+        if i2 > i1:
+            start, end = words.starts[i1], words.ends[i2 - 1]
+        else:
+            # Insertion: the silence between the neighbouring words
+            start = words.ends[i1 - 1] if i1 > 0 else (words.starts[0] if count else 0.0)
+            end = words.starts[i1] if i1 < count else start
+        regions.append(EditRegion(tag, i1, i2, j1, j2, " ".join(cleaned[j1:j2]), start, end))
+    return regions
+
+
+def with_context(regions: list, original_words, cleaned_text, context: int = 1) -> list:
+    """
+    Widen regions by `context` unchanged words on each side, merging any that then touch
+    
+    Regenerating a word either side gives TTS natural co-articulation at the joins.
+    
+    Returns:
+        New list of EditRegion ('replace' unless a merged region is a pure delete/insert)
+    """
+    words = WordTable.coerce(original_words)
+    cleaned = tokenize(cleaned_text)
+    
+    widened = []
+    for region in regions:
+        orig_start = max(0, region.orig_start - context)
+        orig_end = min(len(words), region.orig_end + context)
+        new_start = max(0, region.new_start - context)
+        new_end = min(len(cleaned), region.new_end + context)
+        
+        if widened and orig_start <= widened[-1].orig_end:
+            previous = widened.pop()
+            orig_start, new_start = previous.orig_start, previous.new_start
+        
+        if orig_end > orig_start:
+            start, end = words.starts[orig_start], words.ends[orig_end - 1]
+        else:
+            start, end = region.start, region.end
+        kind = ('replace' if orig_end > orig_start and new_end > new_start
+                else 'delete' if orig_end > orig_start else 'insert')
+        widened.append(EditRegion(kind, orig_start, orig_end, new_start, new_end,
+                                  " ".join(cleaned[new_start:new_end]), start, end))
+    return widened
+
+
+# TEST CODE - align a long transcript against an edited copy
+if __name__ == "__main__":
+    import difflib
+    import random
+    import time
+    
+    print("=" * 50)
+    print("TRANSCRIPT ALIGNMENT TEST")
+    print("=" * 50)
+    print()
+    
+    vocabulary = ["we", "shipped", "the", "demo", "and", "it", "worked", "on", "friday",
+                  "team", "built", "a", "speech", "editor", "today"]
+    words = WordTable()
+    for i in range(20000):
+        words.append(random.choice(vocabulary), i * 0.3, i * 0.3 + 0.25, 0.9)
+    
+    # Cleaning: drop ~5% of words, reword ~1%, add the odd word
+    cleaned = []
+    for w in words.words:
+        roll = random.random()
+        if roll < 0.05:
+            continue
+        if roll < 0.06:
+            cleaned.append("finished")
+        elif roll < 0.065:
+            cleaned += [w.capitalize() + ",", "then"]
+        else:
+            cleaned.append(w)
+    
+    started = time.perf_counter()
+    regions = align(words, cleaned)
+    myers_seconds = time.perf_counter() - started
+    
+    normalized = [normalize_token(w) for w in cleaned]
+    codes = opcodes(list(words.words), normalized)
+    
+    # Applying the script to the original must give the cleaned tokens back
+    rebuilt = []
+    for tag, i1, i2, j1, j2 in codes:
+        rebuilt += words.words[i1:i2] if tag == 'equal' else normalized[j1:j2]
+    
+    started = time.perf_counter()
+    reference = difflib.SequenceMatcher(None, list(words.words), normalized, autojunk=False).get_opcodes()
+    difflib_seconds = time.perf_counter() - started
+    
+    def edit_cost(script):
+        return sum(max(i2 - i1, j2 - j1) if tag == 'replace' else (i2 - i1) + (j2 - j1)
+                   for tag, i1, i2, j1, j2 in script if tag != 'equal')
+    
+    print(f"Words: {len(words)}, regions: {len(regions)}")
+    print(f"Myers:   {myers_seconds * 1000:.1f} ms")
+    print(f"difflib: {difflib_seconds * 1000:.1f} ms")
+    print(f"Script reproduces cleaned text: {rebuilt == normalized}")
+    print(f"Edit size (Myers vs difflib): {edit_cost(codes)} vs {edit_cost(reference)}")
+    print(f"First region: {regions[0]}")
+    print(f"With context: {with_context(regions, words, cleaned)[0]}")
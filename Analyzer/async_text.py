@@ -0,0 +1,185 @@
+"""
+Async Audio to Text Transcription using Speechmatics
+Runs many transcription jobs from one event loop over a pooled HTTP client
+"""
+
+import os
+import asyncio
+import json
+import httpx
+from text import AudioTranscriber, PollSchedule, mime_type_for, audio_duration
+
+
+class AsyncAudioTranscriber:
+    """asyncio-native Speechmatics transcriber with connection pooling and adaptive polling"""
+    
+    def __init__(self, api_key: str, base_url: str = "https://asr.api.speechmatics.com/v2",
+                 max_connections: int = 20, timeout: float = None):
+        """
+        Initialize the transcriber
+        
+        Args:
+            api_key: Your Speechmatics API key
+            base_url: API root (override to point at a local stand-in server)
+            max_connections: Size of the shared HTTP connection pool
+            timeout: Per-job deadline in seconds (default: scaled to audio length)
+        """
+        # Job config, headers and result parsing are shared with the sync transcriber
+        self._sync = AudioTranscriber(api_key, base_url)
+        self.base_url = self._sync.base_url
+        self.timeout = timeout
+        self.client = httpx.AsyncClient(
+            headers=self._sync._headers(),
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(60.0, connect=10.0)
+        )
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        await self.aclose()
+    
+    async def aclose(self):
+        """Close the pooled connections"""
+        await self.client.aclose()
+    
+    async def transcribe(self, audio_path: str, language: str = "en") -> dict:
+        """
+        Transcribe audio file to text
+        
+        Args:
+            audio_path: Path to the audio file (.wav)
+            language: Language code (default: "en" for English)
+        
+        Returns:
+            Same dictionary as AudioTranscriber.transcribe()
+        """
+        if not os.path.exists(audio_path):
+            raise FileNotFoundError(f"Audio file not found: {audio_path}")
+        
+        # File reads and the duration probe (ffprobe for non-WAV input) happen off the event loop
+        audio_data = await asyncio.to_thread(_read_file, audio_path)
+        audio_seconds = await asyncio.to_thread(audio_duration, audio_path)
+        
+        try:
+            transcript_data = await self.transcribe_data(
+                audio_data, os.path.basename(audio_path), language,
+                audio_seconds=audio_seconds
+            )
+            return self._sync._parse_transcript(transcript_data)
+        except Exception as e:
+            raise Exception(f"Transcription failed: {str(e)}")
+    
+    async def transcribe_many(self, audio_paths: list, language: str = "en",
+                              max_concurrency: int = 10) -> list:
+        """
+        Transcribe several files with at most max_concurrency jobs in flight
+        
+        Returns:
+            One result per path, in order; failed jobs are returned as the Exception
+        """
+        slots = asyncio.Semaphore(max_concurrency)
+        
+        async def run(path):
+            async with slots:
+                return await self.transcribe(path, language)
+        
+        return await asyncio.gather(*(run(path) for path in audio_paths), return_exceptions=True)
+    
+    async def transcribe_data(self, audio_data: bytes, filename: str, language: str = "en",
+                              audio_seconds: float = None) -> dict:
+        """
+        Run one transcription job on in-memory audio
+        
+        Returns:
+            Raw json-v2 transcript from Speechmatics
+        """
+        job_id = await self.submit_job(audio_data, filename, language)
+        await self.wait_for_job(job_id, PollSchedule(audio_seconds, timeout=self.timeout))
+        return await self.fetch_transcript(job_id)
+    
+    async def submit_job(self, audio_data: bytes, filename: str, language: str = "en") -> str:
+        """Submit the job and return its ID"""
+        files = {
+            'data_file': (filename, audio_data, mime_type_for(filename)),
+            'config': (None, json.dumps(self._sync.job_config(language)), 'application/json')
+        }
+        
+        response = await self.client.post(f"{self.base_url}/jobs", files=files)
+        
+        if response.status_code != 201:
+            raise Exception(f"Failed to submit job: {response.status_code} - {response.text}")
+        
+        return response.json()['id']
+    
+    async def wait_for_job(self, job_id: str, schedule: PollSchedule):
+        """Poll until the job is done, sleeping on the event loop between polls"""
+        while True:
+            response = await self.client.get(f"{self.base_url}/jobs/{job_id}")
+            
+            if response.status_code != 200:
+                raise Exception(f"Failed to get job status: {response.text}")
+            
+            job = response.json()['job']
+            
+            if job['status'] == 'done':
+                return
+            elif job['status'] == 'rejected':
+                raise Exception("Job was rejected by Speechmatics")
+            
+            schedule.update_duration(job.get('duration'))
+            await asyncio.sleep(schedule.next_delay())
+    
+    async def fetch_transcript(self, job_id: str) -> dict:
+        """Get the json-v2 transcript"""
+        response = await self.client.get(
+            f"{self.base_url}/jobs/{job_id}/transcript",
+            params={'format': 'json-v2'}
+        )
+        
+        if response.status_code != 200:
+            raise Exception(f"Failed to get transcript: {response.text}")
+        
+        return response.json()
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+# TEST CODE - many concurrent jobs against the local fake Speechmatics server
+if __name__ == "__main__":
+    import tempfile
+    import time
+    from fake_servers import FakeSpeechmaticsServer, make_speech_like_wav
+    
+    print("=" * 60)
+    print("ASYNC TRANSCRIPTION TEST (local fake ASR)")
+    print("=" * 60)
+    print()
+    
+    num_jobs = 50
+    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as f:
+        f.write(make_speech_like_wav(20))
+        test_audio = f.name
+    
+    async def run_test(url):
+        async with AsyncAudioTranscriber("fake-key", base_url=url) as transcriber:
+            return await transcriber.transcribe_many([test_audio] * num_jobs)
+    
+    with FakeSpeechmaticsServer(base_delay=1.0) as server:
+        started = time.time()
+        results = asyncio.run(run_test(server.url))
+        elapsed = time.time() - started
+        polls = server.stats['status_polls']
+    
+    os.remove(test_audio)
+    
+    failures = [r for r in results if isinstance(r, Exception)]
+    print(f"Jobs: {num_jobs} ({len(failures)} failed)")
+    print(f"Wall time: {elapsed:.2f}s")
+    print(f"Status polls: {polls} ({polls / num_jobs:.1f} per job)")
+    print(f"Words per job: {results[0]['metadata']['word_count']}")
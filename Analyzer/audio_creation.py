@@ -5,31 +5,96 @@ Creates new audio with cleaned transcript using original speaker's voice
 
 import os
 import csv
+import time
 from elevenlabs import VoiceSettings
 from elevenlabs.client import ElevenLabs
+from audio_extraction import CLONE_MP3
+from media_probe import probe_media
+from voice_registry import VoiceRegistry
+from tts_engine import TTSEngine, DEFAULT_SAMPLE_RATE
+from wav_writer import StreamingWavWriter
+from region_splicer import RegionSplicer
+from alignment import align
+from cache import FileCache
+
+try:
+    from elevenlabs.core.api_error import ApiError as ElevenLabsApiError
+except ImportError:  # Older SDKs
+    ElevenLabsApiError = None
+
+VOICE_SETTINGS_PARAMS = {
+    'stability': 0.5,
+    'similarity_boost': 0.75,
+    'style': 0.0,
+    'use_speaker_boost': True
+}
+VOICE_SETTINGS = VoiceSettings(**VOICE_SETTINGS_PARAMS)
+MODEL_ID = "eleven_multilingual_v2"
+
+
+def _voice_not_found(error: Exception) -> bool:
+    """
+    True if an ElevenLabs error (or one it was re-raised as) says the voice doesn't exist
+    
+    A bare 404 isn't enough: other services in the same call chain (e.g. Groq
+    for a retired model when TTS is fed from stream_transcript) 404 too. Only
+    ElevenLabs' voice_not_found status, or a 404 ElevenLabs ApiError, counts.
+    """
+    while error is not None:
+        message = f"{error} {getattr(error, 'body', '')}".lower()
+        if 'voice_not_found' in message or 'voice not found' in message:
+            return True
+        if (ElevenLabsApiError is not None and isinstance(error, ElevenLabsApiError)
+                and error.status_code == 404):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
 
 class AudioCreator:
     """Generate audio with voice cloning"""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, registry: VoiceRegistry = None, tts_cache: FileCache = None,
+                 sample_rate: int = DEFAULT_SAMPLE_RATE):
         """
         Initialize ElevenLabs client
         
         Args:
             api_key: Your ElevenLabs API key
+            registry: Optional VoiceRegistry, so speakers cloned before reuse their voice
+            tts_cache: Optional FileCache of synthesized sentences, so re-running after an
+                       edit only synthesizes changed sentences (with a cache set, every
+                       generate_text() call goes through the sentence engine)
+            sample_rate: Sample rate of raw PCM requested for .wav outputs
+                         (ElevenLabs offers 16000, 22050, 24000 and 44100)
         """
         self.client = ElevenLabs(api_key=api_key)
+        self.registry = registry
+        self.tts_cache = tts_cache
+        self.sample_rate = sample_rate
+        if registry is not None and registry.client is None:
+            registry.client = self.client  # Needed to delete evicted voices
     
     def clone_voice_and_generate(self, original_audio_path: str, 
                                 fixed_transcript_csv: str, 
-                                output_path: str = "processed/improved_audio.mp3") -> str:
+                                output_path: str = "processed/improved_audio.mp3",
+                                clone_audio_path: str = None,
+                                speaker: str = None,
+                                tts_workers: int = None) -> str:
         """
         Clone voice from original audio and generate new audio with cleaned text
         
         Args:
             original_audio_path: Path to original audio file (.wav)
             fixed_transcript_csv: Path to fixed transcript CSV
-            output_path: Where to save the new audio
+            output_path: Where to save the new audio (.wav = PCM in a WAV container,
+                         otherwise MP3; with tts_workers or a tts_cache always WAV - see the returned path)
+            clone_audio_path: Clone-quality MP3 already made during extraction
+                              (VideoProcessor.extract_renditions); skips the
+                              re-encode from the 16kHz WAV when given
+            speaker: Speaker name for the voice registry (default: keyed by the audio itself)
+            tts_workers: Synthesize sentences concurrently on this many workers and
+                         join them into a WAV (None = one request for the whole text)
             
         Returns:
             Path to generated audio file
@@ -48,42 +113,166 @@ class AudioCreator:
         print(f"✅ Loaded cleaned text ({len(cleaned_text)} characters)")
         print()
         
-        # Step 1: Prepare audio for cloning (convert to MP3 format)
-        print("🎤 Preparing audio for voice cloning...")
-        print(f"   Source: {original_audio_path}")
+        return self.generate_with_voice(
+            lambda voice_id: self.generate_text(cleaned_text, voice_id, output_path, tts_workers),
+            original_audio_path, clone_audio_path, speaker
+        )
+    
+    def generate_text(self, cleaned_text: str, voice_id: str, output_path: str,
+                      tts_workers: int = None) -> str:
+        """
+        Speak cleaned text with a voice
         
-        # Create an MP3 version for cloning (ElevenLabs prefers MP3)
-        import subprocess
-        temp_audio_for_cloning = original_audio_path.replace('.wav', '_clone.mp3')
+        Args:
+            cleaned_text: Text to speak
+            voice_id: ElevenLabs voice ID
+            output_path: Where to save the audio
+            tts_workers: Synthesize sentences concurrently on this many workers
+                         (None = one request for the whole text, unless there is a
+                         tts_cache - then sentences are synthesized one at a time)
+            
+        Returns:
+            Path to generated audio file (always a WAV when sentences are synthesized)
+        """
+        if tts_workers or self.tts_cache is not None:
+            # Per-sentence synthesis is what lets the cache skip unchanged sentences
+            return self.generate_parallel(cleaned_text, voice_id, output_path, max_workers=tts_workers or 1,
+                                          sample_rate=self.sample_rate)
+        
+        # Step 2: Generate audio with cloned voice
+        print("🎵 Generating new audio with cleaned transcript...")
         
         try:
-            # Convert to high-quality MP3 for cloning (ElevenLabs specs)
-            subprocess.run([
-                'ffmpeg', '-i', original_audio_path,
-                '-acodec', 'libmp3lame',
-                '-ar', '44100',      # 44.1kHz sample rate
-                '-ac', '1',          # Mono
-                '-b:a', '192k',      # 192kbps bitrate
-                '-sample_fmt', 's16', # 16-bit
-                '-y',
-                temp_audio_for_cloning
-            ], check=True, capture_output=True, timeout=30)
+            audio_generator = self.client.text_to_speech.convert(
+                voice_id=voice_id,
+                text=cleaned_text,
+                model_id=MODEL_ID,
+                voice_settings=VOICE_SETTINGS,
+                output_format=self._output_format(output_path)
+            )
+            
+            # Save the audio
+            print(f"💾 Saving to: {output_path}")
             
-            cloning_audio_path = temp_audio_for_cloning
+            with self._open_output(output_path) as f:
+                for chunk in audio_generator:
+                    f.write(chunk)
             
-            # Check file size
-            file_size = os.path.getsize(cloning_audio_path) / 1024  # KB
-            print(f"✅ Audio prepared for cloning ({file_size:.1f} KB)")
+            print(f"✅ Audio generated successfully!")
+            print(f"   Output: {output_path}")
             
-            if file_size < 50:
-                print(f"⚠️ Warning: Audio file is very small ({file_size:.1f} KB)")
-                print("   Voice cloning works best with 30+ seconds of audio")
+            return output_path
             
         except Exception as e:
-            print(f"⚠️ Audio preparation failed: {str(e)}")
-            print("   Cannot proceed with voice cloning")
-            raise
+            raise Exception(f"Audio generation failed: {str(e)}")
+    
+    def generate_with_voice(self, generate, original_audio_path: str, clone_audio_path: str = None,
+                            speaker: str = None):
+        """
+        Run generate(voice_id) with the speaker's voice
+        
+        A voice reused from the registry may since have been deleted from the
+        account. If TTS reports it missing, the registry entry is dropped and
+        the speaker is cloned again, once.
+        
+        Args:
+            generate: Callable(voice_id) doing the synthesis
+            original_audio_path: Path to original audio file (.wav)
+            clone_audio_path: Clone-quality MP3 already made during extraction
+            speaker: Speaker name for the voice registry
+            
+        Returns:
+            Whatever generate() returns
+        """
+        voice_id = self.clone_voice(original_audio_path, clone_audio_path, speaker)
+        try:
+            return generate(voice_id)
+        except Exception as e:
+            if self.registry is None or not _voice_not_found(e):
+                raise
+            print(f"⚠️ Voice {voice_id} no longer exists on the account, cloning again")
+            self.registry.forget(self.registry.speaker_key(original_audio_path, speaker), voice_id)
+            voice_id = self.clone_voice(original_audio_path, clone_audio_path, speaker)
+            return generate(voice_id)
+    
+    def clone_voice(self, original_audio_path: str, clone_audio_path: str = None,
+                    speaker: str = None) -> str:
+        """
+        Clone the speaker's voice, falling back to a default voice on failure
+        
+        With a registry, a speaker cloned on an earlier run gets their existing
+        voice back without any re-encode or upload.
+        
+        Args:
+            original_audio_path: Path to original audio file (.wav)
+            clone_audio_path: Clone-quality MP3 already made during extraction
+            speaker: Speaker name for the voice registry (default: keyed by the audio itself)
+            
+        Returns:
+            ElevenLabs voice ID
+        """
+        if self.registry is None:
+            return self._clone(original_audio_path, clone_audio_path)
+        
+        registry_key = self.registry.speaker_key(original_audio_path, speaker)
+        # Lookup, clone and register as one step per speaker: a concurrent job for the
+        # same speaker waits here and then reuses the voice instead of cloning it again
+        with self.registry.claim(registry_key):
+            voice_id = self.registry.get(registry_key)
+            if voice_id:
+                print(f"♻️ Reusing cloned voice for this speaker: {voice_id}")
+                print()
+                return voice_id
+            return self._clone(original_audio_path, clone_audio_path, registry_key)
+    
+    def _clone(self, original_audio_path: str, clone_audio_path: str = None,
+               registry_key: str = None) -> str:
+        """Clone a voice (registering it under registry_key), or fall back to a default voice"""
+        # Step 1: Prepare audio for cloning (convert to MP3 format)
+        temp_audio_for_cloning = None
         
+        if not clone_audio_path and self._is_clone_ready(original_audio_path):
+            clone_audio_path = original_audio_path
+        
+        if clone_audio_path:
+            cloning_audio_path = clone_audio_path
+            print(f"🎤 Using clone audio from extraction: {cloning_audio_path}")
+        else:
+            print("🎤 Preparing audio for voice cloning...")
+            print(f"   Source: {original_audio_path}")
+            
+            # Create an MP3 version for cloning (ElevenLabs prefers MP3)
+            import subprocess
+            temp_audio_for_cloning = original_audio_path.replace('.wav', '_clone.mp3')
+            
+            try:
+                # Convert to high-quality MP3 for cloning (ElevenLabs specs)
+                subprocess.run([
+                    'ffmpeg', '-i', original_audio_path,
+                    '-acodec', 'libmp3lame',
+                    '-ar', '44100',      # 44.1kHz sample rate
+                    '-ac', '1',          # Mono
+                    '-b:a', '192k',      # 192kbps bitrate
+                    '-sample_fmt', 's16', # 16-bit
+                    '-y',
+                    temp_audio_for_cloning
+                ], check=True, capture_output=True, timeout=30)
+                
+                cloning_audio_path = temp_audio_for_cloning
+                
+                # Check file size
+                file_size = os.path.getsize(cloning_audio_path) / 1024  # KB
+                print(f"✅ Audio prepared for cloning ({file_size:.1f} KB)")
+                
+                if file_size < 50:
+                    print(f"⚠️ Warning: Audio file is very small ({file_size:.1f} KB)")
+                    print("   Voice cloning works best with 30+ seconds of audio")
+                
+            except Exception as e:
+                print(f"⚠️ Audio preparation failed: {str(e)}")
+                print("   Cannot proceed with voice cloning")
+                raise
+            
         print()
         
         # Step 2: Clone voice using correct file handle method
@@ -92,6 +281,10 @@ class AudioCreator:
         voice_id = None
         
         try:
+            if self.registry is not None:
+                self.registry.make_room()
+            
+            clone_started = time.time()
             # IMPORTANT: Pass file as (filename, file_handle) tuple
             with open(cloning_audio_path, 'rb') as audio_file:
                 voice = self.client.voices.ivc.create(
@@ -101,17 +294,21 @@ class AudioCreator:
                 )
             
             voice_id = voice.voice_id
-            print(f"✅ Voice cloned successfully! Voice ID: {voice_id}")
+            clone_seconds = time.time() - clone_started
+            print(f"✅ Voice cloned successfully in {clone_seconds:.1f}s! Voice ID: {voice_id}")
+            
+            if registry_key is not None:
+                self.registry.register(registry_key, voice_id, clone_seconds, name="Cloned_Speaker")
             
             # Clean up temp file
-            if os.path.exists(temp_audio_for_cloning):
+            if temp_audio_for_cloning and os.path.exists(temp_audio_for_cloning):
                 os.remove(temp_audio_for_cloning)
             
             print()
             
         except Exception as e:
             # Clean up temp file
-            if os.path.exists(temp_audio_for_cloning):
+            if temp_audio_for_cloning and os.path.exists(temp_audio_for_cloning):
                 os.remove(temp_audio_for_cloning)
             
             error_msg = str(e)
@@ -125,36 +322,185 @@ class AudioCreator:
             print(f"   Voice ID: {voice_id}")
             print()
         
-        # Step 2: Generate audio with cloned voice
-        print("🎵 Generating new audio with cleaned transcript...")
+        return voice_id
+    
+    def generate_parallel(self, text: str, voice_id: str,
+                          output_path: str = "processed/improved_audio.wav",
+                          max_workers: int = 4, sample_rate: int = DEFAULT_SAMPLE_RATE) -> str:
+        """
+        Synthesize sentence segments concurrently and join them into one WAV
         
-        try:
-            audio_generator = self.client.text_to_speech.convert(
-                voice_id=voice_id,
-                text=cleaned_text,
-                model_id="eleven_multilingual_v2",
-                voice_settings=VoiceSettings(
-                    stability=0.5,
-                    similarity_boost=0.75,
-                    style=0.0,
-                    use_speaker_boost=True
-                )
-            )
-            
-            # Save the audio
-            print(f"💾 Saving to: {output_path}")
-            
-            with open(output_path, 'wb') as f:
-                for chunk in audio_generator:
-                    f.write(chunk)
+        Segments come back as raw PCM, so joins are sample-exact; a failed
+        segment is retried on its own rather than restarting the whole text.
+        
+        Args:
+            text: Text to speak
+            voice_id: ElevenLabs voice ID
+            output_path: WAV file to write (any other extension is swapped for .wav)
+            max_workers: TTS requests in flight at once
+            sample_rate: PCM sample rate to request
             
-            print(f"✅ Audio generated successfully!")
-            print(f"   Output: {output_path}")
+        Returns:
+            Path to generated audio file
+        """
+        if not output_path.lower().endswith('.wav'):
+            # Segments are joined as raw PCM, so the only honest container is WAV
+            wav_path = os.path.splitext(output_path)[0] + '.wav'
+            print(f"⚠️ Parallel synthesis writes WAV: saving to {wav_path} instead of {output_path}")
+            output_path = wav_path
+        
+        print(f"🎵 Generating audio in parallel ({max_workers} workers)...")
+        engine = self._tts_engine(voice_id, max_workers, sample_rate)
+        
+        try:
+            engine.render(text, output_path)
+        except Exception as e:
+            raise Exception(f"Audio generation failed: {str(e)}")
+        
+        report = engine.last_report
+        print(f"✅ Audio generated successfully! ({report['segments']} segments, "
+              f"{report['cached']} from cache, {report['retries']} retries, {report['seconds']:.1f}s)")
+        print(f"   Output: {output_path}")
+        return output_path
+    
+    def splice_regions(self, original_audio_path: str, words, cleaned_text: str, voice_id: str,
+                       output_path: str = "processed/improved_audio.wav",
+                       regions: list = None, max_workers: int = 4) -> str:
+        """
+        Apply the cleaning to the original recording instead of re-voicing all of it
+        
+        Deleted words are cut out of the original audio; only replaced and
+        inserted phrases are synthesized, then spliced in with crossfades at
+        the speaker's loudness.
+        
+        Args:
+            original_audio_path: 16-bit mono WAV of the original speech
+                                 (ideally the 'splice_wav' rendition)
+            words: Word timestamps of the original transcript
+            cleaned_text: Cleaned transcript
+            voice_id: ElevenLabs voice ID for the replacement phrases
+            output_path: WAV file to write
+            regions: EditRegions to apply (default: align(words, cleaned_text))
+            max_workers: TTS requests in flight at once
             
-            return output_path
+        Returns:
+            Path to generated audio file
+        """
+        if regions is None:
+            regions = align(words, cleaned_text)
+        
+        print(f"✂️ Splicing {len(regions)} edit(s) into the original audio...")
+        splicer = RegionSplicer(self._tts_engine(voice_id, max_workers, self.sample_rate))
+        
+        try:
+            splicer.splice(original_audio_path, regions, words, output_path)
+        except Exception as e:
+            raise Exception(f"Audio splicing failed: {str(e)}")
+        
+        report = splicer.last_report
+        saved = 100 * (1 - report['tts_characters'] / len(cleaned_text)) if cleaned_text else 100.0
+        print(f"✅ Audio spliced successfully! ({report['deleted']} cut, {report['synthesized']} synthesized, "
+              f"{report['removed_seconds']:.1f}s of original cut or replaced, {report['seconds']:.1f}s)")
+        print(f"   TTS characters: {report['tts_characters']} of {len(cleaned_text)} ({saved:.0f}% saved)")
+        print(f"   Output: {output_path}")
+        return output_path
+    
+    def generate_from_sentences(self, sentences, voice_id: str,
+                                output_path: str = "processed/improved_audio.mp3") -> str:
+        """
+        Synthesize sentences one at a time as they arrive, appending to one file
+        
+        Meant to be fed from SpeechCleaner.stream_transcript(): speech for the
+        first sentence is written while the LLM is still cleaning later ones.
+        Each request carries the text spoken so far as previous_text so
+        intonation stays continuous across the joins.
+        
+        Args:
+            sentences: Iterable of sentences (a generator is consumed lazily)
+            voice_id: ElevenLabs voice ID
+            output_path: Where to save the audio (.wav = one PCM stream, otherwise
+                         MP3 frames, concatenated)
             
+        Returns:
+            Path to generated audio file
+        """
+        print("🎵 Generating audio sentence by sentence...")
+        
+        started = time.time()
+        previous_text = ""
+        count = 0
+        
+        try:
+            with self._open_output(output_path) as f:
+                for sentence in sentences:
+                    audio_generator = self.client.text_to_speech.convert(
+                        voice_id=voice_id,
+                        text=sentence,
+                        model_id=MODEL_ID,
+                        voice_settings=VOICE_SETTINGS,
+                        output_format=self._output_format(output_path),
+                        previous_text=previous_text[-500:] or None
+                    )
+                    for chunk in audio_generator:
+                        f.write(chunk)
+                    
+                    if count == 0:
+                        print(f"🔊 First audio after {time.time() - started:.1f}s")
+                    count += 1
+                    previous_text = f"{previous_text} {sentence}".strip()
         except Exception as e:
             raise Exception(f"Audio generation failed: {str(e)}")
+        
+        print(f"✅ Audio generated successfully! ({count} sentences in {time.time() - started:.1f}s)")
+        print(f"   Output: {output_path}")
+        return output_path
+    
+    def _tts_engine(self, voice_id: str, max_workers: int, sample_rate: int) -> TTSEngine:
+        """TTSEngine speaking raw PCM in voice_id through the SDK, sharing the sentence cache"""
+        def synthesize(segment: str, previous_text: str = None, next_text: str = None) -> bytes:
+            return b"".join(self.client.text_to_speech.convert(
+                voice_id=voice_id,
+                text=segment,
+                model_id=MODEL_ID,
+                voice_settings=VOICE_SETTINGS,
+                output_format=f"pcm_{sample_rate}",
+                previous_text=previous_text,
+                next_text=next_text
+            ))
+        
+        return TTSEngine(synthesize, sample_rate=sample_rate, max_workers=max_workers,
+                         cache=self.tts_cache,
+                         cache_params={'voice_id': voice_id, 'model_id': MODEL_ID,
+                                       'voice_settings': VOICE_SETTINGS_PARAMS})
+    
+    def _output_format(self, output_path: str) -> str:
+        """ElevenLabs output_format matching the file extension: raw PCM for .wav, MP3 otherwise"""
+        if output_path.lower().endswith('.wav'):
+            return f"pcm_{self.sample_rate}"
+        return "mp3_44100_128"
+    
+    def _open_output(self, output_path: str):
+        """
+        Writable sink for convert() chunks requested with _output_format(output_path)
+        
+        For .wav the PCM goes straight into a WAV container as it arrives, header
+        kept valid throughout, so nothing downstream has to probe or decode MP3.
+        """
+        if self._output_format(output_path).startswith('pcm_'):
+            return StreamingWavWriter(output_path, self.sample_rate)
+        return open(output_path, 'wb')
+    
+    def _is_clone_ready(self, audio_path: str) -> bool:
+        """True if the audio is already a clone-spec MP3, so no re-encode is needed"""
+        try:
+            info = probe_media(audio_path)
+        except Exception:
+            return False
+        
+        # A bitrate-targeted MP3 is never "equivalent", so compare the fixed fields directly
+        return (info.audio_codec == 'mp3' and not info.has_video and
+                info.sample_rate == CLONE_MP3['sample_rate'] and
+                info.channels == CLONE_MP3['channels'])
     
     def generate_with_default_voice(self, fixed_transcript_csv: str,
                                    output_path: str = "processed/improved_audio.mp3",
@@ -188,11 +534,12 @@ class AudioCreator:
             audio_generator = self.client.text_to_speech.convert(
                 voice_id=voice_id,
                 text=cleaned_text,
-                model_id="eleven_multilingual_v2"
+                model_id=MODEL_ID,
+                output_format=self._output_format(output_path)
             )
             
             # Save the audio
-            with open(output_path, 'wb') as f:
+            with self._open_output(output_path) as f:
                 for chunk in audio_generator:
                     f.write(chunk)
             
@@ -6,53 +6,132 @@ Extracts audio from video files using FFmpeg
 import os
 import subprocess
 import sys
+import uuid
 from pathlib import Path
 from datetime import datetime
+from cache import FileCache, file_sha256, make_key
+from media_probe import probe_media
+
+# High-quality MP3 for voice cloning (ElevenLabs specs)
+CLONE_MP3 = {
+    'codec': 'libmp3lame',
+    'sample_rate': 44100,   # 44.1kHz sample rate
+    'channels': 1,          # Mono
+    'bitrate': '192k',      # 192kbps bitrate
+    'sample_fmt': 's16',    # 16-bit
+    'format': 'mp3'
+}
+
+# Upload codec name -> rendition used for ASR submissions
+UPLOAD_RENDITIONS = {
+    'wav': 'asr_wav',
+    'flac': 'asr_flac',
+    'opus': 'asr_opus',
+}
+
 
 class VideoProcessor:
     """Extract audio from video files"""
     
-    def __init__(self, output_dir: str = "processed/extracted"):
+    def __init__(self, output_dir: str = "processed/extracted",
+                 sample_rate: int = 16000, channels: int = 1,
+                 cache: FileCache = None):
         """
         Initialize the video processor
         
         Args:
             output_dir: Where to save extracted audio files
+            sample_rate: Output sample rate (16kHz is good for speech)
+            channels: Output channel count (1 = mono)
+            cache: Optional FileCache so re-runs on the same video skip decoding
         """
         self.output_dir = output_dir
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.cache = cache
+        # Every rendition the pipeline needs, produced together in one decode
+        self.renditions = {
+            'asr_wav': {
+                'codec': 'pcm_s16le',   # Audio codec for WAV
+                'sample_rate': sample_rate,
+                'channels': channels,
+                'format': 'wav'
+            },
+            # Smaller uploads for the ASR API: lossless FLAC or lossy Opus
+            'asr_flac': {
+                'codec': 'flac',
+                'sample_rate': sample_rate,
+                'channels': channels,
+                'format': 'flac'
+            },
+            'asr_opus': {
+                'codec': 'libopus',
+                'sample_rate': sample_rate,
+                'channels': channels,
+                'bitrate': '24k',       # Plenty for speech recognition
+                'format': 'ogg'
+            },
+            'clone_mp3': dict(CLONE_MP3),
+            # Full-band copy for splicing TTS phrases into the original (region_splicer),
+            # at the rate ElevenLabs PCM is requested in, so no resampling is needed
+            'splice_wav': {
+                'codec': 'pcm_s16le',
+                'sample_rate': 24000,
+                'channels': 1,
+                'format': 'wav'
+            },
+        }
         # Create output directory if it doesn't exist
         Path(output_dir).mkdir(parents=True, exist_ok=True)
     
-    def extract_audio(self, video_path: str) -> str:
+    def extract_audio(self, video_path: str, use_cache: bool = True) -> str:
         """
         Extract audio from video file
         
         Args:
             video_path: Path to the video file
+            use_cache: Look up / store the result in self.cache (if configured)
             
         Returns:
             Path to the extracted audio file (.wav format)
         """
+        return self.extract_renditions(video_path, ['asr_wav'], use_cache=use_cache)['asr_wav']
+    
+    def extract_renditions(self, video_path: str, names: list = None,
+                           use_cache: bool = True) -> dict:
+        """
+        Decode the video once and write every requested audio rendition in that pass
+        
+        Each rendition is encoded from the original decoded audio, so e.g. the
+        clone MP3 is made at 44.1kHz from the source rather than upsampled
+        from the 16kHz ASR file.
+        
+        Args:
+            video_path: Path to the video file
+            names: Keys of self.renditions to produce (default: all of them)
+            use_cache: Look up / store results in self.cache (if configured)
+            
+        Returns:
+            Dictionary mapping rendition name to output path
+        """
         # Check if video file exists
         if not os.path.exists(video_path):
             raise FileNotFoundError(f"Video file not found: {video_path}")
         
-        # Create output filename
-        timestamp = int(datetime.now().timestamp())
-        output_filename = f"audio_{timestamp}.wav"
-        output_path = os.path.join(self.output_dir, output_filename)
+        if names is None:
+            names = list(self.renditions)
+        
+        outputs, pending = self._plan_renditions(video_path, names, use_cache)
+        if not pending:
+            return outputs
         
-        # FFmpeg command
+        # FFmpeg command: one input, one output per rendition
         command = [
             'ffmpeg',
-            '-i', video_path,        # Input video
-            '-vn',                    # No video (audio only)
-            '-acodec', 'pcm_s16le',  # Audio codec for WAV
-            '-ar', '16000',           # 16kHz sample rate (good for speech)
-            '-ac', '1',               # Mono audio
             '-y',                     # Overwrite if exists
-            output_path
+            '-i', video_path,        # Input video
         ]
+        command += self._pending_output_args(pending)
         
         print(f"Extracting audio from: {video_path}")
         
@@ -62,12 +141,190 @@ class VideoProcessor:
         except subprocess.CalledProcessError as e:
             raise Exception(f"FFmpeg failed: {e.stderr.decode()}")
         
-        # Check if output was created
-        if not os.path.exists(output_path):
-            raise Exception("Audio extraction failed")
+        outputs.update(self._store_renditions(pending))
+        return outputs
+    
+    def encode_segment(self, audio_path: str, name: str, start: float, end: float) -> bytes:
+        """
+        Encode [start, end) seconds of an audio file as a rendition, in memory
+        
+        Used to upload each chunk of a long recording in the configured upload
+        codec (ChunkedTranscriber) rather than as raw WAV.
+        
+        Args:
+            audio_path: Source audio (e.g. the asr_wav rendition)
+            name: Key of self.renditions to encode as (a compressed one - a piped
+                  WAV header can't carry the final length)
+            start: Segment start in seconds
+            end: Segment end in seconds
+            
+        Returns:
+            Encoded bytes (container self.renditions[name]['format'])
+        """
+        spec = self.renditions[name]
+        command = [
+            'ffmpeg',
+            '-loglevel', 'error',
+            '-ss', f"{start:.3f}",    # Input seek: sample-accurate on PCM input
+            '-t', f"{end - start:.3f}",
+            '-i', audio_path,
+            '-vn'
+        ]
+        command += self._ffmpeg_output_args(spec) + ['-f', spec['format'], 'pipe:1']
+        
+        try:
+            result = subprocess.run(command, check=True, capture_output=True)
+        except subprocess.CalledProcessError as e:
+            raise Exception(f"FFmpeg failed: {e.stderr.decode()}")
+        return result.stdout
+    
+    def stream_rendition(self, video_path: str, name: str, also_write: list = None,
+                         outputs: dict = None, chunk_size: int = 64 * 1024,
+                         use_cache: bool = True):
+        """
+        Encode one rendition to a pipe and yield it while ffmpeg is still decoding
+        
+        Feed this straight into an upload body (AudioTranscriber.transcribe_stream)
+        so the network transfer overlaps extraction. Other renditions can be
+        written to files in the same ffmpeg pass; their paths are added to
+        `outputs` once the stream has been fully consumed.
         
-        print(f"Audio saved to: {output_path}")
-        return output_path
+        Streamed WAV headers can't be patched with the final length, so prefer
+        asr_flac or asr_opus as the streamed rendition.
+        
+        Args:
+            video_path: Path to the video file
+            name: Key of self.renditions to stream
+            also_write: Other rendition keys to write to files in the same pass
+            outputs: Dictionary that receives rendition name -> path for also_write
+            chunk_size: Bytes per yielded chunk
+            use_cache: Look up / store the file renditions in self.cache (if configured)
+            
+        Yields:
+            bytes of the encoded rendition (container self.renditions[name]['format'])
+        """
+        if not os.path.exists(video_path):
+            raise FileNotFoundError(f"Video file not found: {video_path}")
+        
+        outputs = {} if outputs is None else outputs
+        written, pending = self._plan_renditions(video_path, also_write or [], use_cache)
+        
+        spec = self.renditions[name]
+        command = [
+            'ffmpeg',
+            '-y',
+            '-loglevel', 'error',     # Keep stderr small so it can't fill its pipe
+            '-i', video_path,
+        ]
+        command += self._pending_output_args(pending)
+        command += ['-vn'] + self._ffmpeg_output_args(spec) + ['-f', spec['format'], 'pipe:1']
+        
+        print(f"Streaming {name} from: {video_path}")
+        
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            while True:
+                chunk = process.stdout.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+            
+            process.stdout.close()
+            stderr = process.stderr.read()
+            if process.wait() != 0:
+                raise Exception(f"FFmpeg failed: {stderr.decode()}")
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+        
+        written.update(self._store_renditions(pending))
+        outputs.update(written)
+    
+    def _plan_renditions(self, video_path: str, names: list, use_cache: bool) -> tuple:
+        """
+        Resolve which renditions still need encoding
+        
+        Returns:
+            (outputs already available {name: path},
+             pending {name: (output_path, cache_key or None)})
+        """
+        outputs = {}
+        pending = {}
+        
+        try:
+            media_info = probe_media(video_path)
+        except Exception:
+            media_info = None  # Let ffmpeg report the real problem below
+        
+        for name in names:
+            spec = self.renditions[name]
+            
+            # Input already is this rendition (e.g. a 16kHz mono WAV) - nothing to transcode
+            if media_info is not None and media_info.audio_matches(spec):
+                print(f"Input already matches {name}, skipping transcode")
+                outputs[name] = video_path
+                continue
+            
+            if self.cache is not None and use_cache:
+                cache_key = self.cache_key(video_path, name)
+                cached_path = self.cache.get(cache_key)
+                if cached_path:
+                    print(f"Using cached {name} for: {video_path}")
+                    outputs[name] = cached_path
+                    continue
+                pending[name] = (self.cache.path_for(cache_key, '.' + spec['format']), cache_key)
+            else:
+                pending[name] = (self._unique_output_path('.' + spec['format']), None)
+        
+        return outputs, pending
+    
+    def _pending_output_args(self, pending: dict) -> list:
+        """ffmpeg output options and paths for every pending rendition"""
+        args = []
+        for name, (output_path, _) in pending.items():
+            args += ['-vn']           # No video (audio only)
+            args += self._ffmpeg_output_args(self.renditions[name])
+            args += [output_path]
+        return args
+    
+    def _store_renditions(self, pending: dict) -> dict:
+        """Check ffmpeg's file outputs and move them into the cache where keyed"""
+        outputs = {}
+        for name, (output_path, cache_key) in pending.items():
+            # Check if output was created
+            if not os.path.exists(output_path):
+                raise Exception(f"Audio extraction failed ({name})")
+            
+            if cache_key:
+                output_path = self.cache.put(cache_key, output_path)
+            
+            print(f"Audio saved to: {output_path}")
+            outputs[name] = output_path
+        return outputs
+    
+    def cache_key(self, video_path: str, rendition: str = 'asr_wav') -> str:
+        """Cache key for a rendition of this video: content hash plus the ffmpeg parameters"""
+        return make_key(file_sha256(video_path), self.renditions[rendition])
+    
+    def _ffmpeg_output_args(self, spec: dict) -> list:
+        """Turn a rendition spec into ffmpeg output options"""
+        args = [
+            '-acodec', spec['codec'],
+            '-ar', str(spec['sample_rate']),
+            '-ac', str(spec['channels']),
+        ]
+        if spec.get('bitrate'):
+            args += ['-b:a', spec['bitrate']]
+        if spec.get('sample_fmt'):
+            args += ['-sample_fmt', spec['sample_fmt']]
+        return args
+    
+    def _unique_output_path(self, suffix: str = '.wav') -> str:
+        # Timestamp keeps names sortable; the random part stops same-second runs colliding
+        timestamp = int(datetime.now().timestamp())
+        output_filename = f"audio_{timestamp}_{uuid.uuid4().hex[:8]}{suffix}"
+        return os.path.join(self.output_dir, output_filename)
 
 
 # TEST CODE - Run this file directly to test
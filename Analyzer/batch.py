@@ -0,0 +1,307 @@
+"""
+Batch Pipeline
+Runs the full pipeline over a directory (or glob) of videos concurrently
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from audio_extraction import VideoProcessor, UPLOAD_RENDITIONS
+from cache import FileCache, JsonCache, file_sha256, remember_sha256
+from voice_registry import VoiceRegistry
+from llm_chunks import RateLimiter
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.m4v', '.mkv', '.webm')
+
+
+def find_videos(source: str) -> list:
+    """
+    Collect video files from a directory or a glob pattern
+    
+    Args:
+        source: Directory path or glob such as "recordings/*.mov"
+    
+    Returns:
+        Sorted list of video paths
+    """
+    if os.path.isdir(source):
+        paths = [os.path.join(source, f) for f in os.listdir(source)]
+    else:
+        paths = glob.glob(source, recursive=True)
+    
+    return sorted(p for p in paths if os.path.isfile(p) and p.lower().endswith(VIDEO_EXTENSIONS))
+
+
+def _extract_worker(video_path: str, output_dir: str, cache_dir: str, renditions: list,
+                    video_sha256: str = None) -> dict:
+    """Extraction stage - runs in a worker process since decoding is CPU-bound"""
+    if video_sha256:
+        remember_sha256(video_path, video_sha256)  # Hashed by the parent already; don't read it twice
+    processor = VideoProcessor(output_dir=output_dir, cache=FileCache(cache_dir))
+    return processor.extract_renditions(video_path, renditions)
+
+
+class BatchRunner:
+    """Run the pipeline on many videos with per-stage concurrency limits"""
+    
+    def __init__(self, config: dict, output_root: str = "processed/batch",
+                 cache_dir: str = "processed/cache/audio",
+                 cpu_workers: int = None, asr_concurrency: int = 4,
+                 llm_concurrency: int = 4, tts_concurrency: int = 2, speaker: str = None):
+        """
+        Initialize the batch runner
+        
+        Args:
+            config: API keys as returned by main.load_config()
+            output_root: Each video gets its own folder under here
+            cache_dir: Shared extracted-audio cache
+            cpu_workers: Processes for decoding (default: CPU count)
+            asr_concurrency: Max Speechmatics jobs in flight
+            llm_concurrency: Max Groq requests in flight, across all videos together
+            tts_concurrency: Max ElevenLabs clone/TTS calls in flight
+            speaker: Presenter name shared by every video, so one cloned voice
+                     is reused for all of them (default: one voice per recording)
+        """
+        self.config = config
+        self.speaker = speaker
+        self.output_root = output_root
+        self.cache_dir = cache_dir
+        self.transcript_cache = JsonCache("processed/cache/transcripts",
+                                          max_bytes=500 * 1024 * 1024,
+                                          max_age=30 * 24 * 3600)
+        self.voice_registry = VoiceRegistry()  # Shared so concurrent jobs don't overwrite each other's entries
+        self.llm_cache = JsonCache("processed/cache/llm",
+                                   max_bytes=50 * 1024 * 1024,
+                                   max_age=30 * 24 * 3600)
+        self.tts_cache = FileCache("processed/cache/tts", max_bytes=1024 * 1024 * 1024)  # Sentence audio
+        self.cpu_workers = cpu_workers or os.cpu_count() or 1
+        self.asr_slots = threading.Semaphore(asr_concurrency)
+        # One limiter for every cleaner, so the request cap and Groq's per-minute
+        # budget hold for the whole batch rather than per video
+        self.llm_concurrency = llm_concurrency
+        self.llm_limiter = RateLimiter(requests_per_minute=30, max_concurrent=llm_concurrency)
+        self.tts_slots = threading.Semaphore(tts_concurrency)
+        self.max_in_flight = self.cpu_workers + asr_concurrency + llm_concurrency + tts_concurrency
+    
+    def run(self, video_paths: list) -> dict:
+        """
+        Process every video
+        
+        Args:
+            video_paths: Videos to process
+        
+        Returns:
+            Dictionary with per-video 'results' and a 'summary'
+        """
+        os.makedirs(self.output_root, exist_ok=True)
+        started = time.time()
+        
+        print(f"🎬 Processing {len(video_paths)} video(s) "
+              f"({self.cpu_workers} decode workers, up to {self.max_in_flight} in flight)")
+        
+        # Workers are started lazily from the video threads, and forking a process that
+        # already runs threads can copy a held lock into the child - so spawn them fresh
+        spawn = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.cpu_workers, mp_context=spawn) as cpu_pool:
+            # One thread per in-flight video; stages inside it wait on the shared limits
+            with ThreadPoolExecutor(max_workers=self.max_in_flight) as video_pool:
+                futures = [video_pool.submit(self._process_one, path, cpu_pool)
+                           for path in video_paths]
+                results = [future.result() for future in futures]
+        
+        summary = self._summarize(results, time.time() - started)
+        report = {'results': results, 'summary': summary}
+        
+        report_path = os.path.join(self.output_root, "batch_report.json")
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        
+        self._print_summary(summary)
+        print(f"Batch report saved to: {report_path}")
+        return report
+    
+    def _process_one(self, video_path: str, cpu_pool) -> dict:
+        """Run all stages for one video and return its result record"""
+        record = {
+            'video': video_path,
+            'status': 'ok',
+            'error': None,
+            'stage': None,
+            'timings': {},
+            'audio_seconds': 0.0,
+            'outputs': {}
+        }
+        started = time.time()
+        
+        try:
+            # Content-derived folder name so same-named videos in different dirs don't clash
+            stem = os.path.splitext(os.path.basename(video_path))[0]
+            video_sha256 = file_sha256(video_path)
+            out_dir = os.path.join(self.output_root, f"{stem}_{video_sha256[:8]}")
+            os.makedirs(out_dir, exist_ok=True)
+            
+            cleaning = bool(self.config.get('GROQ_API_KEY'))
+            voicing = cleaning and bool(self.config.get('ELEVENLABS_API_KEY'))
+            upload_rendition = UPLOAD_RENDITIONS[self.config.get('UPLOAD_CODEC') or 'flac']  # As load_config()
+            renditions = list(dict.fromkeys(['asr_wav', upload_rendition]))
+            if voicing:
+                renditions.append('clone_mp3')
+            
+            # Stage 1: extract (process pool)
+            with self._stage(record, 'extract'):
+                audio = cpu_pool.submit(_extract_worker, video_path, out_dir,
+                                        self.cache_dir, renditions, video_sha256).result()
+                record['outputs'].update(audio)
+            
+            # Stage 2: transcribe (network)
+            with self._stage(record, 'transcribe'), self.asr_slots:
+                from text import AudioTranscriber
+                from chunked_transcription import transcribe_recording
+                transcriber = AudioTranscriber(self.config['SPEECHMATICS_API_KEY'],
+                                               cache=self.transcript_cache)
+                # Same dispatch as main: long recordings go up as parallel chunk jobs
+                result = transcribe_recording(transcriber, audio['asr_wav'], audio[upload_rendition],
+                                              VideoProcessor(output_dir=out_dir), upload_rendition)
+                
+                # Binary transcript: words load without parsing the raw response
+                transcript_path = os.path.join(out_dir, "transcript.tbin")
+                transcriber.save_transcript(result, transcript_path)
+                record['outputs']['transcript'] = transcript_path
+                record['audio_seconds'] = max((w['end'] for w in result['words']), default=0.0)
+            
+            if not cleaning:
+                return record
+            
+            # Stage 3: clean (network)
+            with self._stage(record, 'clean'):
+                from speech_cleaner import SpeechCleaner
+                cleaner = SpeechCleaner(self.config['GROQ_API_KEY'], max_workers=self.llm_concurrency,
+                                        rate_limiter=self.llm_limiter, cache=self.llm_cache)
+                cleaned = cleaner.improve_transcript(result['transcript'], words=result['words'])
+                
+                fixed_csv = os.path.join(out_dir, "fixed_transcript.csv")
+                cleaner.save_cleaned_csv(cleaned, fixed_csv)
+                record['outputs']['fixed_transcript_csv'] = fixed_csv
+            
+            if not voicing:
+                return record
+            
+            # Stage 4: clone + synthesize (network)
+            with self._stage(record, 'tts'), self.tts_slots:
+                from audio_creation import AudioCreator
+                creator = AudioCreator(self.config['ELEVENLABS_API_KEY'], registry=self.voice_registry,
+                                       tts_cache=self.tts_cache)
+                record['outputs']['improved_audio'] = creator.clone_voice_and_generate(
+                    original_audio_path=audio['asr_wav'],
+                    fixed_transcript_csv=fixed_csv,
+                    output_path=os.path.join(out_dir, "improved_audio.wav"),
+                    clone_audio_path=audio.get('clone_mp3'),
+                    speaker=self.speaker
+                )
+        
+        except Exception as e:
+            record['status'] = 'failed'
+            record['error'] = str(e)
+            print(f"❌ {video_path} failed during {record['stage']}: {str(e)}")
+        
+        finally:
+            record['timings']['total'] = time.time() - started
+        
+        return record
+    
+    @contextmanager
+    def _stage(self, record: dict, name: str):
+        """Record which stage is running and how long it took"""
+        record['stage'] = name
+        started = time.time()
+        try:
+            yield
+        finally:
+            record['timings'][name] = time.time() - started
+    
+    def _summarize(self, results: list, wall_seconds: float) -> dict:
+        """Aggregate result records into throughput numbers"""
+        succeeded = [r for r in results if r['status'] == 'ok']
+        audio_seconds = sum(r['audio_seconds'] for r in succeeded)
+        
+        stage_totals = {}
+        for r in results:
+            for stage, seconds in r['timings'].items():
+                stage_totals[stage] = stage_totals.get(stage, 0.0) + seconds
+        
+        return {
+            'videos': len(results),
+            'succeeded': len(succeeded),
+            'failed': len(results) - len(succeeded),
+            'wall_seconds': wall_seconds,
+            'videos_per_minute': len(succeeded) / wall_seconds * 60 if wall_seconds else 0.0,
+            'audio_seconds': audio_seconds,
+            'realtime_factor': audio_seconds / wall_seconds if wall_seconds else 0.0,
+            'stage_seconds': stage_totals
+        }
+    
+    def _print_summary(self, summary: dict):
+        print()
+        print("=" * 60)
+        print("BATCH SUMMARY")
+        print("=" * 60)
+        print(f"   Videos: {summary['succeeded']}/{summary['videos']} succeeded "
+              f"({summary['failed']} failed)")
+        print(f"   Wall time: {summary['wall_seconds']:.1f} seconds")
+        print(f"   Throughput: {summary['videos_per_minute']:.2f} videos/min, "
+              f"{summary['realtime_factor']:.1f}x realtime")
+        for stage, seconds in summary['stage_seconds'].items():
+            if stage != 'total':
+                print(f"   {stage}: {seconds:.1f} seconds (summed across videos)")
+        print()
+
+
+def cli(argv: list = None):
+    """Command-line entry point (also reachable as `main.py --batch ...`)"""
+    parser = argparse.ArgumentParser(description="Run the Speech Surgeon pipeline on many videos")
+    parser.add_argument('source', help="Directory of videos or a glob pattern")
+    parser.add_argument('--workers', type=int, default=None, help="Decode processes (default: CPU count)")
+    parser.add_argument('--asr-concurrency', type=int, default=4)
+    parser.add_argument('--llm-concurrency', type=int, default=4)
+    parser.add_argument('--tts-concurrency', type=int, default=2)
+    parser.add_argument('--output-dir', default="processed/batch")
+    parser.add_argument('--speaker', default=None,
+                        help="Presenter name - reuse one cloned voice across every video")
+    args = parser.parse_args(argv)
+    
+    from main import load_config
+    config = load_config()
+    
+    if not config['SPEECHMATICS_API_KEY']:
+        print("❌ SPEECHMATICS_API_KEY not set!")
+        sys.exit(1)
+    
+    videos = find_videos(args.source)
+    if not videos:
+        print(f"❌ No videos found in: {args.source}")
+        sys.exit(1)
+    
+    runner = BatchRunner(
+        config,
+        output_root=args.output_dir,
+        cpu_workers=args.workers,
+        asr_concurrency=args.asr_concurrency,
+        llm_concurrency=args.llm_concurrency,
+        tts_concurrency=args.tts_concurrency,
+        speaker=args.speaker
+    )
+    report = runner.run(videos)
+    
+    if report['summary']['failed']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,70 @@
+"""
+TTS Benchmark
+Compares one whole-text TTS request against sentence-parallel synthesis at several
+worker counts, using the local fake TTS server
+"""
+
+import os
+import sys
+import tempfile
+from fake_servers import FakeTTSServer
+from tts_engine import TTSEngine, HTTPSynthesizer, split_for_tts
+
+
+def benchmark_tts(text: str, seconds_per_char: float = 0.002, base_delay: float = 0.2,
+                  worker_counts: tuple = (1, 2, 4, 8), max_chars: int = 400) -> list:
+    """
+    Time synthesizing the same text whole and in parallel segments
+    
+    Args:
+        text: Text to speak
+        seconds_per_char: Fake server latency per character
+        base_delay: Fake server latency per request
+        worker_counts: Pool sizes to try for the segmented runs
+        max_chars: Segment size limit
+    
+    Returns:
+        List of dicts with mode, segments, workers and seconds
+    """
+    output_dir = tempfile.mkdtemp(prefix="tts_bench_")
+    output_path = os.path.join(output_dir, "speech.wav")
+    rows = []
+    
+    with FakeTTSServer(base_delay=base_delay, seconds_per_char=seconds_per_char) as server:
+        synthesize = HTTPSynthesizer("fake-key", "voice", base_url=server.url)
+        
+        # Today's behaviour: the entire text in one request
+        engine = TTSEngine(synthesize, max_workers=1)
+        engine.render([text], output_path)
+        rows.append({'mode': 'whole text', 'segments': 1, 'workers': 1,
+                     'seconds': engine.last_report['seconds']})
+        
+        segments = split_for_tts(text, max_chars)
+        for workers in worker_counts:
+            engine = TTSEngine(synthesize, max_workers=workers)
+            engine.render(segments, output_path)
+            rows.append({'mode': 'sentences', 'segments': len(segments), 'workers': workers,
+                         'seconds': engine.last_report['seconds']})
+    
+    os.remove(output_path)
+    os.rmdir(output_dir)
+    return rows
+
+
+# Run directly: python Analyzer/benchmark_tts.py [sentences] [ms_per_char]
+if __name__ == "__main__":
+    sentences = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    ms_per_char = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+    
+    text = " ".join(f"Sentence {i} of the cleaned talk, read back in the speaker's own voice."
+                    for i in range(sentences))
+    rows = benchmark_tts(text, ms_per_char / 1000)
+    
+    print()
+    print("=" * 60)
+    print(f"TTS BENCHMARK ({len(text)} characters, {ms_per_char:g} ms/char)")
+    print("=" * 60)
+    baseline = rows[0]['seconds']
+    for row in rows:
+        print(f"   {row['mode']:<10} {row['segments']:>3} segment(s) x {row['workers']} worker(s): "
+              f"{row['seconds']:6.2f}s ({baseline / row['seconds']:.1f}x)")
@@ -0,0 +1,286 @@
+"""
+Disk Cache
+Content-addressed file cache with size-bounded LRU eviction and optional expiry
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads in this process are serialized
+    fcntl = None
+
+# Memo of file hashes keyed by (path, size, mtime) so a file is only read once per process
+_hash_memo = {}
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Hash a file's contents
+    
+    Args:
+        path: File to hash
+        chunk_size: Bytes read per iteration
+    
+    Returns:
+        Hex SHA-256 digest of the file contents
+    """
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if memo_key in _hash_memo:
+        return _hash_memo[memo_key]
+    
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    
+    _hash_memo[memo_key] = digest.hexdigest()
+    return _hash_memo[memo_key]
+
+
+def remember_sha256(path: str, digest: str):
+    """
+    Seed the hash memo with a digest computed elsewhere (e.g. in a parent process),
+    so file_sha256() doesn't read the file again
+    """
+    stat = os.stat(path)
+    _hash_memo[(os.path.abspath(path), stat.st_size, stat.st_mtime_ns)] = digest
+
+
+def make_key(*parts) -> str:
+    """
+    Build a cache key from any JSON-serializable parts
+    
+    Dicts are serialized with sorted keys so parameter order never changes the key.
+    """
+    payload = json.dumps(parts, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class FileCache:
+    """Store files under content-derived keys, evicting least recently used past a byte budget"""
+    
+    def __init__(self, cache_dir: str = "processed/cache/audio",
+                 max_bytes: int = 2 * 1024 * 1024 * 1024, max_age: float = None):
+        """
+        Initialize the cache
+        
+        Args:
+            cache_dir: Directory holding cached files and the index
+            max_bytes: Disk budget; least recently used entries are evicted beyond it
+            max_age: Seconds an entry stays valid after it was stored (None = forever)
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.lock_path = os.path.join(cache_dir, "index.lock")
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    def path_for(self, key: str, suffix: str = "") -> str:
+        """Where the file for a key lives, so producers can write it in place"""
+        return os.path.join(self.cache_dir, key + suffix)
+    
+    def get(self, key: str):
+        """
+        Look up a cached file
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            Path to the cached file, or None on a miss
+        """
+        with self._locked():
+            index = self._load_index()
+            entry = index.get(key)
+            
+            if entry is not None and self._expired(entry):
+                self._remove(index, key)
+                self._save_index(index)
+                entry = None
+            
+            if entry is None or not os.path.exists(os.path.join(self.cache_dir, entry['file'])):
+                if entry is not None:
+                    # File was removed behind our back - forget it
+                    del index[key]
+                    self._save_index(index)
+                self.misses += 1
+                return None
+            
+            entry['last_used'] = time.time()
+            self._save_index(index)
+            self.hits += 1
+            return os.path.join(self.cache_dir, entry['file'])
+    
+    def put(self, key: str, path: str) -> str:
+        """
+        Register a file with the cache
+        
+        Files outside the cache directory are moved in; files already written
+        to path_for(key, ...) are registered in place.
+        
+        Args:
+            key: Cache key
+            path: File to store
+        
+        Returns:
+            Path to the cached file
+        """
+        filename = os.path.basename(path)
+        if not filename.startswith(key):
+            filename = key + os.path.splitext(path)[1]
+        cached_path = os.path.join(self.cache_dir, filename)
+        
+        if os.path.abspath(path) != os.path.abspath(cached_path):
+            os.replace(path, cached_path)
+        
+        with self._locked():
+            index = self._load_index()
+            index[key] = {
+                'file': filename,
+                'size': os.path.getsize(cached_path),
+                'created': time.time(),
+                'last_used': time.time()
+            }
+            self._evict(index, keep=key)
+            self._save_index(index)
+        
+        return cached_path
+    
+    def contains_path(self, path: str) -> bool:
+        """True if a path lives inside the cache directory"""
+        cache_root = os.path.abspath(self.cache_dir) + os.sep
+        return os.path.abspath(path).startswith(cache_root)
+    
+    def total_bytes(self) -> int:
+        """Bytes currently used by cached files"""
+        with self._locked():
+            return sum(entry['size'] for entry in self._load_index().values())
+    
+    def stats(self) -> dict:
+        """Hit/miss statistics for this process"""
+        lookups = self.hits + self.misses
+        with self._locked():
+            index = self._load_index()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(index),
+            'bytes': sum(entry['size'] for entry in index.values())
+        }
+    
+    @contextmanager
+    def _locked(self):
+        """
+        Hold the index for a load -> mutate -> save
+        
+        The thread lock covers this process; an flock on a sidecar file covers
+        other processes sharing the directory (e.g. batch decode workers).
+        """
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.lock_path, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _evict(self, index: dict, keep: str = None):
+        """Drop expired entries, then least recently used ones until the index fits the budget"""
+        for key in [k for k in index if k != keep and self._expired(index[k])]:
+            self._remove(index, key)
+        
+        total = sum(entry['size'] for entry in index.values())
+        
+        for key in sorted(index, key=lambda k: index[k]['last_used']):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            
+            total -= index[key]['size']
+            self._remove(index, key)
+    
+    def _expired(self, entry: dict) -> bool:
+        # Entries written before expiry support have no 'created'; treat them as fresh
+        return self.max_age is not None and time.time() - entry.get('created', time.time()) > self.max_age
+    
+    def _remove(self, index: dict, key: str):
+        entry = index.pop(key)
+        self.evictions += 1
+        try:
+            os.remove(os.path.join(self.cache_dir, entry['file']))
+        except FileNotFoundError:
+            pass
+    
+    def _load_index(self) -> dict:
+        # Re-read on every access (under _locked()) so several processes can share one cache directory
+        try:
+            with open(self.index_path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+    
+    def _save_index(self, index: dict):
+        # Write-then-rename keeps the index readable if we're interrupted
+        tmp_path = f"{self.index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+
+
+class JsonCache(FileCache):
+    """FileCache for JSON-serializable values (parsed API responses and the like)"""
+    
+    def get_value(self, key: str):
+        """
+        Look up a cached value
+        
+        Returns:
+            The stored value, or None on a miss
+        """
+        path = self.get(key)
+        if path is None:
+            return None
+        
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+    
+    def put_value(self, key: str, value, default=None):
+        """
+        Store a value
+        
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+            default: json.dump default= hook for objects json can't handle natively
+        """
+        tmp_path = self.path_for(key, f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(value, f, default=default)
+        
+        final_path = self.path_for(key, '.json')
+        os.replace(tmp_path, final_path)
+        self.put(key, final_path)
@@ -0,0 +1,324 @@
+"""
+Chunked Transcription
+Splits long audio at silences and transcribes the chunks as concurrent Speechmatics jobs
+"""
+
+import io
+import os
+import wave
+import array
+from operator import mul
+from concurrent.futures import ThreadPoolExecutor
+from text import AudioTranscriber
+from audio_extraction import VideoProcessor
+from word_table import WordTable, json_default
+
+WINDOW_SECONDS = 0.01  # Energy is measured over 10ms windows
+
+# Recordings longer than this are split at silences and transcribed as parallel jobs
+CHUNKED_TRANSCRIPTION_SECONDS = 10 * 60
+
+
+def find_split_points(audio_path: str, target_seconds: float = 300,
+                      search_seconds: float = 20, min_silence: float = 0.3) -> list:
+    """
+    Pick chunk boundaries at the quietest point near every multiple of target_seconds
+    
+    Only the audio around each candidate boundary is read, so this stays cheap
+    on hour-long recordings.
+    
+    Args:
+        audio_path: 16-bit PCM WAV file
+        target_seconds: Desired chunk length
+        search_seconds: How far either side of the target to look for silence
+        min_silence: Length of the quiet stretch to centre the cut on
+    
+    Returns:
+        Sorted list of split times in seconds (excluding 0 and the end)
+    """
+    with wave.open(audio_path, 'rb') as wav:
+        rate = wav.getframerate()
+        channels = wav.getnchannels()
+        duration = wav.getnframes() / rate
+        
+        splits = []
+        last_split = 0.0
+        
+        # Stop once what's left is short enough to be a chunk of its own
+        while duration - last_split > target_seconds * 1.5:
+            target = last_split + target_seconds
+            search_start = max(last_split + target_seconds / 2, target - search_seconds)
+            search_end = min(duration, target + search_seconds)
+            
+            wav.setpos(int(search_start * rate))
+            frames = wav.readframes(int((search_end - search_start) * rate))
+            samples = array.array('h', frames)[::channels]
+            
+            split = search_start + _quietest_offset(samples, rate, min_silence, target - search_start)
+            splits.append(split)
+            last_split = split
+    
+    return splits
+
+
+def _quietest_offset(samples: array.array, rate: int, min_silence: float, prefer: float) -> float:
+    """Centre (seconds from the start of samples) of the lowest-energy min_silence stretch"""
+    window = max(1, int(rate * WINDOW_SECONDS))
+    energies = []
+    for offset in range(0, len(samples) - window + 1, window):
+        segment = samples[offset:offset + window]
+        energies.append(sum(map(mul, segment, segment)))
+    
+    run = max(1, int(min_silence / WINDOW_SECONDS))
+    if len(energies) <= run:
+        return prefer
+    
+    # Sliding sum over `run` windows; ties go to the stretch closest to the target
+    current = sum(energies[:run])
+    best_key = (current, abs(run / 2 * WINDOW_SECONDS - prefer))
+    best_centre = run / 2 * WINDOW_SECONDS
+    
+    for i in range(run, len(energies)):
+        current += energies[i] - energies[i - run]
+        centre = (i - run + 1 + run / 2) * WINDOW_SECONDS
+        key = (current, abs(centre - prefer))
+        if key < best_key:
+            best_key = key
+            best_centre = centre
+    
+    return best_centre
+
+
+def read_chunk_wav(audio_path: str, start: float, end: float) -> bytes:
+    """
+    Cut [start, end) seconds out of a WAV file into a standalone in-memory WAV
+    
+    Returns:
+        WAV file bytes
+    """
+    with wave.open(audio_path, 'rb') as wav:
+        rate = wav.getframerate()
+        wav.setpos(int(start * rate))
+        frames = wav.readframes(int((end - start) * rate))
+        params = wav.getparams()
+    
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as out:
+        out.setparams(params)
+        out.writeframes(frames)
+    return buffer.getvalue()
+
+
+def merge_chunk_words(chunks: list) -> list:
+    """
+    Stitch per-chunk word lists back into one timeline
+    
+    Args:
+        chunks: Dicts with
+            - offset: Absolute time (s) where the chunk's audio begins
+            - region: (start, end) absolute span this chunk is responsible for
+            - words: Word dicts with start/end relative to the chunk audio
+    
+    Returns:
+        Word dicts with absolute timestamps, in order, with overlap duplicates removed
+    """
+    merged = []
+    
+    for chunk in chunks:
+        region_start, region_end = chunk['region']
+        for word in chunk['words']:
+            start = word['start'] + chunk['offset']
+            end = word['end'] + chunk['offset']
+            
+            # Words heard in the overlap belong to whichever chunk owns their midpoint
+            midpoint = (start + end) / 2
+            if region_start <= midpoint < region_end:
+                merged.append(dict(word, start=round(start, 3), end=round(end, 3)))
+    
+    merged.sort(key=lambda w: w['start'])
+    
+    # Safety net for a word straddling the boundary and reported by both chunks
+    deduped = []
+    for word in merged:
+        if deduped and word['word'] == deduped[-1]['word'] and word['start'] - deduped[-1]['start'] < 0.1:
+            continue
+        deduped.append(word)
+    
+    return deduped
+
+
+class ChunkedTranscriber:
+    """Transcribe long audio as several concurrent jobs split at silences"""
+    
+    def __init__(self, transcriber: AudioTranscriber, target_seconds: float = 300,
+                 overlap_seconds: float = 0.5, max_workers: int = 4,
+                 search_seconds: float = 20, processor: VideoProcessor = None,
+                 upload_rendition: str = 'asr_wav'):
+        """
+        Initialize the chunked transcriber
+        
+        Args:
+            transcriber: AudioTranscriber used for each chunk job
+            target_seconds: Desired chunk length
+            overlap_seconds: Extra audio on each side of a chunk so edge words aren't clipped
+            max_workers: Chunk jobs in flight at once
+            search_seconds: How far from the target length to look for silence
+            processor: VideoProcessor used to encode chunks as upload_rendition
+            upload_rendition: Rendition each chunk is uploaded as ('asr_flac' or
+                              'asr_opus' cut upload size; 'asr_wav' needs no encoding)
+        """
+        self.transcriber = transcriber
+        self.target_seconds = target_seconds
+        self.overlap_seconds = overlap_seconds
+        self.max_workers = max_workers
+        self.search_seconds = search_seconds
+        self.processor = processor
+        self.upload_rendition = upload_rendition if processor is not None else 'asr_wav'
+    
+    def transcribe(self, audio_path: str, language: str = "en",
+                   transcription_config: dict = None, use_cache: bool = True) -> dict:
+        """
+        Transcribe audio file to text via parallel chunk jobs
+        
+        Args:
+            audio_path: Path to the audio file (.wav)
+            language: Language code (default: "en" for English)
+            transcription_config: Extra Speechmatics transcription_config options
+            use_cache: Set False to bypass the transcriber's result cache
+        
+        Returns:
+            Same shape as AudioTranscriber.transcribe(); raw_data holds each chunk's response
+        """
+        if not os.path.exists(audio_path):
+            raise FileNotFoundError(f"Audio file not found: {audio_path}")
+        
+        cache = self.transcriber.cache
+        cache_key = None
+        if cache is not None:
+            cache_key = self.transcriber.cache_key(audio_path, language, transcription_config,
+                                                   variant=f"chunked:{self.target_seconds}:{self.upload_rendition}")
+            if use_cache:
+                cached = cache.get_value(cache_key)
+                if cached is not None:
+                    print(f"Using cached transcript for: {audio_path}")
+                    cached['words'] = WordTable.coerce(cached['words'])
+                    return cached
+        
+        with wave.open(audio_path, 'rb') as wav:
+            duration = wav.getnframes() / wav.getframerate()
+        
+        splits = find_split_points(audio_path, self.target_seconds, self.search_seconds)
+        bounds = [0.0] + splits + [duration]
+        regions = list(zip(bounds[:-1], bounds[1:]))
+        
+        print(f"Transcribing audio in {len(regions)} chunk(s): {audio_path}")
+        
+        def run_chunk(index: int) -> dict:
+            region_start, region_end = regions[index]
+            offset = max(0.0, region_start - self.overlap_seconds)
+            chunk_end = min(duration, region_end + self.overlap_seconds)
+            if self.upload_rendition == 'asr_wav':
+                audio, extension = read_chunk_wav(audio_path, offset, chunk_end), 'wav'
+            else:
+                audio = self.processor.encode_segment(audio_path, self.upload_rendition, offset, chunk_end)
+                extension = self.processor.renditions[self.upload_rendition]['format']
+            
+            raw = self.transcriber.transcribe_data(audio, f"chunk_{index:03d}.{extension}", language,
+                                                   audio_seconds=chunk_end - offset,
+                                                   transcription_config=transcription_config)
+            return {
+                'offset': offset,
+                'region': (region_start, region_end),
+                'words': self.transcriber._parse_transcript(raw)['words'],
+                'raw': raw
+            }
+        
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                chunks = list(pool.map(run_chunk, range(len(regions))))
+        except Exception as e:
+            raise Exception(f"Transcription failed: {str(e)}")
+        
+        words = WordTable.from_dicts(merge_chunk_words(chunks))
+        
+        result = {
+            'transcript': words.text,
+            'words': words,
+            'metadata': {
+                # Same meaning as the single-job result: Speechmatics' transcription_time, over every chunk
+                'duration': sum(c['raw'].get('metadata', {}).get('transcription_time', 0) for c in chunks),
+                'word_count': len(words),
+                'language': language,
+                'chunks': len(chunks)
+            },
+            'raw_data': {'chunks': [c['raw'] for c in chunks]}
+        }
+        
+        if cache_key:
+            cache.put_value(cache_key, result, default=json_default)
+        return result
+
+
+def transcribe_recording(transcriber: AudioTranscriber, audio_path: str, upload_path: str = None,
+                         processor: VideoProcessor = None, upload_rendition: str = 'asr_wav',
+                         use_cache: bool = True) -> dict:
+    """
+    Transcribe one recording, as parallel chunk jobs if it is long
+    
+    Args:
+        transcriber: AudioTranscriber for the job(s)
+        audio_path: The asr_wav rendition (measured, and cut into chunks when long)
+        upload_path: File uploaded whole for short recordings (default: audio_path)
+        processor: VideoProcessor that encodes chunks as upload_rendition
+        upload_rendition: Rendition chunks are uploaded as
+        use_cache: Set False to bypass the transcript cache
+    
+    Returns:
+        Same shape as AudioTranscriber.transcribe()
+    """
+    with wave.open(audio_path, 'rb') as wav:
+        audio_seconds = wav.getnframes() / wav.getframerate()
+    
+    if audio_seconds > CHUNKED_TRANSCRIPTION_SECONDS:
+        # Each chunk goes up in the configured upload codec, cut from the ASR WAV
+        chunked = ChunkedTranscriber(transcriber, processor=processor, upload_rendition=upload_rendition)
+        return chunked.transcribe(audio_path, use_cache=use_cache)
+    return transcriber.transcribe(upload_path or audio_path, use_cache=use_cache)
+
+
+# TEST CODE - runs against the local fake Speechmatics server
+if __name__ == "__main__":
+    import tempfile
+    import time
+    from fake_servers import FakeSpeechmaticsServer, make_speech_like_wav
+    
+    print("=" * 60)
+    print("CHUNKED TRANSCRIPTION TEST (local fake ASR)")
+    print("=" * 60)
+    print()
+    
+    num_words = 120
+    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as f:
+        f.write(make_speech_like_wav(num_words))
+        test_audio = f.name
+    
+    with FakeSpeechmaticsServer(base_delay=0.5) as server:
+        transcriber = AudioTranscriber("fake-key", base_url=server.url)
+        
+        started = time.time()
+        single = transcriber.transcribe(test_audio)
+        single_seconds = time.time() - started
+        
+        started = time.time()
+        chunked = ChunkedTranscriber(transcriber, target_seconds=10, search_seconds=3).transcribe(test_audio)
+        chunked_seconds = time.time() - started
+    
+    os.remove(test_audio)
+    
+    expected = [f"w{i}" for i in range(num_words)]
+    print()
+    print(f"Single job:  {single_seconds:.2f}s, {single['metadata']['word_count']} words")
+    print(f"Chunked:     {chunked_seconds:.2f}s, {chunked['metadata']['word_count']} words "
+          f"in {chunked['metadata']['chunks']} chunks")
+    print(f"Words match: {[w['word'] for w in chunked['words']] == expected}")
+    print(f"Timestamps match: {[w['start'] for w in chunked['words']] == [w['start'] for w in single['words']]}")
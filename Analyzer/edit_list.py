@@ -0,0 +1,194 @@
+"""
+Edit List
+Compact cleaning edits against word indices: prompt formatting, validation of the
+model's reply, and applying edits to a WordTable without touching unchanged words
+"""
+
+import re
+import json
+from dataclasses import dataclass
+from word_table import WordTable
+from alignment import EditRegion
+
+_FENCE = re.compile(r"^```[a-z]*\s*|\s*```$")
+
+
+@dataclass
+class WordEdit:
+    """One edit: delete words [first, last] or replace them with text"""
+    op: str            # 'delete' or 'replace'
+    first: int         # First word index
+    last: int          # Last word index (inclusive)
+    text: str = ""     # Replacement words ('' for deletes)
+
+
+def numbered_words(words: WordTable, start: int, end: int) -> str:
+    """Words [start, end) as "index:word" tokens for the prompt ("12:Um 13:I 14:want")"""
+    return " ".join(f"{i}:{words.words[i]}" for i in range(start, end))
+
+
+def deletions(indices: list) -> list:
+    """Delete edits covering sorted word indices, one per consecutive run"""
+    edits = []
+    for i in indices:
+        if edits and edits[-1].last == i - 1:
+            edits[-1].last = i
+        else:
+            edits.append(WordEdit('delete', i, i))
+    return edits
+
+
+def parse_edits(reply: str, start: int, end: int) -> tuple:
+    """
+    Validate the model's edit list
+    
+    Expected format is a JSON array of ["d", first, last] and
+    ["r", first, last, "replacement text"] items. Items that are malformed,
+    outside [start, end) or overlap an earlier edit are dropped.
+    
+    Args:
+        reply: Raw model output
+        start: First word index the model was shown
+        end: One past the last word index it was shown
+    
+    Returns:
+        (list of WordEdit sorted by position, number of items rejected)
+    
+    Raises:
+        ValueError: If the reply holds no JSON array at all
+    """
+    text = _FENCE.sub('', reply.strip())
+    opening, closing = text.find('['), text.rfind(']')
+    if opening < 0 or closing < opening:
+        raise ValueError(f"No edit list in reply: {reply[:80]!r}")
+    try:
+        items = json.loads(text[opening:closing + 1])
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Edit list is not valid JSON: {e}")
+    if not isinstance(items, list):
+        raise ValueError("Edit list is not a JSON array")
+    
+    candidates = []
+    rejected = 0
+    for item in items:
+        if (not isinstance(item, list) or len(item) < 3 or item[0] not in ('d', 'r')
+                or not all(type(i) is int for i in item[1:3])
+                or not start <= item[1] <= item[2] < end):
+            rejected += 1
+            continue
+        replacement = item[3].strip() if len(item) > 3 and isinstance(item[3], str) else ""
+        if item[0] == 'r' and len(item) < 4:
+            rejected += 1
+            continue
+        # Replacing with nothing is a delete
+        op = 'replace' if item[0] == 'r' and replacement else 'delete'
+        candidates.append(WordEdit(op, item[1], item[2], replacement if op == 'replace' else ""))
+    
+    edits = []
+    for edit in sorted(candidates, key=lambda e: e.first):
+        if edits and edit.first <= edits[-1].last:
+            rejected += 1
+            continue
+        edits.append(edit)
+    return edits, rejected
+
+
+def edits_from_regions(regions: list, words: WordTable) -> list:
+    """
+    WordEdits equivalent to alignment regions (for free-form rewrites)
+    
+    An insertion has no words of its own, so it becomes a replace of the word
+    before it (or after it, at the very start).
+    """
+    edits = []
+    for region in regions:
+        if region.kind == 'delete':
+            edits.append(WordEdit('delete', region.orig_start, region.orig_end - 1))
+        elif region.kind == 'replace':
+            edits.append(WordEdit('replace', region.orig_start, region.orig_end - 1, region.new_text))
+        elif region.orig_start > 0:
+            i = region.orig_start - 1
+            if edits and edits[-1].last == i:
+                edits[-1].text = f"{edits[-1].text} {region.new_text}".strip()
+                edits[-1].op = 'replace'
+            else:
+                edits.append(WordEdit('replace', i, i, f"{words.words[i]} {region.new_text}"))
+        elif len(words):
+            edits.append(WordEdit('replace', 0, 0, f"{region.new_text} {words.words[0]}"))
+    return edits
+
+
+def apply_edits(words, edits: list) -> tuple:
+    """
+    Apply edits to a word table
+    
+    Unchanged words keep their exact timestamps and confidence. Replacement
+    words share out the time of the words they replace, in proportion to
+    their length.
+    
+    Args:
+        words: WordTable or list of word dicts
+        edits: Non-overlapping WordEdits (e.g. from parse_edits())
+    
+    Returns:
+        (cleaned WordTable, list of EditRegion mapping each edit to the cleaned words)
+    """
+    words = WordTable.coerce(words)
+    cleaned = WordTable()
+    regions = []
+    position = 0
+    
+    for edit in sorted(edits, key=lambda e: e.first):
+        for i in range(position, edit.first):
+            cleaned.append(words.words[i], words.starts[i], words.ends[i], words.confidences[i])
+        
+        start, end = words.starts[edit.first], words.ends[edit.last]
+        new_start = len(cleaned)
+        tokens = edit.text.split() if edit.op == 'replace' else []
+        weights = [len(token) + 1 for token in tokens]
+        t = start
+        for token, weight in zip(tokens, weights):
+            duration = (end - start) * weight / sum(weights)
+            cleaned.append(token, t, t + duration, 1.0)
+            t += duration
+        
+        regions.append(EditRegion(edit.op, edit.first, edit.last + 1, new_start, len(cleaned),
+                                  " ".join(tokens), start, end))
+        position = edit.last + 1
+    
+    for i in range(position, len(words)):
+        cleaned.append(words.words[i], words.starts[i], words.ends[i], words.confidences[i])
+    return cleaned, regions
+
+
+# TEST CODE - validate and apply a model reply
+if __name__ == "__main__":
+    from alignment import align
+    
+    print("=" * 50)
+    print("EDIT LIST TEST")
+    print("=" * 50)
+    print()
+    
+    words = WordTable()
+    for i, token in enumerate("So um I I want to like show you you know our new uh product".split()):
+        words.append(token, i * 0.4, i * 0.4 + 0.3, 0.9)
+    
+    print(f"Prompt words: {numbered_words(words, 0, len(words))}")
+    
+    reply = '''```json
+[["d", 1, 1], ["d", 2, 2], ["d", 6, 6], ["r", 9, 10, ""], ["d", 13, 13],
+ ["r", 7, 8, "present to you"], ["d", 99, 100], ["x", 3, 3], ["d", 8, 8]]
+```'''
+    edits, rejected = parse_edits(reply, 0, len(words))
+    cleaned, regions = apply_edits(words, edits)
+    
+    print(f"Edits kept: {len(edits)}, rejected: {rejected}")
+    print(f"Cleaned: {cleaned.text}")
+    print(f"Unchanged words keep their times: "
+          f"{cleaned.starts[cleaned.words.index('want')] == words.starts[words.words.index('want')]}")
+    print(f"First region: {regions[0]}")
+    
+    # The same edits recovered from a free-form rewrite
+    rewrite_edits = edits_from_regions(align(words, cleaned.text), words)
+    print(f"From rewrite: {apply_edits(words, rewrite_edits)[0].text == cleaned.text}")
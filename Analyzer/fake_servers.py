@@ -0,0 +1,376 @@
+"""
+Local Stand-in Servers
+Minimal HTTP fakes of the Speechmatics and ElevenLabs TTS APIs for exercising the
+pipeline without network access
+"""
+
+import io
+import json
+import time
+import uuid
+import wave
+import array
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_speech_like_wav(num_words: int = 40, word_seconds: float = 0.4,
+                         gap_seconds: float = 0.2, pause_every: int = 8,
+                         pause_seconds: float = 0.8, sample_rate: int = 16000) -> bytes:
+    """
+    Build a WAV of tone bursts separated by silence, standing in for speech
+    
+    Word i is a square wave of amplitude 500 + 100 * i, which the fake ASR
+    server decodes back into the token "w{i}" - so merged chunk results can be
+    checked against the original word order.
+    
+    Returns:
+        WAV file bytes (16-bit mono)
+    """
+    samples = array.array('h')
+    half_period = sample_rate // 400  # 200Hz square wave
+    
+    for i in range(num_words):
+        amplitude = 500 + 100 * i
+        for n in range(int(word_seconds * sample_rate)):
+            samples.append(amplitude if (n // half_period) % 2 == 0 else -amplitude)
+        
+        gap = pause_seconds if (i + 1) % pause_every == 0 else gap_seconds
+        samples.extend([0] * int(gap * sample_rate))
+    
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+def _detect_words(audio: bytes) -> tuple:
+    """
+    Decode tone bursts from make_speech_like_wav() back into words
+    
+    Returns:
+        (results list in Speechmatics json-v2 shape, audio duration in seconds)
+    """
+    try:
+        with wave.open(io.BytesIO(audio), 'rb') as wav:
+            rate = wav.getframerate()
+            samples = array.array('h', wav.readframes(wav.getnframes()))
+    except (wave.Error, EOFError):
+        # Compressed uploads (FLAC/Opus) can't be decoded here - accept them without words
+        return [], 0.0
+    
+    window = rate // 100  # 10ms
+    results = []
+    start = None
+    peak = 0
+    
+    for offset in range(0, len(samples), window):
+        level = max(map(abs, samples[offset:offset + window]), default=0)
+        if level > 200:
+            if start is None:
+                start = offset
+            peak = max(peak, level)
+        elif start is not None:
+            results.append(_word_result(f"w{(peak - 500 + 50) // 100}", start / rate, offset / rate))
+            start = None
+            peak = 0
+    
+    if start is not None:
+        results.append(_word_result(f"w{(peak - 500 + 50) // 100}", start / rate, len(samples) / rate))
+    
+    return results, len(samples) / rate
+
+
+def _word_result(content: str, start: float, end: float) -> dict:
+    return {
+        'type': 'word',
+        'start_time': round(start, 3),
+        'end_time': round(end, 3),
+        'alternatives': [{'content': content, 'confidence': 0.99}]
+    }
+
+
+class FakeSpeechmaticsServer:
+    """Speechmatics batch API stand-in: /jobs, /jobs/{id}, /jobs/{id}/transcript"""
+    
+    def __init__(self, base_delay: float = 0.2, realtime_factor: float = 0.05,
+                 upload_bytes_per_second: float = None):
+        """
+        Initialize the fake server (call start() or use as a context manager)
+        
+        Args:
+            base_delay: Seconds every job spends "running"
+            realtime_factor: Extra running time per second of uploaded audio
+            upload_bytes_per_second: Throttle request bodies to emulate a slow uplink
+        """
+        self.base_delay = base_delay
+        self.realtime_factor = realtime_factor
+        self.upload_bytes_per_second = upload_bytes_per_second
+        self.jobs = {}
+        self.stats = {'submits': 0, 'status_polls': 0, 'bytes_uploaded': 0}
+        self.uploads = []  # Per POST: request/first-byte/last-byte arrival times and transfer mode
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+    
+    @property
+    def url(self) -> str:
+        """Base URL to pass as AudioTranscriber(base_url=...)"""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v2"
+    
+    def start(self):
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+    
+    def create_job(self, audio: bytes, config: dict) -> str:
+        """Register an uploaded file as a job and return its ID"""
+        results, duration = _detect_words(audio)
+        job_id = uuid.uuid4().hex[:10]
+        
+        with self._lock:
+            self.stats['submits'] += 1
+            self.stats['bytes_uploaded'] += len(audio)
+            self.jobs[job_id] = {
+                'ready_at': time.time() + self.base_delay + self.realtime_factor * duration,
+                'results': results,
+                'duration': duration,
+                'config': config
+            }
+        return job_id
+    
+    def _handler_class(self):
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass  # Keep test output quiet
+            
+            def do_POST(self):
+                if not self.path.rstrip('/').endswith('/jobs'):
+                    return self._send(404, {'error': 'not found'})
+                
+                upload = {'request_at': time.time(), 'first_byte_at': None,
+                          'completed_at': None, 'chunked': False}
+                body = self._read_body(upload)
+                upload['completed_at'] = time.time()
+                with server._lock:
+                    server.uploads.append(upload)
+                
+                parts = _parse_multipart(self.headers.get('Content-Type', ''), body)
+                config = json.loads(parts.get('config', b'{}') or b'{}')
+                job_id = server.create_job(parts.get('data_file', b''), config)
+                self._send(201, {'id': job_id})
+            
+            def do_GET(self):
+                path = self.path.split('?')[0].rstrip('/')
+                segments = path.split('/')
+                
+                if segments[-1] == 'transcript':
+                    job = server.jobs.get(segments[-2])
+                    if job is None or time.time() < job['ready_at']:
+                        return self._send(404, {'error': 'not ready'})
+                    return self._send(200, {
+                        'format': '2.9',
+                        'metadata': {'transcription_config': job['config'].get('transcription_config', {})},
+                        'results': job['results']
+                    })
+                
+                job = server.jobs.get(segments[-1])
+                if job is None:
+                    return self._send(404, {'error': 'not found'})
+                
+                with server._lock:
+                    server.stats['status_polls'] += 1
+                status = 'done' if time.time() >= job['ready_at'] else 'running'
+                self._send(200, {'job': {'id': segments[-1], 'status': status,
+                                         'duration': job['duration']}})
+            
+            def _read_body(self, upload: dict) -> bytes:
+                body = bytearray()
+                
+                if 'chunked' in self.headers.get('Transfer-Encoding', '').lower():
+                    upload['chunked'] = True
+                    while True:
+                        size = int(self.rfile.readline().split(b';')[0].strip() or b'0', 16)
+                        if size == 0:
+                            # Skip any trailers up to the terminating blank line
+                            while self.rfile.readline() not in (b'\r\n', b'\n', b''):
+                                pass
+                            break
+                        self._read_exact(size, body, upload)
+                        self.rfile.readline()  # CRLF after each chunk
+                    return bytes(body)
+                
+                self._read_exact(int(self.headers.get('Content-Length', 0)), body, upload)
+                return bytes(body)
+            
+            def _read_exact(self, remaining: int, body: bytearray, upload: dict):
+                while remaining > 0:
+                    piece = self.rfile.read(min(remaining, 64 * 1024))
+                    if not piece:
+                        break
+                    if upload['first_byte_at'] is None:
+                        upload['first_byte_at'] = time.time()
+                    body += piece
+                    remaining -= len(piece)
+                    if server.upload_bytes_per_second:
+                        time.sleep(len(piece) / server.upload_bytes_per_second)
+            
+            def _send(self, code: int, payload: dict):
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+        
+        return Handler
+
+
+
+class FakeTTSServer:
+    """ElevenLabs text-to-speech stand-in: POST /v1/text-to-speech/{voice_id} returning PCM"""
+    
+    def __init__(self, base_delay: float = 0.1, seconds_per_char: float = 0.002,
+                 audio_seconds_per_char: float = 0.06, fail_every: int = None):
+        """
+        Initialize the fake server (call start() or use as a context manager)
+        
+        Args:
+            base_delay: Seconds every request takes before any audio is made
+            seconds_per_char: Extra latency per character of text
+            audio_seconds_per_char: Length of the returned audio per character
+            fail_every: Answer every Nth request with a 500 (None = never fail)
+        """
+        self.base_delay = base_delay
+        self.seconds_per_char = seconds_per_char
+        self.audio_seconds_per_char = audio_seconds_per_char
+        self.fail_every = fail_every
+        self.stats = {'requests': 0, 'failures': 0, 'characters': 0, 'max_concurrent': 0}
+        self.requests = []  # Per request: text, voice_id, output_format, previous_text, next_text
+        self._active = 0
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+    
+    @property
+    def url(self) -> str:
+        """Base URL to pass as HTTPSynthesizer(base_url=...)"""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+    
+    def start(self):
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+    
+    def audio_frames(self, text: str, sample_rate: int) -> int:
+        """Samples of audio returned for a text"""
+        return int(len(text) * self.audio_seconds_per_char * sample_rate)
+    
+    def synthesize(self, text: str, sample_rate: int) -> bytes:
+        """Stand-in speech: a 200Hz square wave as long as the text warrants"""
+        half_period = sample_rate // 400
+        period = array.array('h', [2000] * half_period + [-2000] * half_period).tobytes()
+        frames = self.audio_frames(text, sample_rate)
+        # Repeating one period keeps the server's own CPU time out of the latency figures
+        return (period * (frames // (2 * half_period) + 1))[:frames * 2]
+    
+    def _handler_class(self):
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass  # Keep test output quiet
+            
+            def do_POST(self):
+                url = urlsplit(self.path)
+                segments = url.path.rstrip('/').split('/')
+                if len(segments) < 2 or segments[-2] != 'text-to-speech':
+                    return self._send(404, b'{"detail": "not found"}', 'application/json')
+                
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                text = body.get('text', '')
+                output_format = parse_qs(url.query).get('output_format', ['pcm_24000'])[0]
+                sample_rate = int(output_format.split('_')[1])
+                
+                with server._lock:
+                    server.stats['requests'] += 1
+                    number = server.stats['requests']
+                    server._active += 1
+                    server.stats['max_concurrent'] = max(server.stats['max_concurrent'], server._active)
+                
+                try:
+                    time.sleep(server.base_delay + server.seconds_per_char * len(text))
+                    if server.fail_every and number % server.fail_every == 0:
+                        with server._lock:
+                            server.stats['failures'] += 1
+                        return self._send(500, b'{"detail": "synthesis failed"}', 'application/json')
+                    
+                    with server._lock:
+                        server.stats['characters'] += len(text)
+                        server.requests.append({
+                            'text': text,
+                            'voice_id': segments[-1],
+                            'output_format': output_format,
+                            'previous_text': body.get('previous_text'),
+                            'next_text': body.get('next_text')
+                        })
+                    self._send(200, server.synthesize(text, sample_rate), 'audio/pcm')
+                finally:
+                    with server._lock:
+                        server._active -= 1
+            
+            def _send(self, code: int, data: bytes, content_type: str):
+                self.send_response(code)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+        
+        return Handler
+
+def _parse_multipart(content_type: str, body: bytes) -> dict:
+    """Split a multipart/form-data body into {field name: bytes}"""
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode('latin-1') + body
+    )
+    parts = {}
+    for part in message.iter_parts():
+        name = part.get_param('name', header='content-disposition')
+        parts[name] = part.get_payload(decode=True) or b''
+    return parts
@@ -0,0 +1,227 @@
+"""
+Filler Matcher
+Aho-Corasick over word tokens: finds single- and multi-word fillers ("um", "you know",
+"sort of") in one pass over a transcript
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from word_table import WordTable
+
+# Shared filler lexicon (lowercase, space-separated tokens)
+DEFAULT_FILLERS = frozenset({
+    "uh", "um", "er", "ah", "like", "you know", "i mean", "so", "well",
+    "actually", "basically", "right", "okay", "ok", "hmm", "huh",
+    "anyway", "literally", "just", "sort of", "kind of", "you see",
+    "alright", "oh", "mm", "umm", "ahh", "eh", "mhm"
+})
+
+_EDGE_PUNCTUATION = re.compile(r"^[^\w']+|[^\w']+$")
+
+
+def normalize_token(word: str) -> str:
+    """Lowercase and strip surrounding punctuation ("Um," -> "um")"""
+    return _EDGE_PUNCTUATION.sub('', word.lower())
+
+
+@dataclass
+class FillerSpan:
+    """One filler occurrence"""
+    phrase: str        # Lexicon entry that matched
+    first: int         # Index of its first word
+    last: int          # Index of its last word (inclusive)
+    start: float = None  # Start time of the first word (if timestamps were given)
+    end: float = None    # End time of the last word
+
+
+class FillerMatcher:
+    """
+    Precompiled phrase matcher over token streams
+    
+    Build once per lexicon (see get_matcher()) and reuse: scanning is a
+    single left-to-right pass, linear in the number of words regardless of
+    how many phrases the lexicon holds.
+    """
+    
+    def __init__(self, phrases=DEFAULT_FILLERS):
+        """
+        Compile the lexicon into a token trie with failure links
+        
+        Args:
+            phrases: Iterable of filler phrases ("um", "you know", ...)
+        """
+        self.phrases = frozenset(' '.join(normalize_token(t) for t in p.split()) for p in phrases)
+        
+        # State 0 is the root; goto[state] maps token -> next state
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]  # (token count, phrase) for every phrase ending in each state
+        
+        for phrase in self.phrases:
+            state = 0
+            for token in phrase.split():
+                next_state = self._goto[state].get(token)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                    self._goto[state][token] = next_state
+                state = next_state
+            self._output[state] += ((len(phrase.split()), phrase),)
+        
+        # Breadth-first pass to fill failure links and merge outputs along them
+        # (root children keep failure link 0)
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for token, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(token, 0)
+                self._output[next_state] += self._output[self._fail[next_state]]
+    
+    def stream(self) -> "FillerStream":
+        """Incremental scanner for live capture: feed words as they arrive"""
+        return FillerStream(self)
+    
+    def _step(self, state: int, token: str) -> int:
+        while state and token not in self._goto[state]:
+            state = self._fail[state]
+        return self._goto[state].get(token, 0)
+    
+    def scan(self, tokens):
+        """
+        Yield every match (overlapping ones included) as its last word is read
+        
+        Args:
+            tokens: Iterable of word strings
+        
+        Yields:
+            (first index, last index, phrase)
+        """
+        state = 0
+        for index, word in enumerate(tokens):
+            state = self._step(state, normalize_token(word))
+            for length, phrase in self._output[state]:
+                yield (index - length + 1, index, phrase)
+    
+    def find(self, words) -> list:
+        """
+        Non-overlapping filler spans, preferring the earliest then the longest match
+        
+        Args:
+            words: WordTable, list of word dicts, or list of word strings
+        
+        Returns:
+            List of FillerSpan in transcript order (with times when words carry them)
+        """
+        if isinstance(words, WordTable):
+            tokens, table = words.words, words
+        elif words and not isinstance(words[0], str):
+            table = WordTable.from_dicts(words)
+            tokens = table.words
+        else:
+            tokens, table = words, None
+        
+        matches = sorted(self.scan(tokens), key=lambda m: (m[0], m[0] - m[1]))
+        
+        spans = []
+        next_free = 0
+        for first, last, phrase in matches:
+            if first < next_free:
+                continue
+            span = FillerSpan(phrase, first, last)
+            if table is not None:
+                span.start = table.starts[first]
+                span.end = table.ends[last]
+            spans.append(span)
+            next_free = last + 1
+        return spans
+
+
+class FillerStream:
+    """Matcher state carried across words arriving one at a time"""
+    
+    def __init__(self, matcher: FillerMatcher):
+        self.matcher = matcher
+        self.state = 0
+        self.index = -1
+    
+    def feed(self, word: str, start: float = None, end: float = None) -> list:
+        """
+        Advance by one word
+        
+        Returns:
+            FillerSpans that end at this word (start time is only known for
+            single-word matches; look earlier words up by index for the rest)
+        """
+        self.index += 1
+        self.state = self.matcher._step(self.state, normalize_token(word))
+        return [FillerSpan(phrase, self.index - length + 1, self.index,
+                           start if length == 1 else None, end)
+                for length, phrase in self.matcher._output[self.state]]
+
+
+@lru_cache(maxsize=8)
+def _compiled(phrases: frozenset) -> FillerMatcher:
+    return FillerMatcher(phrases)
+
+
+def get_matcher(phrases=None) -> FillerMatcher:
+    """
+    Shared compiled matcher for a lexicon (compiled once per process)
+    
+    Args:
+        phrases: Filler phrases (default: DEFAULT_FILLERS)
+    """
+    return _compiled(frozenset(phrases) if phrases is not None else DEFAULT_FILLERS)
+
+
+# TEST CODE - long synthetic transcript, compared with a brute-force scan
+if __name__ == "__main__":
+    import random
+    import time
+    
+    print("=" * 50)
+    print("FILLER MATCHER TEST")
+    print("=" * 50)
+    print()
+    
+    vocabulary = ["we", "shipped", "the", "demo", "and", "it", "you", "know", "kind", "of",
+                  "worked", "Um,", "i", "mean", "sort", "like", "so"]
+    words = WordTable()
+    for i in range(100000):
+        words.append(random.choice(vocabulary), i * 0.3, i * 0.3 + 0.25, 0.9)
+    
+    matcher = get_matcher()
+    
+    started = time.perf_counter()
+    spans = matcher.find(words)
+    seconds = time.perf_counter() - started
+    
+    # Brute force: try every lexicon phrase at every position
+    tokens = [normalize_token(w) for w in words.words]
+    by_length = sorted({len(p.split()) for p in DEFAULT_FILLERS}, reverse=True)
+    expected = []
+    i = 0
+    while i < len(tokens):
+        for length in by_length:
+            if ' '.join(tokens[i:i + length]) in DEFAULT_FILLERS:
+                expected.append((i, i + length - 1))
+                i += length
+                break
+        else:
+            i += 1
+    
+    stream = matcher.stream()
+    streamed = [m for w in words.words[:2000] for m in stream.feed(w)]
+    
+    print(f"Words scanned: {len(words)} in {seconds * 1000:.1f} ms")
+    print(f"Fillers found: {len(spans)} ({sum(1 for s in spans if ' ' in s.phrase)} multi-word)")
+    print(f"Matches brute force: {[(s.first, s.last) for s in spans] == expected}")
+    print(f"Streaming sees same matches: "
+          f"{sorted((m.first, m.last) for m in streamed) == sorted((f, l) for f, l, _ in matcher.scan(words.words[:2000]))}")
+    print(f"First span: {spans[0]}")
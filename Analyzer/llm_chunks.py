@@ -0,0 +1,263 @@
+"""
+LLM Chunking
+Splits long text at sentence boundaries into token-budgeted chunks, runs them
+concurrently under a rate limit and puts the answers back in order
+"""
+
+import re
+import time
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token for English)"""
+    return max(1, (len(text) + 3) // 4)
+
+
+def split_sentences(text: str, max_tokens: int) -> list:
+    """
+    Sentences of text, with any sentence over max_tokens cut at word boundaries
+    
+    Raw ASR text often has no punctuation at all, so the word cut is what
+    keeps a single unpunctuated "sentence" from blowing the budget.
+    """
+    sentences = []
+    for sentence in _SENTENCE_SPLIT.split(text.strip()):
+        words = sentence.split()
+        piece = []
+        for word in words:
+            piece.append(word)
+            if estimate_tokens(" ".join(piece)) >= max_tokens:
+                sentences.append(" ".join(piece))
+                piece = []
+        if piece:
+            sentences.append(" ".join(piece))
+    return sentences
+
+
+@dataclass
+class TextChunk:
+    """One request's worth of text"""
+    source: int         # Index of the input text this chunk belongs to
+    index: int          # Position within that text
+    text: str           # Sentences to rewrite
+    context: str        # Preceding sentences, for context only (not to be returned)
+    input_tokens: int
+
+
+def make_chunks(texts: list, max_input_tokens: int = 800, overlap_sentences: int = 1) -> list:
+    """
+    Chunk several texts at sentence boundaries
+    
+    Args:
+        texts: Input texts
+        max_input_tokens: Token budget for the text of each chunk
+        overlap_sentences: Sentences of preceding text repeated as read-only context
+    
+    Returns:
+        List of TextChunk, ordered by (source, index)
+    """
+    chunks = []
+    for source, text in enumerate(texts):
+        sentences = split_sentences(text, max_input_tokens)
+        current = []
+        index = 0
+        for i, sentence in enumerate(sentences):
+            if current and estimate_tokens(" ".join(current + [sentence])) > max_input_tokens:
+                first = i - len(current)
+                context = " ".join(sentences[max(0, first - overlap_sentences):first])
+                chunks.append(TextChunk(source, index, " ".join(current), context,
+                                        estimate_tokens(" ".join(current))))
+                index += 1
+                current = []
+            current.append(sentence)
+        if current:
+            first = len(sentences) - len(current)
+            context = " ".join(sentences[max(0, first - overlap_sentences):first])
+            chunks.append(TextChunk(source, index, " ".join(current), context,
+                                    estimate_tokens(" ".join(current))))
+    return chunks
+
+
+class RateLimiter:
+    """Token-bucket limits on requests and tokens per minute, shared across threads"""
+    
+    def __init__(self, requests_per_minute: float = 30, tokens_per_minute: float = None,
+                 max_concurrent: int = None):
+        """
+        Initialize the limiter
+        
+        Args:
+            requests_per_minute: Request budget (bursts up to one minute's worth)
+            tokens_per_minute: Prompt + completion token budget (None = unlimited); a
+                               request is charged its whole max_tokens up front and
+                               the unused part is refunded once the answer is in
+            max_concurrent: Requests in flight at once across everyone sharing
+                            this limiter (None = only each caller's own pool size)
+        """
+        self._slots = threading.Semaphore(max_concurrent) if max_concurrent else None
+        self._lock = threading.Lock()
+        self._buckets = [[requests_per_minute, requests_per_minute / 60.0, requests_per_minute, time.monotonic()]]
+        if tokens_per_minute:
+            self._buckets.append([tokens_per_minute, tokens_per_minute / 60.0, tokens_per_minute, time.monotonic()])
+    
+    def acquire(self, tokens: int = 0):
+        """Block until one request using `tokens` tokens fits in the budget"""
+        costs = [1, tokens]
+        wait = 0.0
+        with self._lock:
+            now = time.monotonic()
+            for bucket, cost in zip(self._buckets, costs):
+                capacity, rate, level, updated = bucket
+                level = min(capacity, level + (now - updated) * rate) - cost
+                # A negative level is a reservation: later callers queue behind it
+                bucket[2], bucket[3] = level, now
+                if level < 0:
+                    wait = max(wait, -level / rate)
+        if wait > 0:
+            time.sleep(wait)
+    
+    def refund(self, tokens: int):
+        """Give back tokens charged for output that was never generated"""
+        if len(self._buckets) < 2 or tokens <= 0:
+            return
+        with self._lock:
+            bucket = self._buckets[1]
+            bucket[2] = min(bucket[0], bucket[2] + tokens)
+    
+    @contextmanager
+    def request(self, tokens: int = 0, max_output_tokens: int = 0):
+        """
+        acquire() for the prompt and the whole output allowance, then hold a
+        concurrency slot until the request (or stream) is finished
+        
+        Yields a callable taking the output tokens actually used; the rest of
+        max_output_tokens is refunded on exit. If it's never called (the
+        request failed) nothing is refunded.
+        """
+        used = []
+        if self._slots is not None:
+            self._slots.acquire()
+        try:
+            self.acquire(tokens + max_output_tokens)
+            yield used.append
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+            if used:
+                self.refund(max_output_tokens - used[-1])
+
+
+class ChunkedCompletion:
+    """Run a completion function over chunked text concurrently and reassemble in order"""
+    
+    def __init__(self, complete, max_input_tokens: int = 800, overlap_sentences: int = 1,
+                 max_workers: int = 4, rate_limiter: RateLimiter = None, output_tokens=None):
+        """
+        Initialize the runner
+        
+        Args:
+            complete: Callable(TextChunk) -> (output text, finish_reason)
+            max_input_tokens: Token budget for the text of each chunk
+            overlap_sentences: Preceding sentences passed along as context
+            max_workers: Requests in flight at once
+            rate_limiter: Shared RateLimiter (default: 30 requests/minute)
+            output_tokens: Callable(TextChunk) -> the max_tokens complete() asks for,
+                           charged to the limiter's token budget (None = not charged)
+        """
+        self.complete = complete
+        self.output_tokens = output_tokens
+        self.max_input_tokens = max_input_tokens
+        self.overlap_sentences = overlap_sentences
+        self.max_workers = max_workers
+        self.rate_limiter = rate_limiter or RateLimiter()
+    
+    def run(self, texts: list, lookup=None) -> tuple:
+        """
+        Process every text
+        
+        Args:
+            texts: Input texts
+            lookup: Optional Callable(TextChunk) -> (output text, finish_reason) or None;
+                    chunks it answers skip the rate limiter and the completion call
+        
+        Returns:
+            (list of output texts in input order, report dict with chunk count,
+             cached chunk count, truncated chunks and elapsed seconds)
+        """
+        chunks = make_chunks(texts, self.max_input_tokens, self.overlap_sentences)
+        answers, report = self.run_chunks(chunks, lookup)
+        
+        outputs = [[] for _ in texts]
+        for chunk, (text, _) in zip(chunks, answers):
+            outputs[chunk.source].append(text.strip())
+        return [" ".join(parts) for parts in outputs], report
+    
+    def run_chunks(self, chunks: list, lookup=None) -> tuple:
+        """
+        Process chunks built by the caller (when text needs chunking make_chunks() can't do)
+        
+        Args:
+            chunks: List of TextChunk
+            lookup: As for run()
+        
+        Returns:
+            (list of (output text, finish_reason) per chunk, report dict as for run())
+        """
+        started = time.time()
+        cached = []
+        
+        def run_chunk(chunk: TextChunk) -> tuple:
+            if lookup is not None:
+                answer = lookup(chunk)
+                if answer is not None:
+                    cached.append(chunk.index)
+                    return answer
+            budget = self.output_tokens(chunk) if self.output_tokens else 0
+            with self.rate_limiter.request(chunk.input_tokens + estimate_tokens(chunk.context),
+                                           budget) as used:
+                answer = self.complete(chunk)
+                used(estimate_tokens(answer[0]))
+                return answer
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            answers = list(pool.map(run_chunk, chunks))
+        
+        truncated = [{'source': chunk.source, 'chunk': chunk.index, 'text': chunk.text[:80]}
+                     for chunk, (_, finish_reason) in zip(chunks, answers) if finish_reason == 'length']
+        
+        report = {
+            'chunks': len(chunks),
+            'cached': len(cached),
+            'truncated': truncated,
+            'seconds': time.time() - started
+        }
+        return answers, report
+
+
+# TEST CODE - no API key needed; a fake completion stands in for the LLM
+if __name__ == "__main__":
+    print("=" * 60)
+    print("LLM CHUNKING TEST")
+    print("=" * 60)
+    print()
+    
+    text = " ".join(f"This is sentence number {i} of the talk." for i in range(300))
+    
+    def fake_complete(chunk: TextChunk) -> tuple:
+        time.sleep(0.2)  # Network + generation time
+        return chunk.text.upper(), 'length' if chunk.index == 3 else 'stop'
+    
+    runner = ChunkedCompletion(fake_complete, max_input_tokens=200, max_workers=8,
+                               rate_limiter=RateLimiter(requests_per_minute=600))
+    (output,), report = runner.run([text])
+    
+    print(f"Chunks: {report['chunks']}")
+    print(f"Elapsed: {report['seconds']:.2f}s (sequential would be {report['chunks'] * 0.2:.2f}s)")
+    print(f"Reassembled in order: {output == text.upper()}")
+    print(f"Truncated chunks reported: {report['truncated']}")
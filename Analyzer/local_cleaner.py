@@ -0,0 +1,304 @@
+"""
+Local Speech Cleaner
+Rule-based filler and stutter removal on the word list, deciding per sentence
+whether an LLM rewrite is needed at all
+"""
+
+import re
+from dataclasses import dataclass, field
+from word_table import WordTable
+from filler_matcher import DEFAULT_FILLERS, get_matcher, normalize_token
+
+# Never words in their own right - always safe to drop
+HESITATIONS = frozenset({"uh", "um", "er", "ah", "hmm", "huh", "mm", "umm", "ahh", "eh", "mhm"})
+
+# Fillers that can also carry meaning ("I like it", "so that...") - dropped only in safe positions
+DISCOURSE_FILLERS = DEFAULT_FILLERS - HESITATIONS
+
+# Almost always filler even mid-sentence, so one in an unsafe position is worth an LLM look.
+# Everyday words ("so", "like", "just", "right") mid-sentence are far more often meant, and
+# the transcriber gives no punctuation to tell them apart, so those are simply kept.
+ESCALATING_FILLERS = frozenset({"you know", "i mean", "kind of", "sort of", "you see"})
+
+# Meaningful even at the start of a sentence - never dropped locally
+MEANINGFUL_FILLERS = frozenset({"just", "actually", "literally"})
+
+# Words that are legitimately said twice ("had had", "that that", "what it is is"); a
+# repeat of one of these is only collapsed when a hesitation marks it as a stumble
+GRAMMATICAL_REPEATS = frozenset({"had", "that", "is", "do", "very", "really", "so", "no",
+                                 "yes", "yeah", "bye", "ha", "blah", "well", "now", "many", "much"})
+
+_SENTENCE_END = re.compile(r"[.!?]['\")\]]*$")
+
+
+@dataclass
+class CleanedSentence:
+    """One sentence of the transcript and what the local pass did to it"""
+    word_start: int                 # Word range [word_start, word_end)
+    word_end: int
+    original: str
+    opens: bool                     # Starts / ends at a real sentence boundary (not a pause
+    closes: bool                    # or length cut that may fall mid-sentence)
+    cleaned: str                    # Local result (replaced by the LLM's if needs_llm)
+    removed: list = field(default_factory=list)   # Indices of dropped words
+    needs_llm: bool = False
+    reasons: list = field(default_factory=list)   # Why the LLM is needed
+
+
+def as_word_table(words) -> WordTable:
+    """WordTable from a WordTable, word dicts, or plain text (no timestamps, full confidence)"""
+    if isinstance(words, str):
+        table = WordTable()
+        for token in words.split():
+            table.append(token, 0.0, 0.0, 1.0)
+        return table
+    return WordTable.coerce(words)
+
+
+class LocalCleaner:
+    """Deterministic cleaning for the common case: only removals are needed"""
+    
+    def __init__(self, min_confidence: float = 0.6, pause_seconds: float = 0.6,
+                 max_sentence_words: int = 30):
+        """
+        Initialize the local cleaner
+        
+        Args:
+            min_confidence: Words the recogniser was less sure of send their sentence to the LLM
+            pause_seconds: Silence that splits the words when they carry no punctuation
+                           (a real sentence end only if the next word is capitalised)
+            max_sentence_words: Longest run of words cleaned as one piece
+        """
+        self.min_confidence = min_confidence
+        self.pause_seconds = pause_seconds
+        self.max_sentence_words = max_sentence_words
+        self.hesitations = get_matcher(HESITATIONS)
+        self.discourse = get_matcher(DISCOURSE_FILLERS - MEANINGFUL_FILLERS)
+    
+    def split_sentences(self, words: WordTable) -> list:
+        """
+        Split the words at punctuation, pauses, or a length cap
+        
+        Speechmatics punctuation doesn't survive into the word table, so most
+        cuts are pauses or the cap, and those can fall mid-sentence. Only
+        punctuation, the ends of the transcript, or a pause followed by a
+        capitalised word count as real sentence ends.
+        
+        Returns:
+            List of (word_start, word_end, ends_sentence) covering every word
+        """
+        ranges = []
+        start = 0
+        for i in range(len(words)):
+            if i == len(words) - 1 or _SENTENCE_END.search(words.words[i]):
+                ranges.append((start, i + 1, True))
+                start = i + 1
+            elif self._pause_before(words, i + 1):
+                following = words.words[i + 1]
+                ranges.append((start, i + 1, following[:1].isupper() and normalize_token(following) != "i"))
+                start = i + 1
+            elif i + 1 - start >= self.max_sentence_words:
+                ranges.append((start, i + 1, False))
+                start = i + 1
+        return ranges
+    
+    def _pause_before(self, words: WordTable, i: int) -> bool:
+        """True if a pause long enough to split on comes before word i"""
+        return words.starts[i] - words.ends[i - 1] >= self.pause_seconds and words.ends[i - 1] > 0
+    
+    def clean(self, words) -> list:
+        """
+        Clean every sentence locally and flag the ones that need a rewrite
+        
+        Args:
+            words: WordTable, word dicts (with confidence), or plain text
+        
+        Returns:
+            List of CleanedSentence in order
+        """
+        words = as_word_table(words)
+        sentences = []
+        opens = True
+        for start, end, closes in self.split_sentences(words):
+            sentences.append(self.clean_sentence(words, start, end, opens, closes))
+            opens = closes
+        return sentences
+    
+    def clean_sentence(self, words: WordTable, start: int, end: int,
+                       opens: bool = True, closes: bool = True) -> CleanedSentence:
+        """
+        Apply the removal rules to words[start:end]
+        
+        Args:
+            words: The word table
+            start, end: Word range
+            opens, closes: Whether the range starts / ends at a real sentence
+                           boundary; only then is an opening filler dropped or
+                           the text capitalised and punctuated
+        """
+        tokens = [normalize_token(w) for w in words.words[start:end]]
+        removed = set()
+        reasons = []
+        
+        # Cut by the length cap alone (either side): nothing says where its sentences end
+        if (not closes and end < len(words) and not self._pause_before(words, end)) or \
+                (not opens and start > 0 and not self._pause_before(words, start)):
+            reasons.append("no sentence boundary")
+        
+        for span in self.hesitations.find(tokens):
+            removed.update(range(span.first, span.last + 1))
+        hesitant = set(removed)
+        
+        for span in self.discourse.find(tokens):
+            before = [i for i in range(span.first) if i not in removed]
+            after = span.last + 1
+            # Safe when it opens the sentence or sits against a hesitation ("um like", "so uh")
+            if ((not before and opens)
+                    or (span.first > 0 and span.first - 1 in removed)
+                    or (after < len(tokens) and after in removed)):
+                removed.update(range(span.first, span.last + 1))
+            elif span.phrase in ESCALATING_FILLERS:
+                reasons.append(f"ambiguous filler '{span.phrase}'")
+        
+        def near_hesitation(first: int, last: int) -> bool:
+            return any(j in hesitant for j in range(first - 1, last + 2))
+        
+        # Stutters: repeated words and repeated word pairs, cut-off starts ("th- the")
+        kept = [i for i in range(len(tokens)) if i not in removed and tokens[i]]
+        previous = []
+        for i in kept:
+            token = tokens[i]
+            if previous and token == tokens[previous[-1]] and (
+                    token not in GRAMMATICAL_REPEATS or near_hesitation(previous[-1], i)):
+                removed.add(previous[-1])
+                previous[-1] = i
+                continue
+            if (len(previous) >= 3 and token == tokens[previous[-2]]
+                    and tokens[previous[-1]] == tokens[previous[-3]]):
+                removed.update((previous[-3], previous[-2]))
+                previous[-3:] = [previous[-1], i]
+                continue
+            if previous and words.words[start + previous[-1]].endswith('-') and \
+                    token.startswith(tokens[previous[-1]].rstrip('-')):
+                removed.add(previous[-1])
+                previous[-1] = i
+                continue
+            previous.append(i)
+        
+        for i in range(len(tokens)):
+            if i not in removed and words.confidences[start + i] < self.min_confidence:
+                reasons.append(f"low confidence '{words.words[start + i]}'")
+        
+        kept_words = [words.words[start + i] for i in range(len(tokens)) if i not in removed]
+        return CleanedSentence(
+            word_start=start,
+            word_end=end,
+            original=" ".join(words.words[start:end]),
+            opens=opens,
+            closes=closes,
+            cleaned=_tidy(kept_words, opens, closes),
+            removed=sorted(start + i for i in removed),
+            needs_llm=bool(reasons),
+            reasons=reasons
+        )
+
+
+def _tidy(tokens: list, opens: bool = True, closes: bool = True) -> str:
+    """Fix a lone "i"; at real sentence boundaries also capitalise and end with punctuation"""
+    if not tokens:
+        return ""
+    tokens = [re.sub(r"^i(?=$|')", "I", t) for t in tokens]
+    if opens:
+        tokens[0] = tokens[0][:1].upper() + tokens[0][1:]
+    text = " ".join(tokens)
+    if closes:
+        text = text.rstrip(",;:-")
+        if not _SENTENCE_END.search(text):
+            text += "."
+    return text
+
+
+def llm_passages(sentences: list) -> list:
+    """
+    Group consecutive sentences that need the LLM
+    
+    Returns:
+        List of (first sentence index, end sentence index, original text)
+    """
+    passages = []
+    i = 0
+    while i < len(sentences):
+        if not sentences[i].needs_llm:
+            i += 1
+            continue
+        j = i
+        while j < len(sentences) and sentences[j].needs_llm:
+            j += 1
+        passages.append((i, j, " ".join(s.original for s in sentences[i:j])))
+        i = j
+    return passages
+
+
+def assemble(sentences: list, rewrites: dict = None) -> str:
+    """
+    Join the cleaned transcript back together
+    
+    Args:
+        sentences: From LocalCleaner.clean()
+        rewrites: {first sentence index: LLM text} for each passage from llm_passages()
+    
+    Returns:
+        Cleaned transcript text
+    """
+    rewrites = rewrites or {}
+    parts = []
+    i = 0
+    while i < len(sentences):
+        if i in rewrites:
+            parts.append(rewrites[i])
+            while i < len(sentences) and sentences[i].needs_llm:
+                i += 1
+            continue
+        if sentences[i].cleaned:
+            parts.append(sentences[i].cleaned)
+        i += 1
+    return " ".join(p for p in parts if p)
+
+
+# TEST CODE - no API key needed
+if __name__ == "__main__":
+    print("=" * 60)
+    print("LOCAL CLEANER TEST")
+    print("=" * 60)
+    print()
+    
+    sample = "One Hi my name is Dave Lucero Wala Um I want to introduce you to our northeastern Californian community Um um my pronouns are uh he him Uh And I want to um highlight some features of student life here in the Bay areacl"
+    
+    # Pauses where a speaker would breathe, a shaky word near the end
+    words = WordTable()
+    t = 0.0
+    for token in sample.split():
+        words.append(token, t, t + 0.3, 0.95 if token != "areacl" else 0.4)
+        t += 0.35 + (0.8 if token in ("Wala", "community", "him") else 0.0)
+    
+    cleaner = LocalCleaner()
+    sentences = cleaner.clean(words)
+    
+    for s in sentences:
+        status = "LLM" if s.needs_llm else "local"
+        print(f"[{status:>5}] {s.original}")
+        print(f"        -> {s.cleaned}" + (f"   ({'; '.join(s.reasons)})" if s.reasons else ""))
+    
+    print()
+    print(f"Sentences needing the LLM: {sum(s.needs_llm for s in sentences)}/{len(sentences)}")
+    print(f"Passages to send: {[p[2] for p in llm_passages(sentences)]}")
+    print()
+    print("Stutters: " + cleaner.clean("I I want to to go th- the the store store").__getitem__(0).cleaned)
+    print("Real repeats: " + cleaner.clean("he had had enough and I knew that that was it")[0].cleaned)
+    everyday = cleaner.clean("So we just like the new design and it works well right now")[0]
+    print(f"Everyday words: {everyday.cleaned} (needs LLM: {everyday.needs_llm})")
+    
+    # No punctuation, no timings: the 30-word cut is not a sentence end
+    long_text = " ".join(["we went to the bakery on the corner"] * 4 + ["and I really like the way they bake it"])
+    cut = cleaner.clean(long_text)
+    print(f"Length cut: {[s.cleaned for s in cut]} (needs LLM: {[s.needs_llm for s in cut]})")
@@ -5,25 +5,26 @@ Complete speech analysis pipeline with cloud storage and cleanup
 
 import os
 import sys
-from audio_extraction import VideoProcessor
+import itertools
+from audio_extraction import VideoProcessor, UPLOAD_RENDITIONS
 from text import AudioTranscriber
 from speech_cleaner import SpeechCleaner
 from audio_creation import AudioCreator
+from voice_registry import VoiceRegistry
 from convex import ConvexClient
+from media_probe import probe_media
+from cache import FileCache, JsonCache
+from chunked_transcription import transcribe_recording
 
-def main():
-    """
-    Main pipeline:
-    1. Extract audio from video
-    2. Transcribe audio to text
-    3. Clean transcript with AI
-    4. Display and save results
+def load_config() -> dict:
     """
-    print("=" * 60)
-    print("SPEECH SURGEON AI - COMPLETE PIPELINE")
-    print("=" * 60)
-    print()
+    Load API keys - config.py first, then environment variables
     
+    Returns:
+        Dictionary with SPEECHMATICS_API_KEY, GROQ_API_KEY,
+        ELEVENLABS_API_KEY and CONVEX_URL (missing ones are None),
+        plus UPLOAD_CODEC ('wav', 'flac' or 'opus'; default 'flac')
+    """
     # Configuration - Try config.py first, then environment variables
     SPEECHMATICS_API_KEY = None
     GROQ_API_KEY = None
@@ -50,6 +51,39 @@ def main():
         ELEVENLABS_API_KEY = os.getenv('ELEVENLABS_API_KEY')
         CONVEX_URL = os.getenv('CONVEX_URL')
     
+    # Codec for the ASR upload - FLAC is lossless and roughly half the size of WAV
+    try:
+        from config import UPLOAD_CODEC
+    except ImportError:
+        UPLOAD_CODEC = os.getenv('UPLOAD_CODEC', 'flac')
+    
+    return {
+        'SPEECHMATICS_API_KEY': SPEECHMATICS_API_KEY,
+        'GROQ_API_KEY': GROQ_API_KEY,
+        'ELEVENLABS_API_KEY': ELEVENLABS_API_KEY,
+        'CONVEX_URL': CONVEX_URL,
+        'UPLOAD_CODEC': UPLOAD_CODEC
+    }
+
+def main():
+    """
+    Main pipeline:
+    1. Extract audio from video
+    2. Transcribe audio to text
+    3. Clean transcript with AI
+    4. Display and save results
+    """
+    print("=" * 60)
+    print("SPEECH SURGEON AI - COMPLETE PIPELINE")
+    print("=" * 60)
+    print()
+    
+    config = load_config()
+    SPEECHMATICS_API_KEY = config['SPEECHMATICS_API_KEY']
+    GROQ_API_KEY = config['GROQ_API_KEY']
+    ELEVENLABS_API_KEY = config['ELEVENLABS_API_KEY']
+    CONVEX_URL = config['CONVEX_URL']
+    
     # Check for required API keys
     if not SPEECHMATICS_API_KEY:
         print("❌ SPEECHMATICS_API_KEY not set!")
@@ -66,10 +100,31 @@ def main():
         print("⚠️ GROQ_API_KEY not set - AI cleaning will be skipped")
         print()
     
+    # --no-cache forces fresh transcription and AI cleaning (results are still stored for next time)
+    use_cache = '--no-cache' not in sys.argv[1:]
+    # --stream-upload sends the ASR audio while ffmpeg is still encoding it
+    stream_upload = '--stream-upload' in sys.argv[1:]
+    # --stream-tts starts voicing cleaned sentences while the AI is still writing later ones
+    stream_tts = '--stream-tts' in sys.argv[1:]
+    # --edit-list has the AI return word edits instead of rewriting the whole transcript
+    clean_mode = "edits" if '--edit-list' in sys.argv[1:] else "rewrite"
+    # --parallel-tts synthesizes sentences concurrently instead of one long request
+    tts_workers = 4 if '--parallel-tts' in sys.argv[1:] else None
+    # --splice-regions keeps the original recording: cuts deleted words and voices only changed phrases
+    splice_regions = '--splice-regions' in sys.argv[1:]
+    # --speaker NAME reuses one cloned voice for that presenter across all their recordings
+    argv = sys.argv[1:]
+    speaker = None
+    if '--speaker' in argv:
+        position = argv.index('--speaker')
+        speaker = argv[position + 1] if position + 1 < len(argv) else None
+        argv = argv[:position] + argv[position + 2:]
+    args = [a for a in argv if not a.startswith('--')]
+    
     # Step 0: Automatically find video file (.mp4 or .mov)
-    if len(sys.argv) > 1:
+    if args:
         # Use command line argument if provided
-        video_path = sys.argv[1]
+        video_path = args[0]
     else:
         # Automatically find .mp4 or .mov file in project root
         video_files = [f for f in os.listdir('.') if f.endswith(('.mp4', '.mov', '.MOV', '.MP4'))]
@@ -95,27 +150,18 @@ def main():
         print(f"❌ Video file not found: {video_path}")
         sys.exit(1)
     
-    # Convert .mov to .mp4 if needed
-    if video_path.lower().endswith('.mov'):
-        print(f"📹 Converting .mov to .mp4...")
-        import subprocess
-        mp4_path = video_path.rsplit('.', 1)[0] + '.mp4'
-        
-        try:
-            subprocess.run([
-                'ffmpeg', '-i', video_path,
-                '-vcodec', 'copy',
-                '-acodec', 'copy',
-                '-y',
-                mp4_path
-            ], check=True, capture_output=True)
-            
-            print(f"✅ Converted to: {mp4_path}")
-            video_path = mp4_path
-        except Exception as e:
-            print(f"⚠️ Conversion failed, using original .mov file")
-            print(f"   Error: {str(e)}")
-        print()
+    # Probe instead of remuxing: ffmpeg reads .mov directly, so a .mp4 copy is wasted I/O
+    keep_source_video = video_path.lower().endswith('.mov')  # .mov sources were never deleted
+    try:
+        media_info = probe_media(video_path)
+        print(f"📹 Container: {media_info.container} | Video: {media_info.video_codec} | "
+              f"Audio: {media_info.audio_codec} @ {media_info.sample_rate} Hz | "
+              f"{media_info.duration:.1f}s")
+        if not media_info.has_audio:
+            print("⚠️ No audio stream found in video")
+    except Exception as e:
+        print(f"⚠️ Could not probe video: {str(e)}")
+    print()
     
     print(f"📹 Video file: {video_path}")
     print()
@@ -126,11 +172,46 @@ def main():
         print("STEP 1: EXTRACTING AUDIO FROM VIDEO")
         print("-" * 60)
         
-        video_processor = VideoProcessor()
-        audio_path = video_processor.extract_audio(video_path)
+        audio_cache = FileCache("processed/cache/audio")
+        video_processor = VideoProcessor(cache=audio_cache)
+        
+        # Decode once: ASR WAV, the compressed upload copy and, if we'll clone,
+        # the clone MP3 - all from the source audio
+        upload_rendition = UPLOAD_RENDITIONS[config['UPLOAD_CODEC']]
+        renditions = list(dict.fromkeys(['asr_wav', upload_rendition]))
+        if ELEVENLABS_API_KEY:
+            renditions.append('clone_mp3')
+            if splice_regions:
+                renditions.append('splice_wav')
+        transcript_cache = JsonCache("processed/cache/transcripts",
+                                     max_bytes=500 * 1024 * 1024,
+                                     max_age=30 * 24 * 3600)  # 30 days
+        transcriber = AudioTranscriber(SPEECHMATICS_API_KEY, cache=transcript_cache)
+        
+        streamed_result = None
+        if stream_upload:
+            # The upload copy goes straight from ffmpeg's stdout into the request
+            # body; the remaining renditions are written to disk in the same pass
+            stream_name = upload_rendition if upload_rendition != 'asr_wav' else 'asr_flac'
+            audio_outputs = {}
+            chunks = video_processor.stream_rendition(
+                video_path, stream_name,
+                also_write=[r for r in renditions if r != stream_name],
+                outputs=audio_outputs
+            )
+            streamed_result = transcriber.transcribe_stream(
+                chunks, f"audio.{video_processor.renditions[stream_name]['format']}"
+            )
+        else:
+            audio_outputs = video_processor.extract_renditions(video_path, renditions)
+        audio_path = audio_outputs['asr_wav']
+        upload_path = audio_outputs.get(upload_rendition)  # None if it was only streamed
         
         print(f"✅ Audio extracted successfully!")
         print(f"   Audio file: {audio_path}")
+        cache_stats = audio_cache.stats()
+        print(f"   Audio cache: {cache_stats['hits']} hit(s), {cache_stats['misses']} miss(es), "
+              f"{cache_stats['bytes'] / (1024 * 1024):.1f} MB used")
         print()
         
         # Step 2: Transcribe Audio to Text
@@ -138,8 +219,12 @@ def main():
         print("STEP 2: TRANSCRIBING AUDIO TO TEXT")
         print("-" * 60)
         
-        transcriber = AudioTranscriber(SPEECHMATICS_API_KEY)
-        result = transcriber.transcribe(audio_path)
+        if streamed_result is not None:
+            result = streamed_result  # Already transcribed while extracting
+        else:
+            # Long recordings go up as parallel chunk jobs in the configured upload codec
+            result = transcribe_recording(transcriber, audio_path, upload_path, video_processor,
+                                          upload_rendition, use_cache=use_cache)
         
         print(f"✅ Transcription complete!")
         print()
@@ -181,6 +266,7 @@ def main():
         # Step 5: Clean Transcript with AI (if Groq API key available)
         cleaned_transcript = None
         output_fixed_csv = "processed/fixed_transcript.csv"
+        output_improved_audio = None
         
         if GROQ_API_KEY:
             print("-" * 60)
@@ -188,8 +274,36 @@ def main():
             print("-" * 60)
             
             try:
-                cleaner = SpeechCleaner(GROQ_API_KEY)
-                cleaned_transcript = cleaner.improve_transcript(result['transcript'])
+                llm_cache = JsonCache("processed/cache/llm",
+                                      max_bytes=50 * 1024 * 1024,
+                                      max_age=30 * 24 * 3600)  # 30 days
+                cleaner = SpeechCleaner(GROQ_API_KEY, cache=llm_cache)
+                
+                if stream_tts and ELEVENLABS_API_KEY and not splice_regions:
+                    print("🎤 Streaming cleaned sentences straight into speech synthesis")
+                    audio_creator = AudioCreator(ELEVENLABS_API_KEY, registry=VoiceRegistry())
+                    cleaned_sentences = []
+                    
+                    def collect(sentences):
+                        for sentence in sentences:
+                            cleaned_sentences.append(sentence)
+                            yield sentence
+                    
+                    stream = collect(cleaner.stream_transcript(result['transcript'], words=result['words'],
+                                                               use_cache=use_cache))
+                    # A retry after re-cloning replays the sentences already taken from the stream
+                    output_improved_audio = audio_creator.generate_with_voice(
+                        lambda voice_id: audio_creator.generate_from_sentences(
+                            itertools.chain(list(cleaned_sentences), stream),
+                            voice_id,
+                            output_path="processed/improved_audio.wav"
+                        ),
+                        audio_path, audio_outputs.get('clone_mp3'), speaker
+                    )
+                    cleaned_transcript = " ".join(cleaned_sentences)
+                else:
+                    cleaned_transcript = cleaner.improve_transcript(result['transcript'], words=result['words'],
+                                                                    use_cache=use_cache, mode=clean_mode)
                 
                 print()
                 print("📝 CLEANED TRANSCRIPT:")
@@ -213,21 +327,36 @@ def main():
             print("-" * 60)
             print()
         
-        # Step 6: Generate New Audio (if ElevenLabs API key available and transcript was cleaned)
-        output_improved_audio = None
-        
-        if ELEVENLABS_API_KEY and cleaned_transcript:
+        # Step 6: Generate New Audio (if ElevenLabs API key available and transcript was cleaned,
+        # and --stream-tts didn't already voice it in Step 5)
+        if ELEVENLABS_API_KEY and cleaned_transcript and not output_improved_audio:
             print("-" * 60)
             print("STEP 6: GENERATING NEW AUDIO WITH CLEANED SPEECH")
             print("-" * 60)
             
             try:
-                audio_creator = AudioCreator(ELEVENLABS_API_KEY)
-                output_improved_audio = audio_creator.clone_voice_and_generate(
-                    original_audio_path=audio_path,
-                    fixed_transcript_csv=output_fixed_csv,
-                    output_path="processed/improved_audio.wav"  # Direct WAV output
-                )
+                tts_cache = FileCache("processed/cache/tts", max_bytes=1024 * 1024 * 1024)  # Sentence audio
+                audio_creator = AudioCreator(ELEVENLABS_API_KEY, registry=VoiceRegistry(), tts_cache=tts_cache)
+                if splice_regions:
+                    output_improved_audio = audio_creator.generate_with_voice(
+                        lambda voice_id: audio_creator.splice_regions(
+                            audio_outputs.get('splice_wav', audio_path),
+                            result['words'],
+                            cleaned_transcript,
+                            voice_id,
+                            output_path="processed/improved_audio.wav"
+                        ),
+                        audio_path, audio_outputs.get('clone_mp3'), speaker
+                    )
+                else:
+                    output_improved_audio = audio_creator.clone_voice_and_generate(
+                        original_audio_path=audio_path,
+                        fixed_transcript_csv=output_fixed_csv,
+                        output_path="processed/improved_audio.wav",  # Direct WAV output
+                        clone_audio_path=audio_outputs.get('clone_mp3'),
+                        speaker=speaker,
+                        tts_workers=tts_workers
+                    )
                 
                 print()
                 
@@ -257,9 +386,11 @@ def main():
             print("🧹 Cleaning up temporary files...")
             
             # Delete all files except final improved audio WAV
+            # (cached audio is kept so re-runs on this video skip decoding)
             files_to_delete = [
-                video_path,  # Original video
-                audio_path,  # Original audio
+                None if keep_source_video else video_path,  # Original video
+                None if audio_cache.contains_path(audio_path) else audio_path,  # Original audio
+                None if not upload_path or audio_cache.contains_path(upload_path) else upload_path,  # Upload copy
                 output_json,  # Transcript JSON
                 output_csv,  # Transcript CSV
                 output_fixed_csv,  # Fixed transcript CSV
@@ -331,4 +462,9 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == '--batch':
+        # python Analyzer/main.py --batch <dir-or-glob> [--workers N ...]
+        from batch import cli
+        cli(sys.argv[2:])
+    else:
+        main()
\ No newline at end of file
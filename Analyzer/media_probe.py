@@ -0,0 +1,129 @@
+"""
+Media Probe
+Reads container/codec info with ffprobe so stages can skip work that wouldn't change anything
+"""
+
+import os
+import json
+import subprocess
+from dataclasses import dataclass
+from typing import Optional
+
+# Probe results keyed by (path, size, mtime) so each file is probed once per process
+_probe_cache = {}
+
+# ffmpeg encoder name -> codec name ffprobe reports for its output
+_ENCODER_CODECS = {
+    'libmp3lame': 'mp3',
+    'libopus': 'opus',
+    'libvorbis': 'vorbis',
+}
+
+
+@dataclass
+class MediaInfo:
+    """What ffprobe knows about a media file"""
+    path: str
+    container: str                  # ffprobe format_name, e.g. "mov,mp4,m4a,3gp,3g2,mj2"
+    duration: float
+    video_codec: Optional[str] = None
+    audio_codec: Optional[str] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    keyframes: Optional[int] = None  # Only filled in when probed with count_keyframes=True
+    
+    @property
+    def has_audio(self) -> bool:
+        return self.audio_codec is not None
+    
+    @property
+    def has_video(self) -> bool:
+        return self.video_codec is not None
+    
+    def in_container(self, fmt: str) -> bool:
+        """True if the file's container family includes fmt (e.g. "mp4", "wav")"""
+        return fmt in self.container.split(',')
+    
+    def audio_matches(self, spec: dict) -> bool:
+        """
+        True if this file already is what an audio rendition spec would produce
+        
+        Args:
+            spec: Rendition spec with codec, sample_rate, channels and format
+                  (see VideoProcessor.renditions)
+        """
+        if self.has_video or not self.has_audio:
+            return False
+        if spec.get('bitrate'):
+            # Lossy re-encodes at a target bitrate are never treated as equivalent
+            return False
+        codec = _ENCODER_CODECS.get(spec['codec'], spec['codec'])
+        return (self.audio_codec == codec and
+                self.sample_rate == spec['sample_rate'] and
+                self.channels == spec['channels'] and
+                self.in_container(spec['format']))
+
+
+def probe_media(path: str, count_keyframes: bool = False) -> MediaInfo:
+    """
+    Probe a media file (cached per file)
+    
+    Args:
+        path: Media file to inspect
+        count_keyframes: Also count video keyframes (reads every keyframe, so off by default)
+    
+    Returns:
+        MediaInfo for the file
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Media file not found: {path}")
+    
+    stat = os.stat(path)
+    cache_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    info = _probe_cache.get(cache_key)
+    
+    if info is None:
+        data = _run_ffprobe([
+            '-show_format',
+            '-show_streams',
+            path
+        ])
+        
+        streams = data.get('streams', [])
+        video = next((s for s in streams if s.get('codec_type') == 'video'), None)
+        audio = next((s for s in streams if s.get('codec_type') == 'audio'), None)
+        fmt = data.get('format', {})
+        
+        info = MediaInfo(
+            path=path,
+            container=fmt.get('format_name', ''),
+            duration=float(fmt.get('duration') or 0),
+            video_codec=video.get('codec_name') if video else None,
+            audio_codec=audio.get('codec_name') if audio else None,
+            sample_rate=int(audio['sample_rate']) if audio and audio.get('sample_rate') else None,
+            channels=audio.get('channels') if audio else None
+        )
+        _probe_cache[cache_key] = info
+    
+    if count_keyframes and info.keyframes is None and info.has_video:
+        data = _run_ffprobe([
+            '-select_streams', 'v:0',
+            '-skip_frame', 'nokey',   # Only decode keyframes
+            '-show_entries', 'frame=key_frame',
+            path
+        ])
+        info.keyframes = len(data.get('frames', []))
+    
+    return info
+
+
+def _run_ffprobe(args: list) -> dict:
+    """Run ffprobe with JSON output"""
+    command = ['ffprobe', '-v', 'error', '-of', 'json'] + args
+    
+    try:
+        result = subprocess.run(command, check=True, capture_output=True)
+    except subprocess.CalledProcessError as e:
+        raise Exception(f"FFprobe failed: {e.stderr.decode()}")
+    
+    return json.loads(result.stdout or b'{}')
@@ -0,0 +1,295 @@
+"""
+Region Splicer
+Re-voices only what the cleaning changed: replacement phrases are synthesized and
+spliced into the original recording with crossfades and matched loudness, and
+deleted words are cut out without any TTS at all
+"""
+
+import math
+import time
+import wave
+import array
+from tts_engine import TTSEngine
+from wav_writer import StreamingWavWriter
+from word_table import WordTable
+from time_index import TimeIndex
+
+BLOCK_SECONDS = 10.0      # Unchanged audio is copied through in blocks this long
+SILENCE_LEVEL = 328       # -40 dBFS: quieter 20ms frames count as silence
+LEVEL_FRAME_SECONDS = 0.02
+
+
+def resample(samples: array.array, from_rate: int, to_rate: int) -> array.array:
+    """Linear-interpolation resample of s16 mono samples (TTS at a different rate than the recording)"""
+    if from_rate == to_rate or not samples:
+        return samples
+    count = int(len(samples) * to_rate / from_rate)
+    step = from_rate / to_rate
+    last = len(samples) - 1
+    out = array.array('h', bytes(2 * count))
+    for k in range(count):
+        x = k * step
+        i = int(x)
+        a = samples[i]
+        b = samples[i + 1] if i < last else a
+        out[k] = int(a + (b - a) * (x - i))
+    return out
+
+
+def speech_level(samples: array.array, sample_rate: int) -> float:
+    """
+    RMS over the 20ms frames that aren't silence
+    
+    Pauses are left out, so a phrase and the speech around it compare fairly
+    however much silence each contains. Returns 0.0 for pure silence.
+    """
+    size = max(1, int(LEVEL_FRAME_SECONDS * sample_rate))
+    energies = []
+    for first in range(0, len(samples) - size + 1, size):
+        energy = sum(s * s for s in samples[first:first + size]) / size
+        if energy >= SILENCE_LEVEL * SILENCE_LEVEL:
+            energies.append(energy)
+    return math.sqrt(sum(energies) / len(energies)) if energies else 0.0
+
+
+def trim_silence(samples: array.array, sample_rate: int, pad_seconds: float = 0.02) -> array.array:
+    """Drop leading/trailing silence from synthesized audio, keeping pad_seconds either side"""
+    first = next((i for i, s in enumerate(samples) if abs(s) >= SILENCE_LEVEL), None)
+    if first is None:
+        return samples
+    last = len(samples) - 1
+    while abs(samples[last]) < SILENCE_LEVEL:
+        last -= 1
+    pad = int(pad_seconds * sample_rate)
+    return samples[max(0, first - pad):min(len(samples), last + 1 + pad)]
+
+
+class _CrossfadeJoiner:
+    """Writes consecutive pieces of audio, overlapping each join with an equal-power crossfade"""
+    
+    def __init__(self, writer: StreamingWavWriter, fade_samples: int):
+        self.writer = writer
+        self.fade = fade_samples
+        self.tail = array.array('h')  # Held back so the next piece can fade into it
+    
+    def append(self, samples: array.array, crossfade: bool = True):
+        n = min(self.fade, len(self.tail), len(samples)) if crossfade else 0
+        if n:
+            outgoing = self.tail[len(self.tail) - n:]
+            mixed = array.array('h', bytes(2 * n))
+            for k in range(n):
+                angle = math.pi / 2 * (k + 0.5) / n
+                value = outgoing[k] * math.cos(angle) + samples[k] * math.sin(angle)
+                mixed[k] = max(-32768, min(32767, int(value)))
+            del self.tail[len(self.tail) - n:]
+            self.tail.extend(mixed)
+            self.tail.extend(samples[n:])
+        else:
+            self.tail.extend(samples)
+        
+        if len(self.tail) > self.fade:
+            ready = len(self.tail) - self.fade
+            self.writer.write(self.tail[:ready].tobytes())
+            del self.tail[:ready]
+    
+    def finish(self):
+        self.writer.write(self.tail.tobytes())
+        self.tail = array.array('h')
+
+
+class RegionSplicer:
+    """Apply edit regions to the original recording, synthesizing only the new words"""
+    
+    def __init__(self, engine: TTSEngine, crossfade_seconds: float = 0.015,
+                 level_context_seconds: float = 1.5, max_gain: float = 4.0,
+                 context_words: int = 20):
+        """
+        Initialize the splicer
+        
+        Args:
+            engine: TTSEngine for the replacement phrases (its concurrency, retries
+                    and segment cache all apply); its sample_rate need not match
+                    the recording - TTS audio is resampled to fit
+            crossfade_seconds: Overlap at every cut and splice point
+            level_context_seconds: Original audio either side of a region used as
+                                   the loudness reference for its replacement
+            max_gain: Loudness correction limit in either direction
+            context_words: Surrounding original words sent as previous/next text,
+                           so a phrase is intoned as part of its sentence
+        """
+        self.engine = engine
+        self.crossfade_seconds = crossfade_seconds
+        self.level_context_seconds = level_context_seconds
+        self.max_gain = max_gain
+        self.context_words = context_words
+        self.last_report = None
+    
+    def splice(self, original_path: str, regions: list, words, output_path: str) -> str:
+        """
+        Write the original recording with every region applied
+        
+        Args:
+            original_path: 16-bit mono WAV that was transcribed
+            regions: EditRegions with timestamps (from alignment.align() or edit_list.apply_edits())
+            words: Original word table the regions index into
+            output_path: WAV file to write (at the original's sample rate)
+        
+        Returns:
+            Path to the WAV file
+        """
+        words = WordTable.coerce(words)
+        index = TimeIndex(words)
+        regions = sorted(regions, key=lambda r: r.start)
+        started = time.time()
+        
+        with wave.open(original_path, 'rb') as original:
+            if original.getnchannels() != 1 or original.getsampwidth() != 2:
+                raise Exception(f"Splicing needs 16-bit mono audio: {original_path}")
+            rate = original.getframerate()
+            total = original.getnframes()
+            
+            # Every replacement phrase at once, concurrently
+            spoken = [i for i, r in enumerate(regions) if r.kind != 'delete' and r.new_text]
+            segments = self.engine.synthesize_all(
+                [regions[i].new_text for i in spoken],
+                [self._context(regions[i], words) for i in spoken]
+            )
+            audio = {i: segment.pcm for i, segment in zip(spoken, segments)}
+            
+            removed = 0
+            with StreamingWavWriter(output_path, rate, expected_seconds=total / rate) as writer:
+                joiner = _CrossfadeJoiner(writer, int(self.crossfade_seconds * rate))
+                position = 0
+                for i, region in enumerate(regions):
+                    t0, t1 = self._bounds(region, index)
+                    start = max(position, min(total, int(t0 * rate)))
+                    end = max(start, min(total, int(t1 * rate)))
+                    self._copy(original, position, start, joiner)
+                    if i in audio:
+                        joiner.append(self._fit(audio[i], original, start, end, rate))
+                    removed += end - start
+                    position = end
+                self._copy(original, position, total, joiner)
+                joiner.finish()
+                output_seconds = writer.duration
+        
+        self.last_report = {
+            'regions': len(regions),
+            'deleted': len(regions) - len(spoken),
+            'synthesized': len(spoken),
+            'cached': sum(1 for segment in segments if segment.cached),
+            'tts_characters': sum(len(regions[i].new_text) for i in spoken),
+            'removed_seconds': removed / rate,
+            'output_seconds': output_seconds,
+            'seconds': time.time() - started
+        }
+        return output_path
+    
+    def _bounds(self, region, index: TimeIndex) -> tuple:
+        """
+        Time span a region takes out of the recording
+        
+        ASR word timings can overlap, so any word the region keeps that
+        overlaps the span pulls the cut back to that word's edge rather
+        than clipping it.
+        """
+        if region.orig_end > region.orig_start:
+            start, end = index.span(region.orig_start, region.orig_end - 1)
+        else:
+            start, end = region.start, region.end  # Insertion: the gap between words
+        
+        for i in index.overlapping(start, end):
+            if region.orig_start <= i < region.orig_end:
+                continue
+            if index.words.starts[i] <= start:
+                start = max(start, index.words.ends[i])
+            else:
+                end = min(end, index.words.starts[i])
+        return start, max(start, end)
+    
+    def _context(self, region, words: WordTable) -> tuple:
+        """Original words either side of a region, as (previous_text, next_text)"""
+        before = words.words[max(0, region.orig_start - self.context_words):region.orig_start]
+        after = words.words[region.orig_end:region.orig_end + self.context_words]
+        return " ".join(before) or None, " ".join(after) or None
+    
+    def _copy(self, original: wave.Wave_read, start: int, end: int, joiner: _CrossfadeJoiner):
+        """Pass original frames [start, end) through, crossfading only into the first block"""
+        block = int(BLOCK_SECONDS * original.getframerate())
+        original.setpos(start)
+        for first in range(start, end, block):
+            samples = array.array('h', original.readframes(min(block, end - first)))
+            joiner.append(samples, crossfade=first == start)
+    
+    def _fit(self, pcm: bytes, original: wave.Wave_read, start: int, end: int, rate: int) -> array.array:
+        """Resample, trim and level-match synthesized audio to the speech around [start, end)"""
+        samples = trim_silence(resample(array.array('h', pcm), self.engine.sample_rate, rate), rate)
+        
+        context = int(self.level_context_seconds * rate)
+        reference = array.array('h')
+        before = max(0, start - context)
+        original.setpos(before)
+        reference.frombytes(original.readframes(start - before))
+        original.setpos(end)
+        reference.frombytes(original.readframes(min(context, original.getnframes() - end)))
+        
+        target, level = speech_level(reference, rate), speech_level(samples, rate)
+        if not target or not level:
+            return samples
+        gain = max(1 / self.max_gain, min(self.max_gain, target / level))
+        return array.array('h', (max(-32768, min(32767, int(s * gain))) for s in samples))
+
+
+# TEST CODE - splice edits into a tone-burst "recording" via the local fake TTS server
+if __name__ == "__main__":
+    import os
+    import tempfile
+    from fake_servers import FakeTTSServer, make_speech_like_wav
+    from tts_engine import HTTPSynthesizer
+    from alignment import align
+    
+    print("=" * 50)
+    print("REGION SPLICER TEST")
+    print("=" * 50)
+    print()
+    
+    rate = 24000
+    tmp = tempfile.mkdtemp()
+    original_path = os.path.join(tmp, "original.wav")
+    with open(original_path, 'wb') as f:
+        f.write(make_speech_like_wav(num_words=40, sample_rate=rate))
+    
+    # Word i is 0.4s of tone, then 0.2s of silence (0.8s after every 8th word)
+    words = WordTable()
+    t = 0.0
+    for i in range(40):
+        words.append(f"w{i}", t, t + 0.4, 0.9)
+        t += 0.4 + (0.8 if (i + 1) % 8 == 0 else 0.2)
+    
+    # Drop three words, reword two, add one
+    cleaned = [w for w in words.words if w not in ("w3", "w4", "w17")]
+    cleaned[cleaned.index("w10"):cleaned.index("w12")] = ["then", "we", "shipped"]
+    cleaned.insert(cleaned.index("w30"), "finally")
+    regions = align(words, cleaned)
+    
+    with FakeTTSServer(base_delay=0.05) as server:
+        engine = TTSEngine(HTTPSynthesizer("fake-key", "voice", base_url=server.url), sample_rate=rate)
+        splicer = RegionSplicer(engine)
+        output_path = splicer.splice(original_path, regions, words, os.path.join(tmp, "spliced.wav"))
+    
+    full_text = " ".join(cleaned)
+    report = splicer.last_report
+    print(f"Regions: {[(r.kind, r.new_text) for r in regions]}")
+    print(f"Report: {report}")
+    print(f"TTS characters: {report['tts_characters']} of {len(full_text)} "
+          f"({100 * (1 - report['tts_characters'] / len(full_text)):.0f}% saved)")
+    
+    with wave.open(output_path, 'rb') as wav:
+        frames = wav.getnframes()
+        wav.setpos(int((words.starts[10] - (words.ends[4] - words.starts[3]) + 0.05) * rate))
+        spliced = array.array('h', wav.readframes(int(0.3 * rate)))
+    with wave.open(original_path, 'rb') as wav:
+        original_seconds = wav.getnframes() / rate
+    print(f"Duration: {original_seconds:.2f}s -> {frames / rate:.2f}s")
+    # The fake TTS speaks at amplitude 2000; next to words 9 and 12 (~1400) it is turned down to match
+    print(f"Replacement level: {speech_level(spliced, rate):.0f} (TTS raw 2000, neighbours ~1400)")
@@ -0,0 +1,158 @@
+"""
+Sentence Stream
+Turns a stream of text fragments (LLM tokens) into complete sentences as soon as
+each one ends, for sync and async consumers
+"""
+
+import re
+import asyncio
+import threading
+
+# Terminal punctuation (plus closing quotes/brackets) followed by whitespace
+_BOUNDARY = re.compile(r"[.!?]+['\")\]]*(?=\s)")
+
+# Words whose trailing period doesn't end a sentence
+_ABBREVIATIONS = frozenset({"mr", "mrs", "ms", "dr", "prof", "st", "vs", "etc", "e.g", "i.e", "jr", "sr"})
+
+
+class SentenceBuffer:
+    """Accumulates fragments and hands back each sentence once it is complete"""
+    
+    def __init__(self):
+        self._text = ""
+    
+    def feed(self, fragment: str) -> list:
+        """
+        Add a fragment
+        
+        A sentence is only complete once the whitespace after its punctuation
+        has arrived, so "3." followed by "5" is never split.
+        
+        Returns:
+            Sentences completed by this fragment (possibly none)
+        """
+        self._text += fragment
+        sentences = []
+        start = 0
+        for match in _BOUNDARY.finditer(self._text):
+            before = self._text[start:match.start()].split()
+            last_word = before[-1].lower().lstrip("(\"'") if before else ""
+            # "Dr. Smith", "J. Doe"
+            if last_word in _ABBREVIATIONS or (len(last_word) == 1 and last_word.isalpha()
+                                              and match.group().startswith('.')):
+                continue
+            sentence = self._text[start:match.end()].strip()
+            if sentence:
+                sentences.append(sentence)
+            start = match.end()
+        self._text = self._text[start:]
+        return sentences
+    
+    def flush(self) -> str:
+        """Whatever is left once the stream ends ('' if nothing)"""
+        text, self._text = self._text.strip(), ""
+        return text
+
+
+def iter_sentences(fragments):
+    """
+    Yield sentences from an iterable of text fragments as each one completes
+    
+    Args:
+        fragments: Iterable of strings (e.g. streamed completion deltas)
+    """
+    buffer = SentenceBuffer()
+    for fragment in fragments:
+        yield from buffer.feed(fragment)
+    tail = buffer.flush()
+    if tail:
+        yield tail
+
+
+async def aiter_sentences(fragments):
+    """
+    Async version of iter_sentences()
+    
+    Args:
+        fragments: Async iterable of strings
+    """
+    buffer = SentenceBuffer()
+    async for fragment in fragments:
+        for sentence in buffer.feed(fragment):
+            yield sentence
+    tail = buffer.flush()
+    if tail:
+        yield tail
+
+
+async def iterate_async(iterable, max_buffered: int = 64):
+    """
+    Consume a blocking iterator on a worker thread, yielding its items to the event loop
+    
+    Lets a sync generator (a streaming API client, say) drive async consumers
+    without blocking the loop while it waits on the network.
+    
+    Args:
+        iterable: Blocking iterable
+        max_buffered: Items the producer may get ahead of the consumer
+    """
+    loop = asyncio.get_running_loop()
+    items = asyncio.Queue(max_buffered)
+    done = object()
+    stop = threading.Event()
+    
+    def produce():
+        try:
+            for item in iterable:
+                if stop.is_set():
+                    break
+                asyncio.run_coroutine_threadsafe(items.put((item, None)), loop).result()
+        except Exception as e:
+            asyncio.run_coroutine_threadsafe(items.put((done, e)), loop).result()
+            return
+        asyncio.run_coroutine_threadsafe(items.put((done, None)), loop).result()
+    
+    producer = loop.run_in_executor(None, produce)
+    try:
+        while True:
+            item, error = await items.get()
+            if error is not None:
+                raise error
+            if item is done:
+                break
+            yield item
+    finally:
+        stop.set()
+        # Unblock a producer waiting on a full queue so it can see the stop flag
+        while not items.empty():
+            items.get_nowait()
+        await asyncio.wait([producer], timeout=0.1)
+
+
+# TEST CODE - simulated token stream
+if __name__ == "__main__":
+    import time
+    
+    print("=" * 50)
+    print("SENTENCE STREAM TEST")
+    print("=" * 50)
+    print()
+    
+    text = ("Dr. Smith joined the team in 2023. It grew 3.5 times! "
+            "Did it work? \"Yes.\" We shipped it, e.g. the demo, on Friday")
+    
+    def tokens():
+        # Fragments of a few characters, like an LLM stream
+        for i in range(0, len(text), 3):
+            time.sleep(0.01)
+            yield text[i:i + 3]
+    
+    started = time.time()
+    for sentence in iter_sentences(tokens()):
+        print(f"[{time.time() - started:.2f}s] {sentence}")
+    
+    async def main():
+        return [s async for s in aiter_sentences(iterate_async(tokens()))]
+    
+    print()
+    print(f"Async gives the same sentences: {asyncio.run(main()) == list(iter_sentences([text]))}")
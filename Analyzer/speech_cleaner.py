@@ -4,17 +4,37 @@ Removes fillers, stutters, and improves clarity
 """
 
 import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from groq import Groq
+from local_cleaner import LocalCleaner, llm_passages, assemble, as_word_table
+from edit_list import numbered_words, deletions, parse_edits, edits_from_regions, apply_edits
+from alignment import align
+from llm_chunks import ChunkedCompletion, RateLimiter, TextChunk, make_chunks, estimate_tokens
+from sentence_stream import SentenceBuffer, iter_sentences, iterate_async
+from cache import JsonCache, make_key
+
+MODEL = "llama-3.1-8b-instant"
+TEMPERATURE = 0.1
+MAX_OUTPUT_TOKENS = 2000  # Per chunk; chunks are sized well below this
+PROMPT_VERSION = 2  # Bump whenever _prompt() changes so cached answers aren't reused
+EDIT_PROMPT_VERSION = 2  # Same, for _edit_prompt()
 
 class SpeechCleaner:
     """Clean and improve transcripts using AI"""
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, max_workers: int = 4,
+                 max_chunk_tokens: int = 800, rate_limiter: RateLimiter = None,
+                 cache: JsonCache = None):
         """
         Initialize speech cleaner
         
         Args:
             api_key: Groq API key (or uses GROQ_API_KEY env var)
+            max_workers: Chunk requests in flight at once
+            max_chunk_tokens: Input token budget per request (split at sentence boundaries)
+            rate_limiter: Shared RateLimiter (default: 30 requests/minute)
+            cache: Optional JsonCache of per-chunk answers, so unchanged text isn't re-sent
         """
         if api_key is None:
             api_key = os.getenv("GROQ_API_KEY")
@@ -23,18 +43,338 @@ class SpeechCleaner:
             raise ValueError("Groq API key not provided")
         
         self.client = Groq(api_key=api_key)
+        self.local_cleaner = LocalCleaner()
+        self.chunker = ChunkedCompletion(self._complete_chunk, max_input_tokens=max_chunk_tokens,
+                                         max_workers=max_workers,
+                                         rate_limiter=rate_limiter or RateLimiter(requests_per_minute=30),
+                                         output_tokens=self._output_tokens)
+        self.edit_chunker = ChunkedCompletion(self._complete_edit_chunk, max_input_tokens=max_chunk_tokens,
+                                              max_workers=max_workers,
+                                              rate_limiter=self.chunker.rate_limiter,
+                                              output_tokens=self._edit_output_tokens)
+        self.cache = cache
+        self.last_report = None  # Chunk count, truncated chunks and timing of the last AI pass
     
-    def improve_transcript(self, raw_transcript: str) -> str:
+    def improve_transcript(self, raw_transcript: str, words=None, local_first: bool = True,
+                           use_cache: bool = True, mode: str = "rewrite") -> str:
         """
         Clean and improve a transcript
         
+        Fillers and stutters are removed locally first; only sentences the
+        rules can't settle (ambiguous fillers, low-confidence words) go to Groq.
+        
+        Args:
+            raw_transcript: The raw transcript text
+            words: Transcriber word list (timestamps/confidence improve sentence splitting)
+            local_first: Set False to send the whole transcript to the LLM as before
+            use_cache: Set False to bypass the answer cache (answers are still stored)
+            mode: "rewrite" for rewritten text, or "edits" to have the model return word
+                  edits (see propose_edits) - fewer output tokens, original wording kept
+            
+        Returns:
+            Cleaned and improved transcript
+        """
+        if mode == "edits":
+            table, edits = self.propose_edits(raw_transcript, words, use_cache=use_cache)
+            return apply_edits(table, edits)[0].text
+        
+        if not local_first:
+            return self.clean_with_llm(raw_transcript, use_cache=use_cache)
+        
+        sentences = self.local_cleaner.clean(words if words is not None else raw_transcript)
+        passages = llm_passages(sentences)
+        
+        print(f"🧹 Cleaned {len(sentences) - sum(s.needs_llm for s in sentences)}/{len(sentences)} "
+              f"sentences locally, {len(passages)} passage(s) need AI")
+        
+        rewrites = {}
+        if passages:
+            cleaned = self.clean_many([text for _, _, text in passages], use_cache=use_cache)
+            rewrites = {first: text for (first, _, _), text in zip(passages, cleaned)}
+        else:
+            print("✅ Transcript cleaned!")
+        return assemble(sentences, rewrites)
+    
+    def propose_edits(self, raw_transcript: str, words=None, use_cache: bool = True) -> tuple:
+        """
+        Clean as a list of edits against word indices instead of rewritten text
+        
+        The local pass supplies deletions for the sentences it settles; the
+        rest are shown to Groq as numbered words and it answers with a short
+        JSON edit list, which is validated before use. A reply that can't be
+        parsed falls back to a rewrite of that chunk, aligned back to edits.
+        
+        Args:
+            raw_transcript: The raw transcript text
+            words: Transcriber word list (keeps timestamps on the edited table)
+            use_cache: Set False to bypass the answer cache (answers are still stored)
+        
+        Returns:
+            (WordTable of the original words, list of WordEdit) - pass both to
+            edit_list.apply_edits() for the cleaned words with timestamps
+        """
+        table = as_word_table(words if words is not None else raw_transcript)
+        sentences = self.local_cleaner.clean(table)
+        
+        edits = []
+        for sentence in sentences:
+            if not sentence.needs_llm:
+                edits += deletions(sentence.removed)
+        
+        # Chunks of whole sentences, each remembering the word range it shows. Words are
+        # numbered from 0 within the chunk, so the prompt (and its cache key) doesn't change
+        # when an edit earlier in the transcript shifts every later word index
+        chunks, ranges = [], []
+        budget = self.edit_chunker.max_input_tokens
+        for source, (first, end, _) in enumerate(llm_passages(sentences)):
+            group_start = first
+            for index in range(first, end + 1):
+                if index > group_start and (index == end or estimate_tokens(numbered_words(
+                        table, sentences[group_start].word_start, sentences[index].word_end)) > budget):
+                    start, stop = sentences[group_start].word_start, sentences[index - 1].word_end
+                    text = numbered_words(table[start:stop], 0, stop - start)
+                    context = sentences[group_start - 1].original if group_start > 0 else ""
+                    chunks.append(TextChunk(source, len(chunks), text, context, estimate_tokens(text)))
+                    ranges.append((start, stop))
+                    group_start = index
+        
+        if chunks:
+            hits = set()
+            
+            def lookup(chunk: TextChunk):
+                answer = self._cached_chunk(chunk, "edits")
+                if answer is not None:
+                    hits.add(chunk.index)
+                return answer
+            
+            try:
+                print("🤖 Asking AI for edits...")
+                answers, report = self.edit_chunker.run_chunks(
+                    chunks, lookup=lookup if self.cache is not None and use_cache else None)
+            except Exception as e:
+                raise Exception(f"Failed to clean transcript: {str(e)}")
+            
+            rejected = 0
+            rewritten_chunks = 0
+            for chunk, (start, stop), (reply, finish_reason) in zip(chunks, ranges, answers):
+                passage = table[start:stop]
+                try:
+                    chunk_edits, dropped = parse_edits(reply, 0, stop - start)
+                except ValueError as e:
+                    print(f"⚠️ {str(e)} - rewriting that passage instead")
+                    rewritten = self.clean_with_llm(passage.text, use_cache=use_cache)
+                    chunk_edits = edits_from_regions(align(passage, rewritten), passage)
+                    rewritten_chunks += 1
+                    dropped = 0
+                else:
+                    if self.cache is not None and chunk.index not in hits and finish_reason != 'length':
+                        self.cache.put_value(self.cache_key(chunk, "edits"), [reply, finish_reason])
+                for edit in chunk_edits:
+                    edit.first += start
+                    edit.last += start
+                edits += chunk_edits
+                rejected += dropped
+            
+            # The fallback rewrites set last_report too; the edit pass is the one to report
+            report['rejected'] = rejected
+            report['rewritten'] = rewritten_chunks
+            self.last_report = report
+            print(f"✅ {len(edits)} edit(s) proposed ({report['chunks']} chunk(s), "
+                  f"{report['cached']} from cache, {rejected} invalid edit(s) dropped)")
+        
+        edits.sort(key=lambda e: e.first)
+        return table, edits
+    
+    def clean_with_llm(self, raw_transcript: str, use_cache: bool = True) -> str:
+        """
+        Clean text with Groq, split into sentence chunks cleaned concurrently
+        
         Args:
             raw_transcript: The raw transcript text
+            use_cache: Set False to bypass the answer cache
             
         Returns:
             Cleaned and improved transcript
         """
-        prompt = f"""
+        return self.clean_many([raw_transcript], use_cache=use_cache)[0]
+    
+    def clean_many(self, texts: list, use_cache: bool = True) -> list:
+        """
+        Clean several passages in one concurrent pass
+        
+        Args:
+            texts: Raw passages
+            use_cache: Set False to bypass the answer cache (answers are still stored)
+            
+        Returns:
+            Cleaned passages, in the same order
+        """
+        lookup = self._cached_chunk if self.cache is not None and use_cache else None
+        try:
+            print("🤖 Cleaning transcript with AI...")
+            outputs, report = self.chunker.run(texts, lookup=lookup)
+        except Exception as e:
+            raise Exception(f"Failed to clean transcript: {str(e)}")
+        
+        self.last_report = report
+        print(f"✅ Transcript cleaned! ({report['chunks']} chunk(s), {report['cached']} from cache, "
+              f"in {report['seconds']:.1f}s)")
+        for truncated in report['truncated']:
+            print(f"⚠️ AI output hit the token limit, chunk may be cut short: \"{truncated['text']}...\"")
+        return outputs
+    
+    def stream_transcript(self, raw_transcript: str, words=None, use_cache: bool = True):
+        """
+        Clean a transcript, yielding each cleaned sentence as soon as it is ready
+        
+        Locally cleaned sentences come out immediately; passages that need the
+        LLM are streamed from Groq (all chunks requested up front, a few at a
+        time) and split into sentences as tokens arrive. Sentences are always
+        yielded in transcript order, so downstream TTS can start on the first
+        one while later ones are still being written.
+        
+        Args:
+            raw_transcript: The raw transcript text
+            words: Transcriber word list (timestamps/confidence improve sentence splitting)
+            use_cache: Set False to bypass the answer cache (answers are still stored)
+        
+        Yields:
+            Cleaned sentences
+        """
+        sentences = self.local_cleaner.clean(words if words is not None else raw_transcript)
+        passages = llm_passages(sentences)
+        chunks = make_chunks([text for _, _, text in passages],
+                             self.chunker.max_input_tokens, self.chunker.overlap_sentences)
+        
+        # One queue of sentences per chunk, filled by workers in request order
+        outputs = [[] for _ in passages]
+        pool = ThreadPoolExecutor(max_workers=self.chunker.max_workers)
+        for chunk in chunks:
+            output = queue.Queue()
+            outputs[chunk.source].append(output)
+            pool.submit(self._stream_chunk, chunk, output, use_cache)
+        
+        passage_at = {first: p for p, (first, _, _) in enumerate(passages)}
+        try:
+            i = 0
+            while i < len(sentences):
+                if i in passage_at:
+                    for output in outputs[passage_at[i]]:
+                        while True:
+                            item = output.get()
+                            if item is None:
+                                break
+                            if isinstance(item, Exception):
+                                raise Exception(f"Failed to clean transcript: {str(item)}")
+                            yield item
+                    i = passages[passage_at[i]][1]
+                    continue
+                if sentences[i].cleaned:
+                    yield sentences[i].cleaned
+                i += 1
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+    
+    def astream_transcript(self, raw_transcript: str, words=None, use_cache: bool = True):
+        """Async iterator version of stream_transcript() (network waits run off the event loop)"""
+        return iterate_async(self.stream_transcript(raw_transcript, words, use_cache))
+    
+    def _stream_chunk(self, chunk: TextChunk, output: queue.Queue, use_cache: bool):
+        """Stream one chunk's answer into `output` sentence by sentence, then None"""
+        try:
+            cached = self._cached_chunk(chunk) if self.cache is not None and use_cache else None
+            if cached is not None:
+                for sentence in iter_sentences([cached[0]]):
+                    output.put(sentence)
+                return
+            
+            buffer = SentenceBuffer()
+            parts = []
+            finish_reason = None
+            with self.chunker.rate_limiter.request(chunk.input_tokens + estimate_tokens(chunk.context),
+                                                   self._output_tokens(chunk)) as used:
+                for event in self._request(chunk, stream=True):
+                    choice = event.choices[0]
+                    delta = choice.delta.content or ""
+                    parts.append(delta)
+                    for sentence in buffer.feed(delta):
+                        output.put(sentence)
+                    finish_reason = choice.finish_reason or finish_reason
+                used(estimate_tokens("".join(parts)))
+            tail = buffer.flush()
+            if tail:
+                output.put(tail)
+            
+            if finish_reason == 'length':
+                print(f"⚠️ AI output hit the token limit, chunk may be cut short: \"{chunk.text[:80]}...\"")
+            elif self.cache is not None:
+                self.cache.put_value(self.cache_key(chunk), ["".join(parts).strip(), finish_reason])
+        except Exception as e:
+            output.put(e)
+        finally:
+            output.put(None)
+    
+    @staticmethod
+    def _output_tokens(chunk: TextChunk) -> int:
+        """max_tokens for a rewrite of chunk"""
+        return min(MAX_OUTPUT_TOKENS, chunk.input_tokens * 2 + 100)
+    
+    @staticmethod
+    def _edit_output_tokens(chunk: TextChunk) -> int:
+        """max_tokens for an edit list (edits are a fraction of the text's length)"""
+        return min(MAX_OUTPUT_TOKENS, chunk.input_tokens + 100)
+    
+    def _request(self, chunk: TextChunk, **kwargs):
+        return self.client.chat.completions.create(
+            model=MODEL,
+            messages=[{"role": "user", "content": self._prompt(chunk.text, chunk.context)}],
+            temperature=TEMPERATURE,
+            max_tokens=self._output_tokens(chunk),
+            **kwargs
+        )
+    
+    def _complete_chunk(self, chunk: TextChunk) -> tuple:
+        """One Groq request; returns (cleaned text, finish_reason)"""
+        response = self._request(chunk)
+        
+        choice = response.choices[0]
+        answer = (choice.message.content.strip(), choice.finish_reason)
+        # A cut-off answer is worth retrying next time, not replaying
+        if self.cache is not None and choice.finish_reason != 'length':
+            self.cache.put_value(self.cache_key(chunk), list(answer))
+        return answer
+    
+    def _complete_edit_chunk(self, chunk: TextChunk) -> tuple:
+        """One Groq request for an edit list; returns (reply, finish_reason)"""
+        response = self.client.chat.completions.create(
+            model=MODEL,
+            messages=[{"role": "user", "content": self._edit_prompt(chunk.text, chunk.context)}],
+            temperature=TEMPERATURE,
+            max_tokens=self._edit_output_tokens(chunk)
+        )
+        
+        choice = response.choices[0]
+        return choice.message.content.strip(), choice.finish_reason
+    
+    def cache_key(self, chunk: TextChunk, kind: str = "rewrite") -> str:
+        """Answer cache key: everything that determines the model's reply to this chunk"""
+        if kind == "edits":
+            return make_key('groq-edits', MODEL, EDIT_PROMPT_VERSION, TEMPERATURE, chunk.text, chunk.context)
+        return make_key('groq', MODEL, PROMPT_VERSION, TEMPERATURE, chunk.text, chunk.context)
+    
+    def _cached_chunk(self, chunk: TextChunk, kind: str = "rewrite"):
+        cached = self.cache.get_value(self.cache_key(chunk, kind))
+        return tuple(cached) if cached is not None else None
+    
+    def _prompt(self, raw_transcript: str, context: str = "") -> str:
+        context_block = ""
+        if context:
+            context_block = f"""
+The transcript continues from this earlier text (context only - do NOT include it in your answer):
+\"\"\"{context}\"\"\"
+"""
+        
+        return f"""
 You are a speech improvement assistant.
 
 Clean this transcript by:
@@ -44,30 +384,39 @@ Clean this transcript by:
 - Improving clarity and flow
 - Keeping the original meaning and tone
 - Not adding new ideas or information
-
+{context_block}
 Transcript:
 \"\"\"{raw_transcript}\"\"\"
 
 Return ONLY the improved transcript with no preamble or explanation.
 """
+    
+    def _edit_prompt(self, numbered: str, context: str = "") -> str:
+        context_block = ""
+        if context:
+            context_block = f"""
+The transcript continues from this earlier text (context only - do NOT edit it):
+\"\"\"{context}\"\"\"
+"""
+        
+        return f"""
+You are a speech editing assistant.
 
-        try:
-            print("🤖 Cleaning transcript with AI...")
-            
-            response = self.client.chat.completions.create(
-                model="llama-3.1-8b-instant",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.1,
-                max_tokens=2000
-            )
-            
-            cleaned = response.choices[0].message.content.strip()
-            
-            print("✅ Transcript cleaned!")
-            return cleaned
-            
-        except Exception as e:
-            raise Exception(f"Failed to clean transcript: {str(e)}")
+Each word of the transcript below is numbered as index:word. List the edits that clean it:
+- Delete filler words (um, uh, like, you know, so, basically, actually)
+- Delete stutters and repeated words
+- Replace words only to fix grammar or a clearly misheard word
+- Keep the original meaning and tone
+- Do not add new ideas or information
+
+Answer with ONLY a JSON array, one item per edit, using the word indices:
+["d", first, last] deletes words first to last
+["r", first, last, "text"] replaces words first to last with text
+Answer [] if nothing needs to change.
+{context_block}
+Transcript:
+\"\"\"{numbered}\"\"\"
+"""
     
     def save_cleaned_csv(self, cleaned_transcript: str, output_path: str):
         """
@@ -5,28 +5,184 @@ Converts audio files to text with detailed analysis
 
 import os
 import json
+import time
+import uuid
+import wave
+import random
 import requests
+import threading
+from cache import JsonCache, file_sha256, make_key
+from word_table import WordTable, json_default
+from transcript_store import BINARY_EXTENSION, save_binary, load_binary
+from media_probe import probe_media
+
+# Upload file extension -> MIME type sent with the audio
+MIME_TYPES = {
+    '.wav': 'audio/wav',
+    '.flac': 'audio/flac',
+    '.ogg': 'audio/ogg',
+    '.opus': 'audio/ogg',
+    '.mp3': 'audio/mpeg',
+    '.m4a': 'audio/mp4',
+}
+
+
+class PollSchedule:
+    """Polling intervals that adapt to audio length and elapsed time, with a deadline"""
+    
+    def __init__(self, audio_seconds: float = None, timeout: float = None,
+                 min_interval: float = 0.5, max_interval: float = 15.0,
+                 expected_rtf: float = 0.05):
+        """
+        Initialize the schedule
+        
+        Args:
+            audio_seconds: Audio duration, if known (first wait is scaled to it)
+            timeout: Overall deadline in seconds (default: 120s + 3x audio duration)
+            min_interval: Shortest wait between polls
+            max_interval: Longest wait between polls
+            expected_rtf: Typical processing time per second of audio
+        """
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.expected_rtf = expected_rtf
+        self.started = time.monotonic()
+        self.polls = 0
+        self.fixed_timeout = timeout
+        self.audio_seconds = None
+        self.update_duration(audio_seconds)
+    
+    def update_duration(self, audio_seconds: float):
+        """Feed in the audio duration once known (e.g. from the job status response)"""
+        if audio_seconds:
+            self.audio_seconds = audio_seconds
+        self.timeout = self.fixed_timeout or 120 + 3 * (self.audio_seconds or 0)
+    
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+    
+    def next_delay(self) -> float:
+        """
+        Seconds to wait before the next poll
+        
+        Raises:
+            TimeoutError: If the deadline has passed
+        """
+        elapsed = self.elapsed
+        if elapsed >= self.timeout:
+            raise TimeoutError(f"Job not finished after {elapsed:.0f} seconds")
+        
+        if self.polls == 0 and self.audio_seconds:
+            # Don't ask before the job could plausibly be done
+            delay = self.audio_seconds * self.expected_rtf
+        else:
+            # Back off geometrically: poll about every 25% of the time spent so far
+            delay = elapsed * 0.25
+        
+        self.polls += 1
+        delay = min(self.max_interval, max(self.min_interval, delay))
+        delay *= random.uniform(0.9, 1.1)  # Jitter so concurrent jobs don't poll in lockstep
+        return min(delay, max(0.0, self.timeout - elapsed))
+
+
+def mime_type_for(filename: str) -> str:
+    """MIME type for an upload, based on its extension (WAV if unknown)"""
+    return MIME_TYPES.get(os.path.splitext(filename)[1].lower(), 'audio/wav')
+
+
+def multipart_stream(chunks, filename: str, config: dict, boundary: str = None) -> tuple:
+    """
+    Build a multipart/form-data job upload whose audio part is an iterable of bytes
+    
+    requests sends a generator body with chunked transfer encoding, so each
+    audio chunk goes on the wire as soon as it is produced.
+    
+    Args:
+        chunks: Iterable of audio bytes (e.g. VideoProcessor.stream_rendition())
+        filename: Name reported to the API
+        config: Speechmatics job config
+        boundary: Multipart boundary (default: random)
+        
+    Returns:
+        (Content-Type header value, generator of body bytes)
+    """
+    boundary = boundary or uuid.uuid4().hex
+    
+    def body():
+        # Config first, so the server has it before the (long) audio part
+        yield (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="config"\r\n'
+            f"Content-Type: application/json\r\n\r\n"
+            f"{json.dumps(config)}\r\n"
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="data_file"; filename="{filename}"\r\n'
+            f"Content-Type: {mime_type_for(filename)}\r\n\r\n"
+        ).encode('utf-8')
+        for chunk in chunks:
+            if chunk:
+                yield chunk
+        yield f"\r\n--{boundary}--\r\n".encode('utf-8')
+    
+    return f"multipart/form-data; boundary={boundary}", body()
+
+
+def audio_duration(audio_path: str):
+    """
+    Duration of an audio file in seconds, or None if it can't be determined
+    
+    WAV headers are read directly; anything else (the FLAC/Opus upload
+    renditions) is probed with ffprobe.
+    """
+    try:
+        with wave.open(audio_path, 'rb') as wav:
+            return wav.getnframes() / wav.getframerate()
+    except (wave.Error, EOFError, OSError):
+        pass
+    try:
+        return probe_media(audio_path).duration or None
+    except Exception:
+        return None
+
 
 class AudioTranscriber:
     """Transcribe audio files using Speechmatics"""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, base_url: str = "https://asr.api.speechmatics.com/v2",
+                 cache: JsonCache = None):
         """
         Initialize the transcriber
         
         Args:
             api_key: Your Speechmatics API key
+            base_url: API root (override to point at a local stand-in server)
+            cache: Optional JsonCache of parsed results, so identical audio isn't re-transcribed
         """
         self.api_key = api_key
-        self.base_url = "https://asr.api.speechmatics.com/v2"
+        self.base_url = base_url.rstrip('/')
+        self.cache = cache
+        self._local = threading.local()  # One pooled session per thread (chunks run concurrently)
     
-    def transcribe(self, audio_path: str, language: str = "en") -> dict:
+    @property
+    def session(self) -> requests.Session:
+        """This thread's keep-alive session, so submit, polls and fetch reuse one connection"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.headers.update(self._headers())
+        return session
+    
+    def transcribe(self, audio_path: str, language: str = "en",
+                   transcription_config: dict = None, use_cache: bool = True) -> dict:
         """
         Transcribe audio file to text
         
         Args:
             audio_path: Path to the audio file (.wav)
             language: Language code (default: "en" for English)
+            transcription_config: Extra Speechmatics transcription_config options
+            use_cache: Set False to bypass the result cache (result is still stored)
             
         Returns:
             Dictionary containing:
@@ -38,82 +194,195 @@ class AudioTranscriber:
         if not os.path.exists(audio_path):
             raise FileNotFoundError(f"Audio file not found: {audio_path}")
         
-        print(f"Transcribing audio: {audio_path}")
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache_key(audio_path, language, transcription_config)
+            if use_cache:
+                cached = self.cache.get_value(cache_key)
+                if cached is not None:
+                    print(f"Using cached transcript for: {audio_path}")
+                    cached['words'] = WordTable.coerce(cached['words'])
+                    return cached
         
-        # Step 1: Submit the job
-        job_config = {
-            "type": "transcription",
-            "transcription_config": {
-                "language": language
-            }
-        }
+        print(f"Transcribing audio: {audio_path}")
         
         try:
             # Open and send the audio file
             with open(audio_path, 'rb') as audio_file:
-                files = {
-                    'data_file': (os.path.basename(audio_path), audio_file, 'audio/wav'),
-                    'config': (None, json.dumps(job_config), 'application/json')
-                }
-                
-                headers = {
-                    'Authorization': f'Bearer {self.api_key}'
-                }
-                
-                print("Submitting transcription job...")
-                response = requests.post(
-                    f"{self.base_url}/jobs",
-                    headers=headers,
-                    files=files
+                transcript_data = self.transcribe_data(
+                    audio_file, os.path.basename(audio_path), language,
+                    audio_seconds=audio_duration(audio_path),
+                    transcription_config=transcription_config
                 )
-                
-                if response.status_code != 201:
-                    raise Exception(f"Failed to submit job: {response.status_code} - {response.text}")
-                
-                job_id = response.json()['id']
-                print(f"Job submitted. Job ID: {job_id}")
-                print("Waiting for transcription to complete...")
-            
-            # Step 2: Poll for job completion
-            import time
-            while True:
-                status_response = requests.get(
-                    f"{self.base_url}/jobs/{job_id}",
-                    headers=headers
-                )
-                
-                if status_response.status_code != 200:
-                    raise Exception(f"Failed to get job status: {status_response.text}")
-                
-                job_status = status_response.json()['job']['status']
-                
-                if job_status == 'done':
-                    print("✅ Transcription complete!")
-                    break
-                elif job_status == 'rejected':
-                    raise Exception("Job was rejected by Speechmatics")
-                
-                print(f"Status: {job_status}...")
-                time.sleep(2)
-            
-            # Step 3: Get the transcript
-            transcript_response = requests.get(
-                f"{self.base_url}/jobs/{job_id}/transcript",
-                headers=headers,
-                params={'format': 'json-v2'}
-            )
-            
-            if transcript_response.status_code != 200:
-                raise Exception(f"Failed to get transcript: {transcript_response.text}")
-            
-            transcript_data = transcript_response.json()
             
             # Parse the results
             result = self._parse_transcript(transcript_data)
-            return result
             
         except Exception as e:
             raise Exception(f"Transcription failed: {str(e)}")
+        
+        if cache_key:
+            self.cache.put_value(cache_key, result, default=json_default)
+        return result
+    
+    def transcribe_stream(self, chunks, filename: str, language: str = "en",
+                          transcription_config: dict = None, audio_seconds: float = None) -> dict:
+        """
+        Transcribe audio that is still being produced
+        
+        The upload starts with the first chunk, so e.g. ffmpeg encoding via
+        VideoProcessor.stream_rendition() overlaps the network transfer. The
+        result cache is not consulted: there is no file to hash up front.
+        
+        Args:
+            chunks: Iterable of encoded audio bytes
+            filename: Name reported to the API (its extension sets the MIME type)
+            language: Language code (default: "en" for English)
+            transcription_config: Extra Speechmatics transcription_config options
+            audio_seconds: Audio duration, if known, to pace status polling
+            
+        Returns:
+            Same dictionary as transcribe()
+        """
+        print(f"Transcribing streamed audio: {filename}")
+        
+        try:
+            job_id = self.submit_stream(chunks, filename, language, transcription_config)
+            self.wait_for_job(job_id, PollSchedule(audio_seconds))
+            return self._parse_transcript(self.fetch_transcript(job_id))
+        except Exception as e:
+            raise Exception(f"Transcription failed: {str(e)}")
+    
+    def submit_stream(self, chunks, filename: str, language: str = "en",
+                      transcription_config: dict = None) -> str:
+        """
+        Step 1 (streaming): Submit the job with a chunked-transfer upload body
+        
+        Returns:
+            Speechmatics job ID
+        """
+        content_type, body = multipart_stream(
+            chunks, filename, self.job_config(language, transcription_config)
+        )
+        
+        print("Submitting transcription job (streaming upload)...")
+        response = self.session.post(
+            f"{self.base_url}/jobs",
+            headers={'Content-Type': content_type},
+            data=body
+        )
+        
+        if response.status_code != 201:
+            raise Exception(f"Failed to submit job: {response.status_code} - {response.text}")
+        
+        job_id = response.json()['id']
+        print(f"Job submitted. Job ID: {job_id}")
+        print("Waiting for transcription to complete...")
+        return job_id
+    
+    def cache_key(self, audio_path: str, language: str = "en",
+                  transcription_config: dict = None, variant: str = None) -> str:
+        """Result cache key: audio content hash plus everything sent in the job config"""
+        return make_key('speechmatics', file_sha256(audio_path),
+                        self.job_config(language, transcription_config), variant)
+    
+    def transcribe_data(self, audio_data, filename: str, language: str = "en",
+                        audio_seconds: float = None, transcription_config: dict = None) -> dict:
+        """
+        Run one transcription job on in-memory or open-file audio
+        
+        Args:
+            audio_data: Bytes or a binary file object
+            filename: Name reported to the API
+            language: Language code
+            audio_seconds: Audio duration, if known, to pace status polling
+            transcription_config: Extra Speechmatics transcription_config options
+            
+        Returns:
+            Raw json-v2 transcript from Speechmatics
+        """
+        job_id = self.submit_job(audio_data, filename, language, transcription_config)
+        self.wait_for_job(job_id, PollSchedule(audio_seconds))
+        return self.fetch_transcript(job_id)
+    
+    def submit_job(self, audio_data, filename: str, language: str = "en",
+                   transcription_config: dict = None) -> str:
+        """
+        Step 1: Submit the job
+        
+        Returns:
+            Speechmatics job ID
+        """
+        files = {
+            'data_file': (filename, audio_data, mime_type_for(filename)),
+            'config': (None, json.dumps(self.job_config(language, transcription_config)), 'application/json')
+        }
+        
+        print("Submitting transcription job...")
+        response = self.session.post(
+            f"{self.base_url}/jobs",
+            files=files
+        )
+        
+        if response.status_code != 201:
+            raise Exception(f"Failed to submit job: {response.status_code} - {response.text}")
+        
+        job_id = response.json()['id']
+        print(f"Job submitted. Job ID: {job_id}")
+        print("Waiting for transcription to complete...")
+        return job_id
+    
+    def job_config(self, language: str = "en", transcription_config: dict = None) -> dict:
+        """Speechmatics job config sent alongside the audio"""
+        return {
+            "type": "transcription",
+            "transcription_config": {
+                "language": language,
+                **(transcription_config or {})
+            }
+        }
+    
+    def wait_for_job(self, job_id: str, schedule: PollSchedule = None):
+        """Step 2: Poll for job completion (adaptive interval, overall deadline)"""
+        schedule = schedule or PollSchedule()
+        
+        while True:
+            status_response = self.session.get(f"{self.base_url}/jobs/{job_id}")
+            
+            if status_response.status_code != 200:
+                raise Exception(f"Failed to get job status: {status_response.text}")
+            
+            job = status_response.json()['job']
+            job_status = job['status']
+            
+            if job_status == 'done':
+                print("✅ Transcription complete!")
+                break
+            elif job_status == 'rejected':
+                raise Exception("Job was rejected by Speechmatics")
+            
+            # The status response reports the audio duration, which sharpens the schedule
+            schedule.update_duration(job.get('duration'))
+            
+            print(f"Status: {job_status}...")
+            time.sleep(schedule.next_delay())
+    
+    def fetch_transcript(self, job_id: str) -> dict:
+        """Step 3: Get the transcript"""
+        transcript_response = self.session.get(
+            f"{self.base_url}/jobs/{job_id}/transcript",
+            params={'format': 'json-v2'}
+        )
+        
+        if transcript_response.status_code != 200:
+            raise Exception(f"Failed to get transcript: {transcript_response.text}")
+        
+        return transcript_response.json()
+    
+    def _headers(self) -> dict:
+        return {
+            'Authorization': f'Bearer {self.api_key}'
+        }
     
     def _parse_transcript(self, transcript_data: dict) -> dict:
         """
@@ -125,31 +394,18 @@ class AudioTranscriber:
         Returns:
             Organized dictionary with transcript and analysis data
         """
-        # Extract full transcript text
-        results = transcript_data.get('results', [])
-        full_transcript = ""
-        words_list = []
-        
-        for result in results:
-            if result.get('type') == 'word':
-                word_data = {
-                    'word': result.get('alternatives', [{}])[0].get('content', ''),
-                    'start': result.get('start_time', 0),
-                    'end': result.get('end_time', 0),
-                    'confidence': result.get('alternatives', [{}])[0].get('confidence', 0)
-                }
-                words_list.append(word_data)
-                full_transcript += word_data['word'] + " "
+        # Words go into columns; the full text is one join rather than repeated +=
+        words = WordTable.from_results(transcript_data.get('results', []))
         
         # Get metadata
         metadata = transcript_data.get('metadata', {})
         
         return {
-            'transcript': full_transcript.strip(),
-            'words': words_list,
+            'transcript': words.text,
+            'words': words,
             'metadata': {
                 'duration': metadata.get('transcription_time', 0),
-                'word_count': len(words_list),
+                'word_count': len(words),
                 'language': 'en'
             },
             'raw_data': transcript_data  # Keep full response for detailed analysis
@@ -157,15 +413,40 @@ class AudioTranscriber:
     
     def save_transcript(self, result: dict, output_path: str):
         """
-        Save transcript result to JSON file
+        Save transcript result to file
+        
+        A .tbin path gets the compact binary format (see transcript_store);
+        anything else gets the original indented JSON.
         
         Args:
             result: Transcript result dictionary
-            output_path: Path to save JSON file
+            output_path: Path to save JSON (or .tbin) file
         """
-        with open(output_path, 'w') as f:
-            json.dump(result, f, indent=2)
+        if output_path.endswith(BINARY_EXTENSION):
+            save_binary(result, output_path)
+        else:
+            with open(output_path, 'w') as f:
+                json.dump(result, f, indent=2, default=json_default)
         print(f"Transcript saved to: {output_path}")
+    
+    def load_transcript(self, path: str, include_raw: bool = False) -> dict:
+        """
+        Load a transcript written by save_transcript()
+        
+        Args:
+            path: .tbin or JSON file
+            include_raw: For .tbin files, also decompress raw_data
+        
+        Returns:
+            Same dictionary as transcribe()
+        """
+        if path.endswith(BINARY_EXTENSION):
+            return load_binary(path, include_raw=include_raw)
+        
+        with open(path, 'r') as f:
+            result = json.load(f)
+        result['words'] = WordTable.coerce(result['words'])
+        return result
 
 
 # TEST CODE
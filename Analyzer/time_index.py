@@ -0,0 +1,180 @@
+"""
+Time Index
+Bisect-based lookups from time to transcript words: range overlap, nearest word, bulk queries
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from word_table import WordTable
+
+
+class TimeIndex:
+    """
+    Index over word timestamps, built once per transcript
+    
+    Words are kept sorted by start time alongside a running maximum of end
+    times, so "which words overlap [t0, t1]" is two bisects plus a scan over
+    the matches (words in a transcript rarely overlap each other), and
+    "nearest word to t" is a single bisect.
+    """
+    
+    def __init__(self, words):
+        """
+        Build the index
+        
+        Args:
+            words: WordTable or list of word dicts with start/end
+        """
+        words = WordTable.coerce(words)
+        self.words = words
+        count = len(words)
+        
+        # Speechmatics output is already in time order; only sort if it isn't
+        if all(words.starts[i] <= words.starts[i + 1] for i in range(count - 1)):
+            self.order = None
+            self.starts = words.starts
+            self.ends = words.ends
+        else:
+            order = sorted(range(count), key=words.starts.__getitem__)
+            self.order = array('l', order)
+            self.starts = array('d', (words.starts[i] for i in order))
+            self.ends = array('d', (words.ends[i] for i in order))
+        
+        # max_ends[p] = latest end among the first p+1 words (non-decreasing, so bisectable)
+        self.max_ends = array('d')
+        self.max_end_positions = array('l')
+        latest, latest_position = float('-inf'), -1
+        for position, end in enumerate(self.ends):
+            if end > latest:
+                latest, latest_position = end, position
+            self.max_ends.append(latest)
+            self.max_end_positions.append(latest_position)
+    
+    def __len__(self) -> int:
+        return len(self.starts)
+    
+    def _word_index(self, position: int) -> int:
+        return position if self.order is None else self.order[position]
+    
+    def overlapping(self, t0: float, t1: float) -> list:
+        """
+        Words that overlap [t0, t1] (touching endpoints count)
+        
+        Returns:
+            Word indices in start-time order
+        """
+        # Everything before `first` ends too early, everything from `stop` on starts too late
+        first = bisect_left(self.max_ends, t0)
+        stop = bisect_right(self.starts, t1, first)
+        return [self._word_index(p) for p in range(first, stop) if self.ends[p] >= t0]
+    
+    def at(self, t: float) -> list:
+        """Words whose [start, end] contains time t"""
+        return self.overlapping(t, t)
+    
+    def nearest(self, t: float) -> int:
+        """
+        Word closest to time t (a word containing t wins; ties go to the earlier word)
+        
+        Returns:
+            Word index, or None if the index is empty
+        """
+        if not self.starts:
+            return None
+        
+        position = bisect_right(self.starts, t) - 1
+        best, best_distance = None, float('inf')
+        
+        if position >= 0:
+            # Of the words starting at or before t, the one ending latest is closest
+            best = self.max_end_positions[position]
+            best_distance = max(0.0, t - self.max_ends[position])
+        if position + 1 < len(self.starts) and self.starts[position + 1] - t < best_distance:
+            best = position + 1
+        
+        return self._word_index(best)
+    
+    def span(self, first: int, last: int) -> tuple:
+        """
+        Time span from the start of word `first` to the end of word `last`
+        
+        Indices are clamped to the transcript, so a context window around the
+        first or last word doesn't need special-casing.
+        
+        Returns:
+            (start, end) in seconds
+        """
+        count = len(self.words)
+        if count == 0:
+            return (0.0, 0.0)
+        first = min(max(first, 0), count - 1)
+        last = min(max(last, 0), count - 1)
+        return (self.words.starts[first], self.words.ends[last])
+    
+    def overlapping_many(self, intervals: list) -> list:
+        """
+        overlapping() for many intervals at once
+        
+        Queries are answered in order of t0 so the lower bisect bound only
+        moves forward, which keeps cut lists over long recordings cheap.
+        
+        Args:
+            intervals: List of (t0, t1) tuples
+        
+        Returns:
+            One list of word indices per interval, in the input order
+        """
+        results = [None] * len(intervals)
+        first = 0
+        for query in sorted(range(len(intervals)), key=lambda i: intervals[i][0]):
+            t0, t1 = intervals[query]
+            first = bisect_left(self.max_ends, t0, first)
+            stop = bisect_right(self.starts, t1, first)
+            results[query] = [self._word_index(p) for p in range(first, stop) if self.ends[p] >= t0]
+        return results
+
+
+# TEST CODE - compare against linear scans on a long synthetic transcript
+if __name__ == "__main__":
+    import random
+    import time
+    
+    print("=" * 50)
+    print("TIME INDEX TEST")
+    print("=" * 50)
+    print()
+    
+    words = WordTable()
+    t = 0.0
+    for i in range(40000):
+        length = random.uniform(0.1, 0.6)
+        words.append(f"w{i}", round(t, 3), round(t + length, 3), 0.9)
+        t += length + random.uniform(0.0, 0.4)
+    
+    index = TimeIndex(words)
+    queries = [(q, q + random.uniform(0, 5)) for q in (random.uniform(0, t) for _ in range(2000))]
+    
+    def linear(t0, t1):
+        return [i for i in range(len(words)) if words.ends[i] >= t0 and words.starts[i] <= t1]
+    
+    started = time.perf_counter()
+    expected = [linear(t0, t1) for t0, t1 in queries[:200]]
+    linear_seconds = (time.perf_counter() - started) / 200
+    
+    started = time.perf_counter()
+    single = [index.overlapping(t0, t1) for t0, t1 in queries]
+    index_seconds = (time.perf_counter() - started) / len(queries)
+    
+    bulk = index.overlapping_many(queries)
+    
+    def nearest_linear(q):
+        return min(range(len(words)),
+                   key=lambda i: max(0.0, words.starts[i] - q, q - words.ends[i]))
+    
+    points = [random.uniform(-1, t + 1) for _ in range(200)]
+    
+    print(f"Linear scan:  {linear_seconds * 1e6:.0f} us/query")
+    print(f"TimeIndex:    {index_seconds * 1e6:.1f} us/query")
+    print(f"Range results match: {single[:200] == expected}")
+    print(f"Bulk results match:  {bulk == single}")
+    print(f"Nearest matches:     {[index.nearest(q) for q in points] == [nearest_linear(q) for q in points]}")
@@ -0,0 +1,275 @@
+"""
+Binary Transcript Store
+Compact, memory-mappable transcript files with the raw Speechmatics response compressed
+and loaded only on demand
+"""
+
+import os
+import sys
+import json
+import mmap
+import zlib
+import struct
+from array import array
+from word_table import WordTable, json_default
+
+MAGIC = b'STRN'
+VERSION = 1
+BINARY_EXTENSION = '.tbin'
+
+# Sections, in file order; float columns first so they stay 8-byte aligned
+SECTIONS = ('starts', 'ends', 'confidences', 'word_offsets', 'words', 'metadata', 'raw')
+
+# magic, version, reserved, word count, then (offset, length) per section
+HEADER = struct.Struct('<4sHHQ' + 'QQ' * len(SECTIONS))
+
+
+def _little_endian(column: array) -> bytes:
+    if sys.byteorder != 'little':
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def _column(data, typecode: str) -> array:
+    column = array(typecode)
+    column.frombytes(data)
+    if sys.byteorder != 'little':
+        column.byteswap()
+    return column
+
+
+def save_binary(result: dict, output_path: str) -> str:
+    """
+    Write a transcript result in the binary format
+    
+    Args:
+        result: Dictionary from AudioTranscriber.transcribe()
+        output_path: Destination file (conventionally *.tbin)
+    
+    Returns:
+        output_path
+    """
+    words = WordTable.coerce(result['words'])
+    
+    encoded = [w.encode('utf-8') for w in words.words]
+    offsets = array('Q', [0])
+    for w in encoded:
+        offsets.append(offsets[-1] + len(w))
+    
+    metadata = {key: value for key, value in result.items() if key not in ('words', 'raw_data')}
+    sections = {
+        'starts': _little_endian(words.starts),
+        'ends': _little_endian(words.ends),
+        'confidences': _little_endian(words.confidences),
+        'word_offsets': _little_endian(offsets),
+        'words': b''.join(encoded),
+        'metadata': json.dumps(metadata, default=json_default).encode('utf-8'),
+        'raw': zlib.compress(json.dumps(result.get('raw_data'), default=json_default).encode('utf-8'), 6),
+    }
+    
+    layout = []
+    position = HEADER.size
+    for name in SECTIONS:
+        position += -position % 8  # 8-byte aligned, so columns can be copied straight out of the map
+        layout += [position, len(sections[name])]
+        position += len(sections[name])
+    
+    # Write to a temp file and rename so readers never see a half-written transcript
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(words), *layout))
+        for i, name in enumerate(SECTIONS):
+            f.write(b'\0' * (layout[2 * i] - f.tell()))
+            f.write(sections[name])
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+class TranscriptFile:
+    """
+    Memory-mapped view of a binary transcript
+    
+    Columns, words, metadata and the compressed raw response are decoded
+    the first time they're used and kept; the decoded columns are plain
+    arrays, so they stay valid after close().
+    """
+    
+    def __init__(self, path: str):
+        """
+        Open a binary transcript
+        
+        Args:
+            path: File written by save_binary()
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        fields = HEADER.unpack_from(self._map, 0)
+        magic, version, _, self.word_count = fields[:4]
+        if magic != MAGIC:
+            self.close()
+            raise Exception(f"Not a binary transcript: {path}")
+        if version > VERSION:
+            self.close()
+            raise Exception(f"Unsupported transcript version {version}: {path}")
+        
+        self._sections = {
+            name: (fields[4 + 2 * i], fields[5 + 2 * i]) for i, name in enumerate(SECTIONS)
+        }
+        self._columns = {}
+        self._metadata = None
+        self._raw = None
+        self._words = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+    
+    def _section(self, name: str) -> bytes:
+        offset, length = self._sections[name]
+        return self._map[offset:offset + length]
+    
+    def _column(self, name: str, typecode: str = 'd') -> array:
+        """A numeric section, copied out of the mapping once"""
+        if name not in self._columns:
+            self._columns[name] = _column(self._section(name), typecode)
+        return self._columns[name]
+    
+    @property
+    def starts(self) -> array:
+        """Word start times in seconds"""
+        return self._column('starts')
+    
+    @property
+    def ends(self) -> array:
+        """Word end times in seconds"""
+        return self._column('ends')
+    
+    @property
+    def confidences(self) -> array:
+        return self._column('confidences')
+    
+    @property
+    def words(self) -> WordTable:
+        """All words as a WordTable (decoded once)"""
+        if self._words is None:
+            offsets = self._column('word_offsets', 'Q')
+            blob = self._section('words')
+            
+            table = WordTable()
+            table.words = [sys.intern(blob[offsets[i]:offsets[i + 1]].decode('utf-8'))
+                           for i in range(self.word_count)]
+            table.starts = self.starts
+            table.ends = self.ends
+            table.confidences = self.confidences
+            self._words = table
+        return self._words
+    
+    @property
+    def metadata(self) -> dict:
+        """Everything in the result except words and raw_data (transcript text, metadata...)"""
+        if self._metadata is None:
+            self._metadata = json.loads(self._section('metadata'))
+        return self._metadata
+    
+    @property
+    def raw_data(self):
+        """The original Speechmatics response (decompressed on first access)"""
+        if self._raw is None:
+            self._raw = json.loads(zlib.decompress(self._section('raw')))
+        return self._raw
+    
+    def to_result(self, include_raw: bool = True) -> dict:
+        """
+        Rebuild the AudioTranscriber.transcribe() dictionary
+        
+        Args:
+            include_raw: Decompress raw_data too (None otherwise)
+        """
+        result = dict(self.metadata)
+        result['words'] = self.words
+        result['raw_data'] = self.raw_data if include_raw else None
+        return result
+
+
+def load_binary(path: str, include_raw: bool = False) -> dict:
+    """
+    Load a binary transcript into a result dictionary
+    
+    Args:
+        path: File written by save_binary()
+        include_raw: Also decompress the raw Speechmatics response
+    
+    Returns:
+        Same shape as AudioTranscriber.transcribe() (raw_data is None unless requested)
+    """
+    with TranscriptFile(path) as transcript:
+        return transcript.to_result(include_raw=include_raw)
+
+
+def export_json(binary_path: str, json_path: str) -> str:
+    """Convert a binary transcript to the original indented JSON layout"""
+    result = load_binary(binary_path, include_raw=True)
+    with open(json_path, 'w') as f:
+        json.dump(result, f, indent=2, default=json_default)
+    return json_path
+
+
+# TEST CODE - round-trip a long synthetic transcript and compare with JSON
+if __name__ == "__main__":
+    import time
+    import tempfile
+    
+    print("=" * 50)
+    print("BINARY TRANSCRIPT TEST")
+    print("=" * 50)
+    print()
+    
+    results = [{'type': 'word', 'start_time': i * 0.4, 'end_time': i * 0.4 + 0.3,
+                'alternatives': [{'content': f"word{i % 500}", 'confidence': 0.93,
+                                  'language': 'en', 'speaker': 'S1'}]}
+               for i in range(30000)]
+    raw = {'format': '2.9', 'metadata': {'transcription_time': 12.5}, 'results': results}
+    words = WordTable.from_results(results)
+    result = {'transcript': words.text, 'words': words,
+              'metadata': {'duration': 12.5, 'word_count': len(words), 'language': 'en'},
+              'raw_data': raw}
+    
+    folder = tempfile.mkdtemp()
+    json_path = os.path.join(folder, "transcript.json")
+    binary_path = os.path.join(folder, "transcript" + BINARY_EXTENSION)
+    
+    with open(json_path, 'w') as f:
+        json.dump(result, f, indent=2, default=json_default)
+    save_binary(result, binary_path)
+    
+    started = time.perf_counter()
+    with open(json_path) as f:
+        json_starts = [w['start'] for w in json.load(f)['words']]
+    json_seconds = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    with TranscriptFile(binary_path) as transcript:
+        binary_starts = transcript.starts
+    binary_seconds = time.perf_counter() - started
+    
+    loaded = load_binary(binary_path, include_raw=True)
+    
+    print(f"JSON:   {os.path.getsize(json_path) / 1024:.0f} KB, timestamps in {json_seconds * 1000:.1f} ms")
+    print(f"Binary: {os.path.getsize(binary_path) / 1024:.0f} KB, timestamps in {binary_seconds * 1000:.2f} ms")
+    print(f"Timestamps match: {list(binary_starts) == json_starts}")
+    print(f"Round trip match: {loaded['words'].to_dicts() == words.to_dicts() and loaded['raw_data'] == raw}")
+    
+    for path in (json_path, binary_path):
+        os.remove(path)
+    os.rmdir(folder)
@@ -0,0 +1,314 @@
+"""
+TTS Engine
+Sentence-parallel text-to-speech: splits text at sentence boundaries, synthesizes
+segments concurrently as raw PCM with per-segment retry, and joins them in order
+"""
+
+import os
+import time
+import array
+import random
+import threading
+import unicodedata
+import requests
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from sentence_stream import iter_sentences
+from cache import FileCache, make_key
+from wav_writer import StreamingWavWriter
+
+DEFAULT_SAMPLE_RATE = 24000  # ElevenLabs pcm_24000
+
+
+def split_for_tts(text: str, max_chars: int = 400) -> list:
+    """
+    Segments of whole sentences, short neighbours merged up to max_chars
+    
+    A sentence longer than max_chars becomes a segment on its own rather
+    than being cut mid-sentence; max_chars=0 gives one sentence per segment.
+    """
+    segments = []
+    for sentence in iter_sentences([text]):
+        if segments and len(segments[-1]) + 1 + len(sentence) <= max_chars:
+            segments[-1] = f"{segments[-1]} {sentence}"
+        else:
+            segments.append(sentence)
+    return segments
+
+
+def normalize_tts_text(text: str) -> str:
+    """Canonical form for cache keys: NFC, single spaces, no surrounding whitespace"""
+    return " ".join(unicodedata.normalize('NFC', text).split())
+
+
+@dataclass
+class Segment:
+    """One synthesized piece of the text"""
+    index: int
+    text: str
+    pcm: bytes = b""        # s16le mono
+    attempts: int = 0
+    seconds: float = 0.0    # Wall time including retries
+    cached: bool = False    # Came from the segment cache
+
+
+class HTTPSynthesizer:
+    """ElevenLabs REST text-to-speech returning raw PCM (also talks to FakeTTSServer)"""
+    
+    def __init__(self, api_key: str, voice_id: str, base_url: str = "https://api.elevenlabs.io/v1",
+                 model_id: str = "eleven_multilingual_v2", voice_settings: dict = None,
+                 sample_rate: int = DEFAULT_SAMPLE_RATE, timeout: float = 60.0):
+        """
+        Initialize the synthesizer
+        
+        Args:
+            api_key: ElevenLabs API key
+            voice_id: Voice to speak with
+            base_url: API root (override to point at a local stand-in server)
+            model_id: TTS model
+            voice_settings: Optional voice settings dict
+            sample_rate: PCM sample rate to request
+            timeout: Per-request timeout in seconds
+        """
+        self.api_key = api_key
+        self.voice_id = voice_id
+        self.base_url = base_url.rstrip('/')
+        self.model_id = model_id
+        self.voice_settings = voice_settings
+        self.sample_rate = sample_rate
+        self.timeout = timeout
+        self._local = threading.local()  # One pooled session per worker thread
+    
+    def __call__(self, text: str, previous_text: str = None, next_text: str = None) -> bytes:
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        
+        payload = {'text': text, 'model_id': self.model_id}
+        if self.voice_settings:
+            payload['voice_settings'] = self.voice_settings
+        if previous_text:
+            payload['previous_text'] = previous_text
+        if next_text:
+            payload['next_text'] = next_text
+        
+        response = session.post(
+            f"{self.base_url}/text-to-speech/{self.voice_id}",
+            params={'output_format': f"pcm_{self.sample_rate}"},
+            headers={'xi-api-key': self.api_key},
+            json=payload,
+            timeout=self.timeout
+        )
+        if response.status_code != 200:
+            raise Exception(f"TTS request failed: {response.status_code} - {response.text[:200]}")
+        return response.content
+
+
+class TTSEngine:
+    """Synthesize long text as concurrent sentence segments joined into one WAV"""
+    
+    def __init__(self, synthesize, sample_rate: int = DEFAULT_SAMPLE_RATE, max_workers: int = 4,
+                 max_retries: int = 3, retry_backoff: float = 0.5, pause_seconds: float = 0.15,
+                 max_chars: int = 400, cache: FileCache = None, cache_params: dict = None):
+        """
+        Initialize the engine
+        
+        Args:
+            synthesize: Callable(text, previous_text, next_text) -> s16le mono PCM bytes
+            sample_rate: Sample rate synthesize() returns
+            max_workers: Segments in flight at once
+            max_retries: Extra attempts per segment before giving up
+            retry_backoff: First retry delay in seconds (doubles each attempt)
+            pause_seconds: Silence inserted between segments
+            max_chars: Segment size limit (see split_for_tts)
+            cache: Optional FileCache of segment PCM, so unchanged sentences are
+                   never synthesized twice
+            cache_params: Everything besides the text that shapes the audio
+                          (voice_id, model_id, voice settings) - part of every cache key
+        """
+        self.synthesize = synthesize
+        self.sample_rate = sample_rate
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.pause_seconds = pause_seconds
+        self.max_chars = max_chars
+        self.cache = cache
+        self.cache_params = cache_params or {}
+        self.last_report = None
+    
+    def render(self, text, output_path: str) -> str:
+        """
+        Synthesize text to a WAV file
+        
+        Segments are written as soon as every earlier one is done, so memory
+        holds at most the segments finished out of order.
+        
+        Args:
+            text: Full text, or a list of segment texts to use as-is
+            output_path: WAV file to write
+        
+        Returns:
+            Path to the WAV file
+        """
+        if isinstance(text, str):
+            # With a cache, one sentence per segment: merging neighbours would let a
+            # one-sentence edit shift every later segment and miss the cache
+            texts = split_for_tts(text, 0 if self.cache is not None else self.max_chars)
+        else:
+            texts = list(text)
+        started = time.time()
+        pause = b"\0\0" * int(self.pause_seconds * self.sample_rate)
+        retries = 0
+        cached = []
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool, \
+                StreamingWavWriter(output_path, self.sample_rate) as wav:
+            futures = [pool.submit(self._synthesize_segment, i, texts) for i in range(len(texts))]
+            for i, future in enumerate(futures):
+                try:
+                    segment = future.result()
+                except Exception:
+                    for pending in futures[i + 1:]:
+                        pending.cancel()
+                    raise
+                if i > 0:
+                    wav.write(pause)
+                wav.write(self._declick(segment.pcm))
+                retries += max(0, segment.attempts - 1)
+                if segment.cached:
+                    cached.append(segment.text)
+        
+        self.last_report = {
+            'segments': len(texts),
+            'characters': sum(len(t) for t in texts),
+            'cached': len(cached),
+            'synthesized_characters': sum(len(t) for t in texts) - sum(len(t) for t in cached),
+            'retries': retries,
+            'seconds': time.time() - started
+        }
+        return output_path
+    
+    def synthesize_all(self, texts: list, contexts: list = None) -> list:
+        """
+        Synthesize independent pieces of text concurrently, without joining them
+        
+        Args:
+            texts: Texts to speak
+            contexts: Optional (previous_text, next_text) per text - the words that
+                      surround it in the recording, for natural intonation
+                      (default: the neighbouring texts)
+        
+        Returns:
+            List of Segment in the order of texts (PCM not declicked)
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [pool.submit(self._synthesize_segment, i, texts, contexts[i] if contexts else None)
+                       for i in range(len(texts))]
+            return [future.result() for future in futures]
+    
+    def _synthesize_segment(self, index: int, texts: list, context: tuple = None) -> Segment:
+        """Synthesize texts[index], retrying with exponential backoff"""
+        segment = Segment(index, texts[index])
+        if context is not None:
+            previous_text, next_text = context
+        else:
+            previous_text = texts[index - 1] if index > 0 else None
+            next_text = texts[index + 1] if index + 1 < len(texts) else None
+        started = time.time()
+        
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache_key(segment.text)
+            path = self.cache.get(cache_key)
+            if path is not None:
+                with open(path, 'rb') as f:
+                    segment.pcm = f.read()
+                segment.cached = True
+                segment.seconds = time.time() - started
+                return segment
+        
+        while True:
+            segment.attempts += 1
+            try:
+                pcm = self.synthesize(segment.text, previous_text, next_text)
+                if not pcm:
+                    raise Exception("empty audio")
+                segment.pcm = pcm[:len(pcm) - len(pcm) % 2]  # Whole samples only
+                segment.seconds = time.time() - started
+                if cache_key is not None:
+                    self._store(cache_key, segment.pcm)
+                return segment
+            except Exception as e:
+                if segment.attempts > self.max_retries:
+                    raise Exception(f"Segment {index} failed after {segment.attempts} attempts: {str(e)}")
+                delay = self.retry_backoff * 2 ** (segment.attempts - 1)
+                print(f"⚠️ Segment {index} failed ({str(e)}), retrying in {delay:.1f}s")
+                time.sleep(delay * random.uniform(0.8, 1.2))
+    
+    def cache_key(self, text: str) -> str:
+        """
+        Segment cache key: voice parameters, sample rate and normalized text
+        
+        Neighbouring text (previous_text/next_text) is deliberately left out,
+        so editing one sentence doesn't invalidate the sentences around it.
+        """
+        return make_key('tts', self.cache_params, self.sample_rate, normalize_tts_text(text))
+    
+    def _store(self, key: str, pcm: bytes):
+        tmp_path = self.cache.path_for(key, f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(pcm)
+        final_path = self.cache.path_for(key, '.pcm')
+        os.replace(tmp_path, final_path)
+        self.cache.put(key, final_path)
+    
+    def _declick(self, pcm: bytes, fade_seconds: float = 0.003) -> bytes:
+        """Ramp the first and last few milliseconds so segment joins don't click"""
+        samples = array.array('h', pcm)
+        fade = min(int(fade_seconds * self.sample_rate), len(samples) // 2)
+        for n in range(fade):
+            gain = n / fade
+            samples[n] = int(samples[n] * gain)
+            samples[-1 - n] = int(samples[-1 - n] * gain)
+        return samples.tobytes()
+
+
+# TEST CODE - against the local fake TTS server (no API key needed)
+if __name__ == "__main__":
+    import wave
+    import tempfile
+    from fake_servers import FakeTTSServer
+    
+    print("=" * 50)
+    print("TTS ENGINE TEST")
+    print("=" * 50)
+    print()
+    
+    text = " ".join(f"This is sentence number {i}, spoken in the cloned voice." for i in range(24))
+    
+    with FakeTTSServer(seconds_per_char=0.002, fail_every=7) as server:
+        synthesize = HTTPSynthesizer("fake-key", "voice", base_url=server.url)
+        engine = TTSEngine(synthesize, max_workers=6, retry_backoff=0.05, max_chars=120)
+        
+        output_path = os.path.join(tempfile.mkdtemp(), "speech.wav")
+        engine.render(text, output_path)
+        
+        with wave.open(output_path, 'rb') as wav:
+            frames = wav.getnframes()
+        
+        segments = split_for_tts(text, 120)
+        expected = (sum(server.audio_frames(t, DEFAULT_SAMPLE_RATE) for t in segments)
+                    + (len(segments) - 1) * int(engine.pause_seconds * DEFAULT_SAMPLE_RATE))
+        
+        print(f"Report: {engine.last_report}")
+        print(f"Audio: {frames / DEFAULT_SAMPLE_RATE:.2f}s, sample-exact join: {frames == expected}")
+        print(f"Server: {server.stats}")
+        
+        # Edit one sentence and render again: only that sentence is synthesized
+        cache = FileCache(os.path.join(tempfile.mkdtemp(), "tts"), max_bytes=200 * 1024 * 1024)
+        engine = TTSEngine(synthesize, max_workers=6, retry_backoff=0.05, cache=cache,
+                           cache_params={'voice_id': 'voice', 'model_id': 'eleven_multilingual_v2'})
+        engine.render(text, output_path)
+        engine.render(text.replace("sentence number 5,", "sentence number five,"), output_path)
+        print(f"After a one-sentence edit: {engine.last_report}")
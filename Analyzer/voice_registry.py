@@ -0,0 +1,198 @@
+"""
+Voice Registry
+Remembers which ElevenLabs voice was cloned for which speaker, so recurring
+speakers reuse their voice instead of being cloned again every run
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from cache import file_sha256
+
+
+class VoiceRegistry:
+    """JSON registry of cloned voices with least-recently-used eviction"""
+    
+    def __init__(self, path: str = "processed/cache/voices.json", max_voices: int = 30, client=None):
+        """
+        Initialize the registry
+        
+        Args:
+            path: Registry file (shared by every run on this machine)
+            max_voices: Cloned voice slots to use on the account; the least recently
+                        used voice is deleted from ElevenLabs to make room for a new one
+            client: ElevenLabs client used to delete evicted voices (None = only forget them)
+        """
+        self.path = path
+        self.max_voices = max_voices
+        self.client = client
+        self._lock = threading.Lock()
+        self._claims = {}  # key -> lock held while that speaker is looked up and cloned
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    
+    @staticmethod
+    def speaker_key(audio_path: str = None, speaker: str = None) -> str:
+        """
+        Registry key for a speaker
+        
+        Args:
+            audio_path: Speaker sample; its content hash identifies the recording
+            speaker: Explicit speaker name - reuses one voice across all their recordings
+        """
+        if speaker:
+            return f"speaker:{speaker.strip().lower()}"
+        return f"audio:{file_sha256(audio_path)}"
+    
+    @contextmanager
+    def claim(self, key: str):
+        """
+        Hold a speaker's key across lookup, clone and register
+        
+        Concurrent callers for the same speaker wait for the first one's clone
+        rather than each cloning (and leaving untracked voices on the account).
+        """
+        with self._lock:
+            lock = self._claims.setdefault(key, threading.Lock())
+        with lock:
+            yield
+    
+    def get(self, key: str):
+        """
+        Look up a speaker's voice
+        
+        Returns:
+            voice_id, or None if this speaker hasn't been cloned
+        """
+        with self._lock:
+            voices = self._load()
+            entry = voices.get(key)
+            if entry is None:
+                return None
+            entry['last_used'] = time.time()
+            entry['uses'] = entry.get('uses', 0) + 1
+            self._save(voices)
+            return entry['voice_id']
+    
+    def register(self, key: str, voice_id: str, clone_seconds: float = None, name: str = None):
+        """
+        Record a freshly cloned voice
+        
+        Args:
+            key: From speaker_key()
+            voice_id: ElevenLabs voice ID
+            clone_seconds: How long the clone took
+            name: Voice name on the account
+        """
+        with self._lock:
+            voices = self._load()
+            voices[key] = {
+                'voice_id': voice_id,
+                'name': name,
+                'clone_seconds': clone_seconds,
+                'created': time.time(),
+                'last_used': time.time(),
+                'uses': 1
+            }
+            self._evict(voices, self.max_voices, keep=key)
+            self._save(voices)
+    
+    def make_room(self):
+        """Free a voice slot before cloning, if every slot is taken"""
+        with self._lock:
+            voices = self._load()
+            if self._evict(voices, self.max_voices - 1):
+                self._save(voices)
+    
+    def forget(self, key: str, voice_id: str = None):
+        """
+        Drop an entry whose voice no longer exists on the account
+        
+        Args:
+            key: From speaker_key()
+            voice_id: Only drop the entry if it still holds this voice (another
+                      job may already have re-cloned the speaker)
+        """
+        with self._lock:
+            voices = self._load()
+            entry = voices.get(key)
+            if entry is not None and (voice_id is None or entry['voice_id'] == voice_id):
+                del voices[key]
+                self._save(voices)
+    
+    def stats(self) -> dict:
+        """Registry size and clone latency"""
+        with self._lock:
+            voices = self._load()
+        latencies = [v['clone_seconds'] for v in voices.values() if v.get('clone_seconds') is not None]
+        return {
+            'voices': len(voices),
+            'reuses': sum(v.get('uses', 1) - 1 for v in voices.values()),
+            'mean_clone_seconds': sum(latencies) / len(latencies) if latencies else None,
+            'max_clone_seconds': max(latencies, default=None)
+        }
+    
+    def _evict(self, voices: dict, limit: int, keep: str = None) -> int:
+        """Delete least recently used voices until at most `limit` remain"""
+        evicted = 0
+        for key in sorted(voices, key=lambda k: voices[k]['last_used']):
+            if len(voices) <= limit:
+                break
+            if key == keep:
+                continue
+            entry = voices.pop(key)
+            evicted += 1
+            print(f"🗑️ Evicting voice {entry['voice_id']} ({key})")
+            if self.client is not None:
+                try:
+                    self.client.voices.delete(entry['voice_id'])
+                except Exception as e:
+                    print(f"⚠️ Could not delete voice {entry['voice_id']}: {str(e)}")
+        return evicted
+    
+    def _load(self) -> dict:
+        # Re-read on every access so concurrent runs see each other's voices
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+    
+    def _save(self, voices: dict):
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(voices, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+# TEST CODE - no API key needed; a fake client records deletions
+if __name__ == "__main__":
+    import tempfile
+    import types
+    
+    print("=" * 50)
+    print("VOICE REGISTRY TEST")
+    print("=" * 50)
+    print()
+    
+    deleted = []
+    client = types.SimpleNamespace(voices=types.SimpleNamespace(delete=deleted.append))
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = VoiceRegistry(os.path.join(tmp, "voices.json"), max_voices=2, client=client)
+        
+        for speaker in ["alice", "bob"]:
+            registry.make_room()
+            registry.register(registry.speaker_key(speaker=speaker), f"voice-{speaker}", clone_seconds=4.0)
+            time.sleep(0.01)
+        
+        print(f"Alice reused: {registry.get(registry.speaker_key(speaker='Alice'))}")
+        
+        # Third speaker: bob is least recently used, so that voice is deleted
+        registry.make_room()
+        registry.register(registry.speaker_key(speaker="carol"), "voice-carol", clone_seconds=6.0)
+        
+        print(f"Deleted remotely: {deleted}")
+        print(f"Bob after eviction: {registry.get(registry.speaker_key(speaker='bob'))}")
+        print(f"Stats: {registry.stats()}")
@@ -0,0 +1,161 @@
+"""
+Streaming WAV Writer
+Writes PCM chunks into a preallocated, memory-mapped WAV file whose header is kept
+valid as data arrives, so the file is playable at every point while it is written
+"""
+
+import os
+import mmap
+import struct
+
+HEADER_SIZE = 44
+
+
+def wav_header(data_bytes: int, sample_rate: int, channels: int = 1, sample_width: int = 2) -> bytes:
+    """Canonical 44-byte PCM WAV header for data_bytes of audio"""
+    block_align = channels * sample_width
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + data_bytes, b'WAVE',
+        b'fmt ', 16, 1, channels, sample_rate, sample_rate * block_align, block_align, sample_width * 8,
+        b'data', data_bytes
+    )
+
+
+class StreamingWavWriter:
+    """Append raw PCM to a WAV file through a growing memory map"""
+    
+    def __init__(self, path: str, sample_rate: int, channels: int = 1, sample_width: int = 2,
+                 expected_seconds: float = None, header_every: int = 256 * 1024):
+        """
+        Create the file
+        
+        Args:
+            path: WAV file to write
+            sample_rate: Sample rate of the PCM
+            channels: Interleaved channels
+            sample_width: Bytes per sample (2 = s16le)
+            expected_seconds: Audio length to preallocate for, if known (the file
+                              still grows past it, and is trimmed on close)
+            header_every: Rewrite the header's size fields after this many new bytes
+        """
+        self.path = path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.block_align = channels * sample_width
+        self.header_every = header_every
+        self.data_bytes = 0
+        self._header_at = 0
+        
+        capacity = int((expected_seconds or 10.0) * sample_rate) * self.block_align
+        self._file = open(path, 'w+b')
+        self._capacity = 0
+        self._mmap = None
+        self._grow(HEADER_SIZE + max(capacity, mmap.PAGESIZE))
+        self._patch_header()
+    
+    @property
+    def frames(self) -> int:
+        """Whole frames written so far"""
+        return self.data_bytes // self.block_align
+    
+    @property
+    def duration(self) -> float:
+        """Seconds of audio written so far"""
+        return self.frames / self.sample_rate
+    
+    def write(self, data: bytes):
+        """
+        Append PCM bytes
+        
+        Chunks may split a sample (HTTP streams don't respect frame boundaries);
+        the header only ever counts whole frames.
+        """
+        end = HEADER_SIZE + self.data_bytes + len(data)
+        if end > self._capacity:
+            self._grow(max(end, self._capacity * 2))
+        self._mmap[HEADER_SIZE + self.data_bytes:end] = data
+        self.data_bytes += len(data)
+        
+        if self.data_bytes - self._header_at >= self.header_every:
+            self._patch_header()
+    
+    def write_silence(self, seconds: float):
+        """Append digital silence"""
+        self.write(b"\0" * (int(seconds * self.sample_rate) * self.block_align))
+    
+    def close(self) -> str:
+        """
+        Finish the file: drop any partial trailing frame, fix the header, trim the preallocation
+        
+        Returns:
+            Path to the WAV file
+        """
+        if self._file is None:
+            return self.path
+        self.data_bytes -= self.data_bytes % self.block_align
+        self._patch_header()
+        self._mmap.flush()
+        self._mmap.close()
+        self._file.truncate(HEADER_SIZE + self.data_bytes)
+        self._file.close()
+        self._file = None
+        return self.path
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def _patch_header(self):
+        whole = self.data_bytes - self.data_bytes % self.block_align
+        self._mmap[:HEADER_SIZE] = wav_header(whole, self.sample_rate, self.channels, self.sample_width)
+        self._header_at = self.data_bytes
+    
+    def _grow(self, size: int):
+        """Extend the file to `size` bytes and remap it"""
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.truncate(size)
+        try:
+            # Reserve the blocks up front where supported, so later writes can't hit ENOSPC
+            os.posix_fallocate(self._file.fileno(), 0, size)
+        except (AttributeError, OSError):
+            pass
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+        self._capacity = size
+
+
+# TEST CODE - stream odd-sized chunks and check the result with the wave module
+if __name__ == "__main__":
+    import wave
+    import random
+    import tempfile
+    
+    print("=" * 50)
+    print("STREAMING WAV WRITER TEST")
+    print("=" * 50)
+    print()
+    
+    pcm = bytes(random.getrandbits(8) for _ in range(24000 * 2 * 3))  # 3s at 24kHz
+    path = os.path.join(tempfile.mkdtemp(), "stream.wav")
+    
+    with StreamingWavWriter(path, 24000, expected_seconds=1.0, header_every=4096) as writer:
+        position = 0
+        while position < len(pcm):
+            size = random.randint(1, 9000)  # Deliberately splits samples
+            writer.write(pcm[position:position + size])
+            position += size
+            
+            if position > len(pcm) // 2 and position - size <= len(pcm) // 2:
+                # Mid-stream the file is already a valid WAV of what has arrived
+                with wave.open(path, 'rb') as partial:
+                    print(f"Readable mid-stream: {partial.getnframes()} frames so far")
+    
+    with wave.open(path, 'rb') as wav:
+        frames = wav.readframes(wav.getnframes())
+        print(f"Final: {wav.getnframes()} frames at {wav.getframerate()} Hz, "
+              f"file {os.path.getsize(path)} bytes")
+    print(f"Samples intact: {frames == pcm}")
@@ -0,0 +1,196 @@
+"""
+Word Table
+Columnar storage for transcript words: one array per field instead of a dict per word
+"""
+
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+
+WORD_FIELDS = ('word', 'start', 'end', 'confidence')
+
+
+class WordView(Mapping):
+    """Read-only dict-like view of one row, so word['start'] etc. keep working"""
+    
+    __slots__ = ('_table', '_index')
+    
+    def __init__(self, table: "WordTable", index: int):
+        self._table = table
+        self._index = index
+    
+    def __getitem__(self, key: str):
+        if key == 'word':
+            return self._table.words[self._index]
+        if key == 'start':
+            return self._table.starts[self._index]
+        if key == 'end':
+            return self._table.ends[self._index]
+        if key == 'confidence':
+            return self._table.confidences[self._index]
+        raise KeyError(key)
+    
+    def __iter__(self):
+        return iter(WORD_FIELDS)
+    
+    def __len__(self) -> int:
+        return len(WORD_FIELDS)
+    
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class WordTable(Sequence):
+    """
+    Parsed transcript words stored column by column
+    
+    Timestamps and confidences live in array('d') columns (8 bytes per value
+    instead of a boxed float), word strings are interned so repeated words
+    share one object, and the joined transcript text is only built when asked
+    for. Indexing returns a WordView, so code written against the old list of
+    word dicts keeps working.
+    """
+    
+    __slots__ = ('words', 'starts', 'ends', 'confidences', '_text')
+    
+    def __init__(self):
+        self.words = []
+        self.starts = array('d')
+        self.ends = array('d')
+        self.confidences = array('d')
+        self._text = None
+    
+    @classmethod
+    def from_results(cls, results: list) -> "WordTable":
+        """
+        Build from Speechmatics json-v2 'results' (punctuation entries are skipped)
+        
+        Args:
+            results: transcript_data['results']
+        
+        Returns:
+            WordTable with one row per word
+        """
+        table = cls()
+        for result in results:
+            if result.get('type') == 'word':
+                best = result.get('alternatives', [{}])[0]
+                table.append(best.get('content', ''), result.get('start_time', 0),
+                             result.get('end_time', 0), best.get('confidence', 0))
+        return table
+    
+    @classmethod
+    def from_dicts(cls, word_dicts) -> "WordTable":
+        """Build from word dicts with word/start/end/confidence keys"""
+        table = cls()
+        for w in word_dicts:
+            table.append(w['word'], w['start'], w['end'], w.get('confidence', 0))
+        return table
+    
+    @classmethod
+    def coerce(cls, words) -> "WordTable":
+        """Return words as a WordTable (e.g. a list of dicts loaded from a JSON cache)"""
+        return words if isinstance(words, cls) else cls.from_dicts(words)
+    
+    def append(self, word: str, start: float, end: float, confidence: float = 0.0):
+        """Add one word to the end of the table"""
+        self.words.append(sys.intern(word))
+        self.starts.append(start)
+        self.ends.append(end)
+        self.confidences.append(confidence)
+        self._text = None
+    
+    def __len__(self) -> int:
+        return len(self.words)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            table = WordTable()
+            table.words = self.words[index]
+            table.starts = self.starts[index]
+            table.ends = self.ends[index]
+            table.confidences = self.confidences[index]
+            return table
+        
+        if index < 0:
+            index += len(self.words)
+        if not 0 <= index < len(self.words):
+            raise IndexError("word index out of range")
+        return WordView(self, index)
+    
+    def __iter__(self):
+        for index in range(len(self.words)):
+            yield WordView(self, index)
+    
+    def __repr__(self) -> str:
+        return f"WordTable({len(self)} words)"
+    
+    @property
+    def text(self) -> str:
+        """Words joined by spaces (built once, on first use)"""
+        if self._text is None:
+            self._text = " ".join(self.words)
+        return self._text
+    
+    def to_dicts(self) -> list:
+        """The words as a plain list of dicts (for JSON and other external consumers)"""
+        return [
+            {'word': word, 'start': start, 'end': end, 'confidence': confidence}
+            for word, start, end, confidence in zip(self.words, self.starts, self.ends, self.confidences)
+        ]
+
+
+def json_default(obj):
+    """json.dump default= hook so results holding a WordTable serialize as before"""
+    if isinstance(obj, WordTable):
+        return obj.to_dicts()
+    if isinstance(obj, WordView):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# TEST CODE - parse a long synthetic transcript both ways and compare
+if __name__ == "__main__":
+    import time
+    import tracemalloc
+    
+    print("=" * 50)
+    print("WORD TABLE TEST")
+    print("=" * 50)
+    print()
+    
+    vocabulary = ["so", "um", "the", "project", "is", "basically", "like", "done", "and", "we"]
+    results = []
+    for i in range(50000):
+        results.append({
+            'type': 'word',
+            'start_time': i * 0.4,
+            'end_time': i * 0.4 + 0.3,
+            'alternatives': [{'content': vocabulary[i % len(vocabulary)], 'confidence': 0.9}]
+        })
+    
+    tracemalloc.start()
+    started = time.perf_counter()
+    dicts = []
+    text = ""
+    for r in results:
+        dicts.append({'word': r['alternatives'][0]['content'], 'start': r['start_time'],
+                      'end': r['end_time'], 'confidence': r['alternatives'][0]['confidence']})
+        text += dicts[-1]['word'] + " "
+    dict_seconds = time.perf_counter() - started
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    
+    tracemalloc.start()
+    started = time.perf_counter()
+    table = WordTable.from_results(results)
+    table_text = table.text
+    table_seconds = time.perf_counter() - started
+    table_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    
+    print(f"List of dicts: {dict_seconds * 1000:.1f} ms, {dict_bytes / 1024:.0f} KB")
+    print(f"WordTable:     {table_seconds * 1000:.1f} ms, {table_bytes / 1024:.0f} KB")
+    print(f"Same text: {table_text == text.strip()}")
+    print(f"Same words: {table.to_dicts() == dicts}")
+    print(f"Row view: {table[3]}")
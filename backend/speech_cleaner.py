@@ -1,9 +1,41 @@
 import os
+import sys
 from groq import Groq
 
+# Share the rule-based cleaner with the Analyzer pipeline
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Analyzer"))
+from local_cleaner import LocalCleaner, llm_passages, assemble
+from llm_chunks import ChunkedCompletion, RateLimiter
+
 client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+local_cleaner = LocalCleaner()
 
 def improve_transcript(raw_transcript: str) -> str:
+    # Fillers and stutters are dropped locally; only unclear sentences go to Groq
+    sentences = local_cleaner.clean(raw_transcript)
+    passages = llm_passages(sentences)
+    cleaned = clean_many([text for _, _, text in passages]) if passages else []
+    rewrites = {first: text for (first, _, _), text in zip(passages, cleaned)}
+    return assemble(sentences, rewrites)
+
+def clean_with_llm(raw_transcript: str) -> str:
+    return clean_many([raw_transcript])[0]
+
+def clean_many(texts: list) -> list:
+    # Long text goes out as sentence-aligned chunks, a few at a time
+    outputs, report = chunker.run(texts)
+    for truncated in report['truncated']:
+        print(f"WARNING: output hit the token limit, may be cut short: {truncated['text']}...")
+    return outputs
+
+def _complete_chunk(chunk) -> tuple:
+    context = ""
+    if chunk.context:
+        context = f"""
+Earlier text, for context only (do NOT include it in your answer):
+\"\"\"{chunk.context}\"\"\"
+"""
+
     prompt = f"""
 You are a speech improvement assistant.
 
@@ -14,9 +46,9 @@ Clean this transcript by:
 - Improving clarity and flow
 - Keeping the original meaning
 - Not adding new ideas
-
+{context}
 Transcript:
-\"\"\"{raw_transcript}\"\"\"
+\"\"\"{chunk.text}\"\"\"
 
 Return only the improved transcript.
 """
@@ -25,10 +57,17 @@ Return only the improved transcript.
         model="llama-3.1-8b-instant",  # 100% supported, NOT decommissioned
         messages=[{"role": "user", "content": prompt}],
         temperature=0.1,
-        max_tokens=600
+        max_tokens=_output_tokens(chunk)
     )
 
-    return response.choices[0].message.content.strip()
+    choice = response.choices[0]
+    return choice.message.content.strip(), choice.finish_reason
+
+def _output_tokens(chunk) -> int:
+    return min(2000, chunk.input_tokens * 2 + 100)
+
+chunker = ChunkedCompletion(_complete_chunk, rate_limiter=RateLimiter(requests_per_minute=30),
+                            output_tokens=_output_tokens)
 
 
 if __name__ == "__main__":
@@ -10,6 +10,7 @@ from text import AudioTranscriber
 from speech_cleaner import improve_transcript
 from audio_creation import AudioCreator
 from convex import ConvexClient
+from media_probe import probe_media
 
 def video_processing(video_path):
     """
@@ -95,27 +96,18 @@ def video_processing(video_path):
         print(f"❌ Video file not found: {video_path}")
         sys.exit(1)
     
-    # Convert .mov to .mp4 if needed
-    if video_path.lower().endswith('.mov'):
-        print(f"📹 Converting .mov to .mp4...")
-        import subprocess
-        mp4_path = video_path.rsplit('.', 1)[0] + '.mp4'
-        
-        try:
-            subprocess.run([
-                'ffmpeg', '-i', video_path,
-                '-vcodec', 'copy',
-                '-acodec', 'copy',
-                '-y',
-                mp4_path
-            ], check=True, capture_output=True)
-            
-            print(f"✅ Converted to: {mp4_path}")
-            video_path = mp4_path
-        except Exception as e:
-            print(f"⚠️ Conversion failed, using original .mov file")
-            print(f"   Error: {str(e)}")
-        print()
+    # Probe instead of remuxing: ffmpeg reads .mov directly, so a .mp4 copy is wasted I/O
+    keep_source_video = video_path.lower().endswith('.mov')  # .mov sources were never deleted
+    try:
+        media_info = probe_media(video_path)
+        print(f"📹 Container: {media_info.container} | Video: {media_info.video_codec} | "
+              f"Audio: {media_info.audio_codec} @ {media_info.sample_rate} Hz | "
+              f"{media_info.duration:.1f}s")
+        if not media_info.has_audio:
+            print("⚠️ No audio stream found in video")
+    except Exception as e:
+        print(f"⚠️ Could not probe video: {str(e)}")
+    print()
     
     print(f"📹 Video file: {video_path}")
     print()
@@ -258,7 +250,7 @@ def video_processing(video_path):
             
             # Delete all files except final improved audio WAV
             files_to_delete = [
-                video_path,  # Original video
+                None if keep_source_video else video_path,  # Original video
                 audio_path,  # Original audio
                 output_json,  # Transcript JSON
                 output_csv,  # Transcript CSV
@@ -314,6 +306,7 @@ def video_processing(video_path):
             'transcript_json': output_json,
             'transcript_csv': output_csv,
             'transcript_text': result['transcript'],
+            'words': result['words'],  # Per-word timestamps, for aligning edits
             'fixed_transcript_csv': output_fixed_csv if cleaned_transcript else None,
             'cleaned_transcript': cleaned_transcript
         }
@@ -1,36 +1,22 @@
 from moviepy import VideoFileClip, concatenate_videoclips
 import openai
 from quickstart import generate_vid
+from alignment import align, with_context, tokenize
 
 
-def generation_pre(original_transcript, fixed_transcript):
-    generation_time_stamps = [] # a list of tuples (start of phrase with filler, end of phrase)
-    generation_phrases = [] 
-    #for the phrase include the word before and after the filler
-    #figure out the differece between generated fixed sentence and original, if there is more difference than jsut filler words, regenerate whole sentence if not just do before and after the filler word and get rid of it
-    fillers = {
-    "uh", "um", "er", "ah", "like", "you know", "i mean", "so", "well",
-    "actually", "basically", "right", "okay", "ok", "hmm", "huh",
-    "anyway", "literally", "just", "sort of", "kind of", "you see",
-    "alright", "oh", "mm", "hmm", "umm", "ahh", "eh", "mhm"}#set of filler words
-    fixed_index = 0
-    word_time_stamps=[]#can we have the timestamps of each word
+def generation_pre(original_transcript, fixed_transcript, words=None):
+    generation_time_stamps = [] # a list of tuples (start of phrase to regenerate, end of phrase)
+    generation_phrases = [] # cleaned text to speak over each of those spans
+    #align the cleaned text against what was actually said, so one inserted or dropped word doesn't throw off everything after it
+    #each edit (filler dropped, word replaced, word added) keeps the word before and after it so the new audio joins up naturally
+    if words is None:
+        words = [{'word': word, 'start': 0.0, 'end': 0.0} for word in tokenize(original_transcript)]#no timestamps available
 
-    words_i = 0
-    for index, sentence in enumerate(original_transcript):
-        for i, word in enumerate(sentence):
-            word = word.lower()
-            if word in fillers:
-                generation_time_stamps += [(word_time_stamps[0] if words_i == 0 else word_time_stamps[words_i-1],word_time_stamps[-1] if words_i == len(word_time_stamps)-1 else word_time_stamps[words_i+1])]
-                generation_phrases += [[fixed_transcript[index][0 if i == 0 else i-1: i]]] #only need to do to i cause we got rid of the filler words in theory
-                words_i += 1
-            if word not in fillers and word != fixed_transcript[fixed_index]:
-                generation_time_stamps += [(word_time_stamps[words_i-i], word_time_stamps[words_i+(len(sentence)-i)])]
-                generation_phrases += [fixed_index[i][i+1]]
-                words_i += len(sentence)-i
-                break
+    regions = with_context(align(words, fixed_transcript), words, fixed_transcript, context=1)
+    for region in regions:
+        generation_time_stamps += [(region.start, region.end)]#already mapped onto the original word timestamps
+        generation_phrases += [region.new_text]
     return (generation_time_stamps,generation_phrases)
-    #figure out the differece between generated fixed sentence and original, if there is more difference than jsut filler words, regenerate whole sentence if not just do before and after the filler word and get rid of it
 
 def seperate(generation_time_stamps, original_video_path):
     full_clip = VideoFileClip(original_video_path)